@@ -1,8 +1,23 @@
-import random
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 
+from checkpoint import Checkpointer
+from CompiledInstance import CompiledInstance
+from MinConflictsRepair import repair_solution
+
+# Fitness added for each hard constraint violation left by the built-in decoder
+HARD_PENALTY = 1000000
+
+# Smallest population decoded as one batch: below it the per-lecture numpy overhead of the batch
+# decoder costs more than decoding the bats one by one (break-even around 80 bats on ITC-2007)
+BATCH_DECODE_MIN = 100
+
 class BatAlgorithm:
-    def __init__(self, D, NP, N_Gen, A, r, Qmin, Qmax, Lower, Upper, function):
+    def __init__(self, D, NP, N_Gen, A, r, Qmin, Qmax, Lower, Upper, function, seed=None, workers=1,
+                 cache_size=0, checkpoint=None, checkpoint_interval=60.0, resume=False):
         self.D = D  # Dimension
         self.NP = NP  # Population size
         self.N_Gen = N_Gen  # Number of generations
@@ -12,94 +27,501 @@ class BatAlgorithm:
         self.Qmax = Qmax  # Frequency maximum
         self.Lower = Lower  # Lower bound
         self.Upper = Upper  # Upper bound
+        self.rng = np.random.default_rng(seed)  # Single generator for all random draws
 
         self.f_min = 0.0  # Minimum fitness
-        
-        self.Lb = [0] * self.D  # Lower bound for each dimension
-        self.Ub = [0] * self.D  # Upper bound for each dimension
-        self.Q = [0] * self.NP  # Frequency for each bat
 
-        self.v = [[0 for _ in range(self.D)] for _ in range(self.NP)]  # Velocity
-        self.Sol = [[0 for _ in range(self.D)] for _ in range(self.NP)]  # Population of solutions
-        self.Fitness = [0] * self.NP  # Fitness for each bat
-        self.best = [0] * self.D  # Best solution
-        self.Fun = function
+        self.Lb = np.full(self.D, self.Lower, dtype=float)  # Lower bound for each dimension
+        self.Ub = np.full(self.D, self.Upper, dtype=float)  # Upper bound for each dimension
+        self.Q = np.zeros(self.NP)  # Frequency for each bat, broadcast over the dimensions
+
+        self.v = np.zeros((self.NP, self.D))  # Velocity
+        self.Sol = np.zeros((self.NP, self.D))  # Population of solutions
+        self.Fitness = np.zeros(self.NP)  # Fitness for each bat
+        self.best = np.zeros(self.D)  # Best solution
+        self.Fun = function  # Fitness function(D, Sol); None for the built-in ITC-2007 timetable cost
+        self.instance = None  # Compiled instance used by the built-in decoder
+        self.workers = workers  # Number of processes evaluating each generation
+        self.pool = None
+        self.cache_size = cache_size  # Number of decoded timetables whose fitness is memoized
+        self.cache = FitnessCache(cache_size) if cache_size else None
+        self.stats = {"evaluations": 0, "cache_hits": 0, "cache_misses": 0}  # Run statistics
+        self.checkpointer = Checkpointer(checkpoint, checkpoint_interval, engine="bat")  # Saves the swarm
+        self.resume = resume  # Continue move_bat from the checkpoint file if it exists
 
     def best_bat(self):
         """
         Determine the bat with the best fitness and update the global best solution.
         """
         best_index = np.argmin(self.Fitness)  # Index of the best fitness
-        self.best = self.Sol[best_index][:]  # Update the best solution
+        self.best = self.Sol[best_index].copy()  # Update the best solution
         self.f_min = self.Fitness[best_index]
 
-    def init_bat(self, model, decode_solution):
+    def compiled(self, model):
+        """
+        Return the compiled instance of the model used by the built-in decoder.
+        """
+        if isinstance(model, CompiledInstance):
+            return model
+        if self.instance is None:
+            self.instance = CompiledInstance(model)
+        return self.instance
+
+    def evaluate(self, S, model, decode_solution=None):
+        """
+        Compute the fitness of each row of S, in parallel chunks when an evaluation pool is open.
+        """
+        self.stats["evaluations"] += len(S)
+        if self.pool is None:
+            payload = self.compiled(model) if decode_solution is None else model
+            if self.cache is None:
+                return evaluate_batch(S, payload, self.Fun, decode_solution)
+            hits, misses = self.cache.hits, self.cache.misses
+            fitness = evaluate_batch(S, payload, self.Fun, decode_solution, self.cache)
+            self.stats["cache_hits"] += self.cache.hits - hits
+            self.stats["cache_misses"] += self.cache.misses - misses
+            return fitness
+        chunks = np.array_split(S, min(len(S), self.workers * 4))
+        results = list(self.pool.map(_evaluate_chunk, chunks))
+        self.stats["cache_hits"] += sum(hits for _, hits, _ in results)
+        self.stats["cache_misses"] += sum(misses for _, _, misses in results)
+        return np.concatenate([fitness for fitness, _, _ in results])
+
+    def open_pool(self, model, decode_solution=None):
+        """
+        Start the evaluation processes and ship the (compiled) instance to them once.
+        The fitness function and decoder must be picklable, i.e. defined at module level.
+        Each process keeps its own fitness cache of cache_size entries.
+        """
+        if self.workers <= 1 or self.pool is not None:
+            return
+        payload = self.compiled(model) if decode_solution is None else model
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_evaluation_worker,
+                                        initargs=(payload, self.Fun, decode_solution, self.cache_size))
+
+    def close_pool(self):
+        """Shut down the evaluation processes."""
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def init_bat(self, model, decode_solution=None):
         """
         Initialize the bats' positions and velocities within the bounds.
         """
-        for i in range(self.D):
-            self.Lb[i] = self.Lower
-            self.Ub[i] = self.Upper
-
-        for i in range(self.NP):
-            self.Q[i] = 0
-            for j in range(self.D):
-                rnd = np.random.uniform(0, 1)
-                self.v[i][j] = 0.0
-                self.Sol[i][j] = self.Lb[j] + (self.Ub[j] - self.Lb[j]) * rnd
-            decoded_solution = decode_solution(self.Sol[i], model)
-            if self.is_feasible(decoded_solution, model):
-                self.Fitness[i] = self.Fun(self.D, self.Sol[i])
-            else:
-                self.Fitness[i] = float("inf")  # Penalize infeasible solutions
+        self.Q[:] = 0.0
+        self.v[:] = 0.0
+        self.Sol = self.Lb + (self.Ub - self.Lb) * self.rng.random((self.NP, self.D))
+        self.Fitness = self.evaluate(self.Sol, model, decode_solution)
         self.best_bat()
 
     def simplebounds(self, val, lower, upper):
         """
         Ensure that the solution stays within the defined bounds.
         """
-        return max(lower, min(val, upper))
+        return np.clip(val, lower, upper)
+
+    def generate_candidates(self):
+        """
+        Move every bat by frequency and velocity, and replace the bats selected by the pulse rate
+        with a local random walk around the best solution.
+        """
+        self.Q = self.Qmin + (self.Qmax - self.Qmin) * self.rng.random(self.NP)
+        self.v += (self.Sol - self.best) * self.Q[:, np.newaxis]
+        S = self.simplebounds(self.Sol + self.v, self.Lb, self.Ub)
+
+        walk = self.rng.random(self.NP) > self.r
+        S[walk] = self.simplebounds(
+            self.best + 0.001 * self.rng.standard_normal((np.count_nonzero(walk), self.D)), self.Lb, self.Ub
+        )
+        return S
+
+    def accept(self, S, Fnew):
+        """
+        Accept the feasible candidates that do not worsen their bat (subject to loudness),
+        and update the global best solution.
+        """
+        feasible = np.isfinite(Fnew)
+        accepted = feasible & (Fnew <= self.Fitness) & (self.rng.random(self.NP) < self.A)
+        self.Sol[accepted] = S[accepted]
+        self.Fitness[accepted] = Fnew[accepted]
+
+        if feasible.any():
+            best_index = np.argmin(Fnew)
+            if Fnew[best_index] <= self.f_min:
+                self.best = S[best_index].copy()
+                self.f_min = Fnew[best_index]
 
-    def move_bat(self, model, decode_solution):
+    def move_bat(self, model, decode_solution=None):
         """
         Perform the Bat Algorithm optimization process with feasibility checks.
+        Without decode_solution each bat is decoded with decode_random_keys.
         """
-        S = [[0.0 for _ in range(self.D)] for _ in range(self.NP)]
-        self.init_bat(model, decode_solution)
-
-        for t in range(self.N_Gen):
-            for i in range(self.NP):
-                rnd = np.random.uniform(0, 1)
-                self.Q[i] = self.Qmin + (self.Qmax - self.Qmin) * rnd
-                for j in range(self.D):
-                    self.v[i][j] = self.v[i][j] + (self.Sol[i][j] - self.best[j]) * self.Q[i]
-                    S[i][j] = self.Sol[i][j] + self.v[i][j]
-                    S[i][j] = self.simplebounds(S[i][j], self.Lb[j], self.Ub[j])
-
-                rnd = np.random.random_sample()
-                if rnd > self.r:
-                    for j in range(self.D):
-                        S[i][j] = self.best[j] + 0.001 * random.gauss(0, 1)
-                        S[i][j] = self.simplebounds(S[i][j], self.Lb[j], self.Ub[j])
-
-                decoded_solution = decode_solution(S[i], model)
-                if self.is_feasible(decoded_solution, model):
-                    Fnew = self.Fun(self.D, S[i])
-                    rnd = np.random.random_sample()
-                    if (Fnew <= self.Fitness[i]) and (rnd < self.A):
-                        for j in range(self.D):
-                            self.Sol[i][j] = S[i][j]
-                        self.Fitness[i] = Fnew
-
-                    if Fnew <= self.f_min:
-                        for j in range(self.D):
-                            self.best[j] = S[i][j]
-                        self.f_min = Fnew
+        start = time.perf_counter()
+        first = 0
+        self.open_pool(model, decode_solution)
+        try:
+            saved = self.checkpointer.load() if self.resume else None
+            if saved is None:
+                self.init_bat(model, decode_solution)
+            else:
+                first = self.restore(saved)
+                start -= saved["elapsed"]
+
+            for t in range(first, self.N_Gen):
+                S = self.generate_candidates()
+                Fnew = self.evaluate(S, model, decode_solution)
+                self.accept(S, Fnew)
+                if self.checkpointer.due():
+                    self.checkpointer.save(self.checkpoint_state(t + 1, time.perf_counter() - start))
+        finally:
+            self.close_pool()
+        self.checkpointer.save(self.checkpoint_state(max(first, self.N_Gen), time.perf_counter() - start))
 
         return self.best
 
-    
-    
+    def get_solution(self, model, decode_solution=None, seed=None, time_limit=5.0):
+        """
+        Decode the best bat into a timetable and repair its hard violations with repair_solution.
+
+        :param model: The model given to move_bat.
+        :param decode_solution: The decoder given to move_bat (None for the built-in decoder).
+        :param seed: Seed of the repair.
+        :param time_limit: Wall-clock budget of the repair in seconds.
+        :return: List of tuples (course_id, room_id, day, slot).
+        """
+        if decode_solution is not None:
+            return repair_solution(decode_solution(self.best, model), model, time_limit=time_limit, seed=seed)
+        instance = self.compiled(model)
+        periods, rooms, _ = decode_random_keys(self.best, instance)
+        return repair_solution(instance.to_solution(periods, rooms), None, time_limit=time_limit, seed=seed,
+                               instance=instance)
+
+    def checkpoint_state(self, generation, elapsed):
+        """
+        Return the state of the swarm after a number of generations, saved in a checkpoint.
+        """
+        return {"generation": generation, "Sol": self.Sol, "v": self.v, "Q": self.Q, "Fitness": self.Fitness,
+                "best": self.best, "f_min": self.f_min, "rng": self.rng.bit_generator.state,
+                "stats": dict(self.stats), "elapsed": elapsed}
+
+    def restore(self, saved):
+        """
+        Restore the swarm from a checkpoint and return the number of generations already done.
+        """
+        if saved["Sol"].shape != (self.NP, self.D):
+            raise ValueError(f"The checkpoint holds {saved['Sol'].shape[0]} bats of dimension {saved['Sol'].shape[1]}")
+        self.Sol, self.v, self.Q = saved["Sol"].copy(), saved["v"].copy(), saved["Q"].copy()
+        self.Fitness, self.best, self.f_min = saved["Fitness"].copy(), saved["best"].copy(), saved["f_min"]
+        self.rng.bit_generator.state = saved["rng"]
+        self.stats.update(saved["stats"])
+        return saved["generation"]
+
+
+class FitnessCache:
+    def __init__(self, size):
+        """
+        Least recently used cache of (feasible, fitness) per decoded timetable.
+        It assumes that the fitness only depends on the decoded timetable.
+
+        :param size: Maximal number of cached timetables.
+        """
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the cached (feasible, fitness) of a timetable key, or None."""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, feasible, fitness):
+        """Store the (feasible, fitness) of a timetable key, evicting the least recently used entry."""
+        self.entries[key] = (feasible, fitness)
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+
+def timetable_key(periods, rooms, nr_rooms):
+    """
+    Return a compact key of a decoded timetable given as period and room index per lecture: the bytes
+    of one int32 code per lecture, so that two different timetables never share a key.
+    """
+    return (periods * nr_rooms + rooms).astype(np.int32).tobytes()
+
+
+def evaluate_batch(S, model, function, decode_solution=None, cache=None):
+    """
+    Compute the fitness of each row of S.
+    With the built-in random-key decoder (model is then a CompiledInstance) every row decodes to a
+    timetable, and each remaining hard violation adds HARD_PENALTY; with an external decoder
+    infeasible solutions get an infinite fitness. Timetables found in the cache are not re-evaluated.
+    Without a function the built-in decoder and ITC-2007 cost are used (see evaluate_itc2007).
+    """
+    if function is None and decode_solution is None:
+        return evaluate_itc2007(S, model, cache)
+    D = S.shape[1]
+    fitness = np.empty(len(S))
+    for i, solution in enumerate(S):
+        if decode_solution is None:
+            periods, rooms, violations = decode_random_keys(solution, model)
+            key = timetable_key(periods, rooms, model.nr_rooms) if cache is not None else None
+        else:
+            decoded_solution = decode_solution(solution, model)
+            key = tuple(sorted(decoded_solution)) if cache is not None else None
+
+        entry = cache.get(key) if cache is not None else None
+        if entry is not None:
+            fitness[i] = entry[1]
+            continue
+
+        if decode_solution is None:
+            feasible = violations == 0
+            fitness[i] = function(D, solution) + HARD_PENALTY * violations
+        else:
+            feasible = is_feasible(decoded_solution, model)
+            fitness[i] = function(D, solution) if feasible else np.inf  # Penalize infeasible solutions
+        if cache is not None:
+            cache.put(key, feasible, fitness[i])
+    return fitness
+
+
+def decode_population(S, instance):
+    """
+    Decode every row of S as decode_random_keys does. Populations of BATCH_DECODE_MIN bats or more are
+    decoded all at once: step k places the k-th lecture in the key order of every bat, with the bitmasks
+    of all bats held in int64 arrays. Smaller populations, and instances whose masks do not fit (over
+    62 periods or 52 rooms), are decoded bat by bat.
+
+    :return: Tuple (periods, rooms, violations) of arrays with one row or entry per bat.
+    """
+    S = np.asarray(S, dtype=float).reshape(-1, instance.nr_lectures)
+    n, nr_lectures = S.shape
+    nr_periods = instance.nr_periods
+    if n < BATCH_DECODE_MIN or nr_periods > 62 or instance.nr_rooms > 52:
+        decoded = [decode_random_keys(keys, instance) for keys in S]
+        periods = np.array([d[0] for d in decoded], dtype=np.int64).reshape(n, nr_lectures)
+        rooms = np.array([d[1] for d in decoded], dtype=np.int64).reshape(n, nr_lectures)
+        violations = np.array([d[2] for d in decoded], dtype=np.int64)
+        return periods, rooms, violations
+
+    available_mask = np.array(instance.available_mask, dtype=np.int64)
+    fitting_rooms_mask = np.array(instance.fitting_rooms_mask, dtype=np.int64)
+    all_periods = np.int64(instance.all_periods_mask)
+    conflicting = np.zeros((instance.nr_courses, instance.nr_courses), dtype=np.int64)  # All bits set on conflict
+    for c, neighbours in enumerate(instance.course_conflicts):
+        conflicting[c, neighbours] = -1
+
+    # Course and start period of the k-th lecture in the key order of every bat
+    order = np.argsort(S, axis=1, kind="stable")
+    order_course = instance.lecture_course[order]
+    order_start = np.take_along_axis((np.mod(S, 1.0) * nr_periods).astype(np.int64), order, axis=1)
+
+    # The occupancy bitmasks of decode_random_keys, one row per bat
+    bats = np.arange(n)
+    blocked = np.zeros((n, instance.nr_courses), dtype=np.int64)
+    own = np.zeros((n, instance.nr_courses), dtype=np.int64)
+    free_rooms = np.full((n, nr_periods), instance.all_rooms_mask, dtype=np.int64)
+    full = np.zeros(n, dtype=np.int64)
+    course_room = np.full((n, instance.nr_courses), -1, dtype=np.int64)
+
+    step_periods = np.empty((n, nr_lectures), dtype=np.int64)
+    step_rooms = np.empty((n, nr_lectures), dtype=np.int64)
+    violations = np.zeros(n, dtype=np.int64)
+    for k in range(nr_lectures):
+        c = order_course[:, k]
+        start = order_start[:, k]
+        available = available_mask[c]
+        candidates = available & ~blocked[bats, c] & ~full
+        stuck = candidates == 0
+        if stuck.any():
+            violations += stuck
+            own_c = own[bats, c]
+            fallback = available & ~own_c & ~full
+            fallback = np.where(fallback != 0, fallback, all_periods & ~own_c & ~full)
+            fallback = np.where(fallback != 0, fallback, all_periods & ~full)
+            fallback = np.where(fallback != 0, fallback, all_periods)
+            candidates = np.where(stuck, fallback, candidates)
+
+        # First candidate period at or after start, wrapping around
+        later = candidates >> start
+        p = np.where(later != 0, start + _lowest_bit(later), _lowest_bit(candidates))
+
+        free = free_rooms[bats, p]
+        fitting = free & fitting_rooms_mask[c]
+        b = course_room[bats, c]
+        keep = (b >= 0) & (((fitting >> np.maximum(b, 0)) & 1) == 1)
+        if not keep.all():
+            violations += ~keep & (fitting == 0) & (free == 0)
+            b = np.where(keep, b, np.where(fitting != 0, _lowest_bit(fitting),
+                                           np.where(free != 0, _highest_bit(free), 0)))
+            course_room[bats, c] = b
+
+        free &= ~(np.int64(1) << b)
+        free_rooms[bats, p] = free
+        bit = np.int64(1) << p
+        full |= np.where(free == 0, bit, 0)
+        blocked[bats, c] |= bit
+        own[bats, c] |= bit
+        blocked |= conflicting[c] & bit[:, np.newaxis]
+        step_periods[:, k] = p
+        step_rooms[:, k] = b
+
+    periods = np.empty((n, nr_lectures), dtype=np.int64)
+    rooms = np.empty((n, nr_lectures), dtype=np.int64)
+    np.put_along_axis(periods, order, step_periods, axis=1)
+    np.put_along_axis(rooms, order, instance.rooms_by_capacity[step_rooms], axis=1)
+    return periods, rooms, violations
+
+
+def _lowest_bit(masks):
+    """Index of the lowest set bit of each non-zero int64 mask (exact: a single bit converts to float exactly)."""
+    return np.frexp((masks & -masks).astype(float))[1] - 1
+
+
+def _highest_bit(masks):
+    """Index of the highest set bit of each non-zero int64 mask of at most 52 bits."""
+    return np.frexp(masks.astype(float))[1] - 1
+
+
+def evaluate_itc2007(S, instance, cache=None):
+    """
+    Built-in timetable fitness: decode the whole population, then compute the ITC-2007 soft cost
+    of all bats together from the compiled instance arrays. Each remaining hard violation adds
+    HARD_PENALTY.
+
+    :return: Fitness vector with one entry per row of S.
+    """
+    periods, rooms, violations = decode_population(S, instance)
+    fitness = np.empty(len(S))
+    todo = np.arange(len(S))
+    if cache is not None:
+        keys = [timetable_key(periods[i], rooms[i], instance.nr_rooms) for i in range(len(S))]
+        todo = []
+        for i, key in enumerate(keys):
+            entry = cache.get(key)
+            if entry is None:
+                todo.append(i)
+            else:
+                fitness[i] = entry[1]
+        todo = np.array(todo, dtype=np.int64)
+    if len(todo):
+        fitness[todo] = instance.soft_cost(periods[todo], rooms[todo]) + HARD_PENALTY * violations[todo]
+        if cache is not None:
+            for i in todo.tolist():
+                cache.put(keys[i], violations[i] == 0, fitness[i])
+    return fitness
+
+
+_worker_payload = None
+
+
+def _init_evaluation_worker(model, function, decode_solution, cache_size):
+    """Keep the instance, fitness function, decoder and a fitness cache resident in an evaluation process."""
+    global _worker_payload
+    _worker_payload = (model, function, decode_solution, FitnessCache(cache_size) if cache_size else None)
+
+
+def _evaluate_chunk(S):
+    """
+    Evaluate one chunk of candidates in an evaluation process.
+
+    :return: Tuple (fitness, cache hits, cache misses) of the chunk.
+    """
+    model, function, decode_solution, cache = _worker_payload
+    if cache is None:
+        return evaluate_batch(S, model, function, decode_solution), 0, 0
+    hits, misses = cache.hits, cache.misses
+    fitness = evaluate_batch(S, model, function, decode_solution, cache)
+    return fitness, cache.hits - hits, cache.misses - misses
+
+
+def decode_random_keys(keys, instance):
+    """
+    Decode a bat as priority keys: lectures are placed greedily in increasing key order.
+    Each lecture goes to the first conflict-free available period at or after the period chosen
+    by the fractional part of its key, in the smallest free room that fits (keeping the room of
+    the previous lecture of the course when possible). If no such period is left, the lecture
+    goes to a period with a free room and counts as a violation.
+
+    :param keys: One key per lecture of the compiled instance.
+    :param instance: The compiled instance (CompiledInstance).
+    :return: Tuple (periods, rooms, violations) with the period and room index of each lecture
+             and the number of lectures placed in violation of a hard constraint.
+    """
+    nr_periods = instance.nr_periods
+    lecture_course = instance.lecture_course.tolist()
+    available_mask = instance.available_mask
+    fitting_rooms_mask = instance.fitting_rooms_mask
+    course_conflicts = instance.course_conflicts
+    rooms_by_capacity = instance.rooms_by_capacity.tolist()
+
+    keys = np.asarray(keys, dtype=float)
+    order = np.argsort(keys, kind="stable").tolist()
+    starts = (np.mod(keys, 1.0) * nr_periods).astype(np.int64).tolist()
+
+    # Occupancy indexes as bitmasks: periods each course may no longer use, periods used by the
+    # course itself, free rooms of each period, periods without a free room, and the last room
+    # bit used by each course
+    blocked = [0] * instance.nr_courses
+    own = [0] * instance.nr_courses
+    free_rooms = [instance.all_rooms_mask] * nr_periods
+    full = 0
+    course_room = [-1] * instance.nr_courses
+
+    periods = [0] * len(order)
+    rooms = [0] * len(order)
+    violations = 0
+    for lecture in order:
+        c = lecture_course[lecture]
+        start = starts[lecture]
+        candidates = available_mask[c] & ~blocked[c] & ~full
+        if not candidates:
+            violations += 1
+            candidates = ((available_mask[c] & ~own[c] & ~full) or (instance.all_periods_mask & ~own[c] & ~full)
+                          or (instance.all_periods_mask & ~full) or instance.all_periods_mask)
+
+        # First candidate period at or after start, wrapping around
+        later = candidates >> start
+        if later:
+            p = start + (later & -later).bit_length() - 1
+        else:
+            p = (candidates & -candidates).bit_length() - 1
+
+        free = free_rooms[p]
+        fitting = free & fitting_rooms_mask[c]
+        b = course_room[c]
+        if b < 0 or not (fitting >> b) & 1:
+            if fitting:
+                b = (fitting & -fitting).bit_length() - 1
+            elif free:
+                b = free.bit_length() - 1
+            else:
+                b = 0
+                violations += 1
+        course_room[c] = b
+
+        free_rooms[p] = free & ~(1 << b)
+        if not free_rooms[p]:
+            full |= 1 << p
+        bit = 1 << p
+        blocked[c] |= bit
+        own[c] |= bit
+        for n in course_conflicts[c]:
+            blocked[n] |= bit
+
+        periods[lecture] = p
+        rooms[lecture] = rooms_by_capacity[b]
+
+    return np.array(periods, dtype=np.int64), np.array(rooms, dtype=np.int64), violations
+
+
 def is_feasible(solution, model):
         """
         Check if a solution satisfies all hard constraints.
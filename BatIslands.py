@@ -0,0 +1,181 @@
+import multiprocessing
+import queue
+import time
+
+import numpy as np
+
+from Bat import BatAlgorithm, decode_random_keys
+from CompiledInstance import CompiledInstance
+from MinConflictsRepair import repair_solution
+
+# Loudness, pulse rate and frequency range of each island; islands beyond the list reuse it cyclically
+DEFAULT_ISLAND_SETTINGS = [
+    {"A": 0.9, "r": 0.5, "Qmin": 0.0, "Qmax": 2.0},
+    {"A": 0.5, "r": 0.2, "Qmin": 0.0, "Qmax": 1.0},
+    {"A": 0.95, "r": 0.8, "Qmin": 0.0, "Qmax": 4.0},
+    {"A": 0.7, "r": 0.35, "Qmin": 0.5, "Qmax": 1.5},
+]
+
+
+class BatIslands:
+    def __init__(self, model, function, NP, N_Gen, islands=None, settings=None, migration_interval=10,
+                 Lower=0.0, Upper=1.0, time_limit=None, seed=None, checkpoint=None, checkpoint_interval=60.0,
+                 resume=False):
+        """
+        Island model of the bat algorithm: independent swarms in separate processes that
+        periodically send their best bat to the next island of a ring.
+
+        :param model: The problem model (ProblemModel) or its CompiledInstance.
+        :param function: Fitness function(D, Sol), picklable (defined at module level); None for the ITC-2007 cost.
+        :param NP: Population size of each island.
+        :param N_Gen: Number of generations of each island.
+        :param islands: Number of islands (defaults to the number of CPUs).
+        :param settings: List of dicts with the A, r, Qmin and Qmax of each island.
+        :param migration_interval: Number of generations between migrations.
+        :param Lower: Lower bound of the keys.
+        :param Upper: Upper bound of the keys.
+        :param time_limit: Optional wall-clock budget in seconds shared by all islands.
+        :param seed: Seed from which the seed of each island is derived.
+        :param checkpoint: Optional path prefix of the checkpoints: island i saves its swarm to <checkpoint>.<i>.
+        :param checkpoint_interval: Seconds between two checkpoints of an island.
+        :param resume: Continue every island from its checkpoint if it exists (the time limit covers both runs).
+                       Migrations depend on the timing of the islands, so a resumed run does not repeat
+                       an uninterrupted one exactly.
+        """
+        self.instance = model if isinstance(model, CompiledInstance) else CompiledInstance(model)
+        self.function = function
+        self.NP = NP
+        self.N_Gen = N_Gen
+        self.islands = islands or multiprocessing.cpu_count()
+        settings = settings or DEFAULT_ISLAND_SETTINGS
+        self.settings = [settings[i % len(settings)] for i in range(self.islands)]
+        self.migration_interval = migration_interval
+        self.Lower = Lower
+        self.Upper = Upper
+        self.time_limit = time_limit
+        self.seed = seed
+        self.checkpoint = checkpoint
+        self.checkpoint_interval = checkpoint_interval
+        self.resume = resume
+
+        self.best = None  # Best solution over all islands
+        self.f_min = np.inf
+        self.island_results = []  # (island, f_min) of each island
+        self.failed_islands = []  # Islands whose process died without reporting
+
+    def run(self):
+        """
+        Run all islands and return the overall best solution.
+        """
+        seeds = np.random.SeedSequence(self.seed).spawn(self.islands)
+        deadline = None if self.time_limit is None else time.time() + self.time_limit
+
+        # Ring of shared-memory mailboxes: island i publishes its best bat in mailboxes[i] and reads
+        # migrants from mailboxes[i - 1]; a mailbox holds the bat, its fitness and a version stamp
+        D = self.instance.nr_lectures
+        mailboxes = [multiprocessing.Array("d", [0.0] * D + [np.inf, 0.0]) for _ in range(self.islands)]
+        results = multiprocessing.Queue()
+        processes = []
+        for i in range(self.islands):
+            process = multiprocessing.Process(
+                target=_run_island,
+                args=(i, self.instance, self.function, self.NP, self.N_Gen, self.settings[i], self.Lower,
+                      self.Upper, seeds[i], self.migration_interval, deadline, mailboxes[i],
+                      mailboxes[i - 1], results, self.checkpoint and f"{self.checkpoint}.{i}",
+                      self.checkpoint_interval, self.resume),
+                daemon=True,
+            )
+            process.start()
+            processes.append(process)
+
+        # An island that crashes never reports, so wait only as long as some island may still report
+        reported = {}
+        failed = set()
+        while len(reported) + len(failed) < self.islands:
+            try:
+                island, best, f_min = results.get(timeout=0.5)
+            except queue.Empty:
+                failed = {i for i, process in enumerate(processes)
+                          if process.exitcode not in (None, 0) and i not in reported}
+                continue
+            reported[island] = (best, f_min)
+        for process in processes:
+            process.join()
+        self.failed_islands = sorted(failed)
+        if not reported:
+            raise RuntimeError(f"All {self.islands} islands failed")
+
+        self.island_results = sorted((island, f_min) for island, (_, f_min) in reported.items())
+        for island, (best, f_min) in sorted(reported.items()):
+            if f_min < self.f_min:
+                self.best, self.f_min = best, f_min
+        return self.best
+
+    def get_solution(self, seed=None, time_limit=5.0):
+        """
+        Decode the overall best bat into a timetable and repair its hard violations with repair_solution.
+
+        :param seed: Seed of the repair.
+        :param time_limit: Wall-clock budget of the repair in seconds.
+        :return: List of tuples (course_id, room_id, day, slot).
+        """
+        periods, rooms, _ = decode_random_keys(self.best, self.instance)
+        return repair_solution(self.instance.to_solution(periods, rooms), None, time_limit=time_limit, seed=seed,
+                               instance=self.instance)
+
+
+def _run_island(island, instance, function, NP, N_Gen, settings, Lower, Upper, seed, migration_interval,
+                deadline, outbox, inbox, results, checkpoint=None, checkpoint_interval=60.0, resume=False):
+    """
+    Evolve one island. Every migration_interval generations its best bat is published in its
+    mailbox, and a new migrant from the previous island replaces the worst bat if it improves on it.
+    """
+    bat = BatAlgorithm(D=instance.nr_lectures, NP=NP, N_Gen=N_Gen, A=settings["A"], r=settings["r"],
+                       Qmin=settings["Qmin"], Qmax=settings["Qmax"], Lower=Lower, Upper=Upper,
+                       function=function, seed=seed, checkpoint=checkpoint,
+                       checkpoint_interval=checkpoint_interval)
+    start = time.time()
+    first = 0
+    saved = bat.checkpointer.load() if resume else None
+    if saved is None:
+        bat.init_bat(instance)
+    else:
+        first = bat.restore(saved)
+        start -= saved["elapsed"]
+        if deadline is not None:
+            deadline -= saved["elapsed"]
+    D = instance.nr_lectures
+    last_seen = 0.0
+
+    for t in range(first, N_Gen):
+        if deadline is not None and time.time() > deadline:
+            break
+        S = bat.generate_candidates()
+        bat.accept(S, bat.evaluate(S, instance))
+
+        if (t + 1) % migration_interval == 0:
+            with outbox.get_lock():
+                outbox[:D] = bat.best.tolist()
+                outbox[D] = bat.f_min
+                outbox[D + 1] += 1
+            with inbox.get_lock():
+                stamp = inbox[D + 1]
+                migrant = np.array(inbox[:D]) if stamp != last_seen else None
+                f_migrant = inbox[D]
+            if migrant is not None:
+                last_seen = stamp
+                worst = np.argmax(bat.Fitness)
+                if f_migrant < bat.Fitness[worst]:
+                    bat.Sol[worst] = migrant
+                    bat.Fitness[worst] = f_migrant
+                    bat.v[worst] = 0.0
+                if f_migrant < bat.f_min:
+                    bat.best, bat.f_min = migrant.copy(), f_migrant
+
+        if bat.checkpointer.due():
+            bat.checkpointer.save(bat.checkpoint_state(t + 1, time.time() - start))
+    else:
+        t = N_Gen
+    bat.checkpointer.save(bat.checkpoint_state(t, time.time() - start))
+
+    results.put((island, bat.best, float(bat.f_min)))
@@ -1,60 +1,110 @@
-import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from Bat import decode_random_keys
+from CompiledInstance import CompiledInstance
+from MinConflictsRepair import repair_solution
+from Solution import Solution
 
 
 class BatPopulationGeneration:
-    def __init__(self, model, population_size):
+    def __init__(self, model, population_size, workers=1, seed=None, verbose=False, max_attempts=3, repair=False):
         """
         Initialize the BatPopulationGeneration class.
-        
+
         :param model: The problem model (ProblemModel).
         :param population_size: Number of bats (solutions) to generate.
+        :param workers: Number of processes constructing bats.
+        :param seed: Seed of the random constructions.
+        :param verbose: Print a line for every generated bat.
+        :param max_attempts: Constructions tried per bat before giving up on filling the population with distinct bats.
+        :param repair: Repair constructions with hard violations (MinConflictsRepair) before adding them.
         """
         self.model = model
         self.nr_days = model.nr_days
         self.nr_slots_per_day = model.nr_slots_per_day
         self.rooms = model.rooms
         self.population_size = population_size
+        self.workers = workers
+        self.seed = seed
+        self.verbose = verbose
+        self.max_attempts = max_attempts
+        self.repair = repair
+        self.instance = CompiledInstance(model)
+        self.rng = np.random.default_rng(seed)
         self.population = []
+        self.stats = {}
 
     def generate_population(self):
-        """Generate a random initial population of bats (timetable solutions)."""
-        for i in range(self.population_size):
-            print(f"Generating Bat {i + 1}...")
-            random_solution = self.create_random_solution()
-            self.population.append(random_solution)
-            #self.save_to_file(random_solution, f"Bat{i + 1}.out")
-
-    def create_random_solution(self):
         """
-        Create a random solution by assigning each lecture to a random room,
-        and ensuring lectures of the same course have unique day and timeslot.
+        Generate an initial population of distinct bats (timetable solutions) with the randomized
+        constructive heuristic, in parallel when workers > 1.
+
+        :return: The population as a list of solutions (Solution, iterating as tuples).
         """
-        solution = []
+        start = time.perf_counter()
+        seeds = np.random.SeedSequence(self.seed).generate_state(self.population_size * self.max_attempts).tolist()
+        seen = set()
+        violations = []
+        constructed = 0
+        self.population = []
 
-        for course in self.model.courses:
-            # Assign a consistent room for all lectures of this course
-            room = random.choice(self.rooms)
-            
-            # Track used (day, slot) pairs for this course to ensure uniqueness
-            used_slots = set()
+        pool = None
+        if self.workers > 1:
+            pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_construction_worker,
+                                       initargs=(self.instance,))
+        try:
+            while len(self.population) < self.population_size and constructed < len(seeds):
+                batch = seeds[constructed:constructed + self.population_size - len(self.population)]
+                if pool is None:
+                    results = [construct_solution(self.instance, np.random.default_rng(s)) for s in batch]
+                else:
+                    size = -(-len(batch) // self.workers)
+                    chunks = [batch[i:i + size] for i in range(0, len(batch), size)]
+                    results = [r for chunk in pool.map(_construct_chunk, chunks) for r in chunk]
+                constructed += len(batch)
 
-            for lecture in course.lectures:
-                placed = False
-                while not placed:
-                    day = random.randint(0, self.nr_days - 1)
-                    slot = random.randint(0, self.nr_slots_per_day - 1)
+                for periods, rooms, nr_violations in results:
+                    if self.repair and nr_violations:
+                        solution = repair_solution(self.instance.to_solution(periods, rooms), self.model,
+                                                   seed=int(self.rng.integers(2 ** 31)))
+                        periods, rooms = self.instance.from_solution(solution)
+                        nr_violations = sum(self.instance.hard_violations(periods, rooms).values())
+                    solution = Solution(self.instance, periods, rooms)
+                    if solution in seen or len(self.population) == self.population_size:
+                        continue
+                    seen.add(solution)
+                    violations.append(nr_violations)
+                    self.population.append(solution)
+                    if self.verbose:
+                        print(f"Generating Bat {len(self.population)}... ({nr_violations} violations)")
+        finally:
+            if pool is not None:
+                pool.shutdown()
 
-                    if (day, slot) not in used_slots:
-                        used_slots.add((day, slot))
-                        solution.append((course.course_id, room.room_id, day, slot))
-                        placed = True
+        self.stats = {
+            "constructed": constructed,
+            "duplicates": constructed - len(self.population),
+            "population": len(self.population),
+            "feasible": sum(1 for v in violations if v == 0),
+            "mean_violations": float(np.mean(violations)) if violations else 0.0,
+            "seconds": time.perf_counter() - start,
+        }
+        return self.population
 
-        return solution
+    def create_random_solution(self):
+        """
+        Create a random solution with the randomized constructive heuristic.
+        """
+        periods, rooms, violations = construct_solution(self.instance, self.rng)
+        return self.instance.to_solution(periods, rooms)
 
     def save_to_file(self, solution, filename):
         """
         Save a solution to a file in the required format.
-        
+
         :param solution: The random solution for one bat.
         :param filename: Name of the file to save the solution.
         """
@@ -63,3 +113,45 @@ class BatPopulationGeneration:
                 course_id, room_id, day, slot = entry
                 file.write(f"{course_id} {room_id} {day} {slot}\n")
         print(f"Saved solution to {filename}")
+
+
+def construction_keys(instance, rng):
+    """
+    Build random priority keys for decode_random_keys that place hard lectures first.
+    A course is harder the more lectures its conflicting courses have, the more lectures it has
+    itself and the fewer periods it is available in; difficulties are perturbed by a random factor
+    so that every construction uses a different order. The fractional part of each key picks a
+    random starting period.
+    """
+    conflict_load = np.array([instance.course_lectures[n].sum() if n else 0 for n in instance.course_conflicts])
+    available = instance.course_available.sum(axis=1)
+    difficulty = (conflict_load + instance.course_lectures) / np.maximum(available, 1)
+    difficulty = difficulty * rng.uniform(0.5, 1.5, size=instance.nr_courses)
+
+    lecture_difficulty = difficulty[instance.lecture_course] + 1e-6 * rng.random(instance.nr_lectures)
+    rank = np.empty(instance.nr_lectures)
+    rank[np.argsort(-lecture_difficulty, kind="stable")] = np.arange(instance.nr_lectures)
+    return rank + rng.random(instance.nr_lectures)
+
+
+def construct_solution(instance, rng):
+    """
+    Construct one timetable with the randomized conflict-aware heuristic.
+
+    :return: Tuple (periods, rooms, violations) as returned by decode_random_keys.
+    """
+    return decode_random_keys(construction_keys(instance, rng), instance)
+
+
+_worker_instance = None
+
+
+def _init_construction_worker(instance):
+    """Keep the compiled instance resident in a construction process."""
+    global _worker_instance
+    _worker_instance = instance
+
+
+def _construct_chunk(seeds):
+    """Construct one timetable per seed in a construction process."""
+    return [construct_solution(_worker_instance, np.random.default_rng(s)) for s in seeds]
@@ -0,0 +1,209 @@
+import numpy as np
+
+from Solution import Solution
+
+
+class CompiledInstance:
+    def __init__(self, model):
+        """
+        Compile a loaded problem model into flat index arrays for fast solution decoding and scoring.
+        Courses, rooms and curricula are referred to by their position in the model lists,
+        lectures by their position in the course-major lecture list, and periods by day * slots + slot.
+
+        :param model: The problem model (ProblemModel).
+        """
+        courses = model.get_courses()
+        rooms = model.get_rooms()
+        curriculas = model.get_curriculas()
+
+        self.name = model.get_name()
+        self.nr_days = model.get_nr_days()
+        self.nr_slots_per_day = model.get_nr_slots_per_day()
+        self.nr_periods = self.nr_days * self.nr_slots_per_day
+
+        self.course_ids = [course.get_id() for course in courses]
+        self.room_ids = [room.get_id() for room in rooms]
+        self.curricula_ids = [curricula.get_id() for curricula in curriculas]
+        self.nr_courses = len(courses)
+        self.nr_rooms = len(rooms)
+        course_index = {course_id: c for c, course_id in enumerate(self.course_ids)}
+        self.course_index = course_index
+        self.room_index = {room_id: r for r, room_id in enumerate(self.room_ids)}
+
+        self.course_students = np.array([course.get_nr_students() for course in courses], dtype=np.int64)
+        self.course_min_days = np.array([course.get_min_days() for course in courses], dtype=np.int64)
+        self.course_lectures = np.array([course.get_nr_lectures() for course in courses], dtype=np.int64)
+        self.room_capacity = np.array([room.get_size() for room in rooms], dtype=np.int64)
+
+        # Lectures in course order; lecture l belongs to course lecture_course[l]
+        self.lecture_course = np.repeat(np.arange(self.nr_courses), self.course_lectures)
+        self.nr_lectures = len(self.lecture_course)
+
+        # Availability of each course in each period
+        self.course_available = np.ones((self.nr_courses, self.nr_periods), dtype=bool)
+        for c, course in enumerate(courses):
+            for day, slot in course.unavailable_periods:
+                self.course_available[c, day * self.nr_slots_per_day + slot] = False
+
+        # Conflicting courses (same curriculum or same teacher), without the course itself
+        neighbours = [set() for _ in courses]
+        for course1, course2 in model.get_conflict_graph():
+            c1, c2 = course_index[course1.get_id()], course_index[course2.get_id()]
+            if c1 != c2:
+                neighbours[c1].add(c2)
+                neighbours[c2].add(c1)
+        self.course_conflicts = [sorted(n) for n in neighbours]
+
+        # Courses of each curriculum
+        self.curricula_courses = [
+            np.array([course_index[course.get_id()] for course in curricula.get_courses()], dtype=np.int64)
+            for curricula in curriculas
+        ]
+
+        # Lecture-curriculum incidence: lecture incidence_lecture[k] belongs to curriculum incidence_curricula[k]
+        course_curricula = [[] for _ in courses]
+        for q, members in enumerate(self.curricula_courses):
+            for c in members.tolist():
+                course_curricula[c].append(q)
+        pairs = [(l, q) for l, c in enumerate(self.lecture_course.tolist()) for q in course_curricula[c]]
+        self.course_curricula = course_curricula
+        self.incidence_lecture = np.array([l for l, _ in pairs], dtype=np.int64)
+        self.incidence_curricula = np.array([q for _, q in pairs], dtype=np.int64)
+
+        # Bitmask views: bit p of available_mask[c] is set if course c may be taught in period p.
+        # Rooms are numbered by increasing capacity in room masks, so the lowest fitting bit is the
+        # smallest room that fits; rooms_by_capacity maps a bit back to the room index.
+        self.all_periods_mask = (1 << self.nr_periods) - 1
+        self.available_mask = [
+            sum(1 << p for p in np.flatnonzero(self.course_available[c]).tolist()) for c in range(self.nr_courses)
+        ]
+        self.rooms_by_capacity = np.argsort(self.room_capacity, kind="stable")
+        self.all_rooms_mask = (1 << self.nr_rooms) - 1
+        sorted_capacity = self.room_capacity[self.rooms_by_capacity]
+        self.fitting_rooms_mask = [
+            sum(1 << b for b in np.flatnonzero(sorted_capacity >= students).tolist())
+            for students in self.course_students.tolist()
+        ]
+
+    def period(self, day, slot):
+        """Return the period index of the given day and slot."""
+        return day * self.nr_slots_per_day + slot
+
+    def to_solution(self, periods, rooms):
+        """
+        Convert per-lecture period and room indices to the tuple representation.
+
+        :param periods: Period index of each lecture.
+        :param rooms: Room index of each lecture.
+        :return: List of tuples (course_id, room_id, day, slot).
+        """
+        solution = []
+        for c, p, r in zip(self.lecture_course.tolist(), np.asarray(periods).tolist(), np.asarray(rooms).tolist()):
+            day, slot = divmod(p, self.nr_slots_per_day)
+            solution.append((self.course_ids[c], self.room_ids[r], day, slot))
+        return solution
+
+    def from_solution(self, solution):
+        """
+        Convert a solution in the tuple representation to per-lecture period and room indices.
+        The lectures of a course are numbered in the order in which they appear in the solution;
+        lectures missing from the solution get period and room -1.
+
+        :param solution: List of tuples (course_id, room_id, day, slot), or a Solution.
+        :return: Tuple (periods, rooms) of arrays.
+        """
+        if isinstance(solution, Solution) and solution.data.shape[1] == self.nr_lectures:
+            return solution.periods.astype(np.int64), solution.rooms.astype(np.int64)
+        periods = np.full(self.nr_lectures, -1, dtype=np.int64)
+        rooms = np.full(self.nr_lectures, -1, dtype=np.int64)
+        first = np.concatenate(([0], np.cumsum(self.course_lectures)[:-1])).tolist()
+        placed = [0] * self.nr_courses
+        for course_id, room_id, day, slot in solution:
+            c = self.course_index[course_id]
+            if placed[c] < self.course_lectures[c]:
+                lecture = first[c] + placed[c]
+                periods[lecture] = int(day) * self.nr_slots_per_day + int(slot)
+                rooms[lecture] = self.room_index[room_id]
+            placed[c] += 1
+        return periods, rooms
+
+    def hard_violations(self, periods, rooms):
+        """
+        Count the ITC-2007 hard constraint violations of a timetable.
+
+        :param periods: Period index of each lecture (-1 if unscheduled).
+        :param rooms: Room index of each lecture (-1 if unscheduled).
+        :return: Dictionary with the number of violations of each hard constraint.
+        """
+        periods = np.asarray(periods)
+        rooms = np.asarray(rooms)
+        scheduled = periods >= 0
+        course = self.lecture_course[scheduled]
+        period = periods[scheduled]
+
+        # Courses taught in each period, counting repeated lectures of a course in a period as conflicts
+        taught = np.zeros((self.nr_courses, self.nr_periods), dtype=np.int64)
+        np.add.at(taught, (course, period), 1)
+        conflicts = int(np.maximum(taught - 1, 0).sum())
+        for c, neighbours in enumerate(self.course_conflicts):
+            later = [n for n in neighbours if n > c]
+            if later:
+                conflicts += int(np.minimum(taught[c], taught[later]).sum())
+
+        occupation = np.bincount(period * self.nr_rooms + rooms[scheduled], minlength=self.nr_periods * self.nr_rooms)
+        return {
+            "lectures": int(np.count_nonzero(~scheduled)),
+            "conflicts": conflicts,
+            "availability": int(np.count_nonzero(~self.course_available[course, period])),
+            "room_occupation": int(np.maximum(occupation - 1, 0).sum()),
+        }
+
+    def soft_penalties(self, periods, rooms):
+        """
+        Compute the ITC-2007 soft penalties of a batch of timetables at once.
+
+        :param periods: Array (n, nr_lectures) with the period index of each lecture.
+        :param rooms: Array (n, nr_lectures) with the room index of each lecture.
+        :return: Array (n, 4) with the room capacity, minimum working days, curriculum
+                 compactness and room stability penalty of each timetable.
+        """
+        periods = np.atleast_2d(periods)
+        rooms = np.atleast_2d(rooms)
+        n = len(periods)
+        bats = np.arange(n)[:, np.newaxis]
+        course = self.lecture_course[np.newaxis, :]
+        penalties = np.empty((n, 4), dtype=np.int64)
+
+        # Room capacity: each student above the capacity counts as 1 point
+        overflow = self.course_students[course] - self.room_capacity[rooms]
+        penalties[:, 0] = np.maximum(overflow, 0).sum(axis=1)
+
+        # Minimum working days: day histogram per course, 5 points per missing day
+        index = ((bats * self.nr_courses + course) * self.nr_days + periods // self.nr_slots_per_day).ravel()
+        days = np.bincount(index, minlength=n * self.nr_courses * self.nr_days)
+        days = np.count_nonzero(days.reshape(n, self.nr_courses, self.nr_days), axis=2)
+        penalties[:, 1] = 5 * np.maximum(self.course_min_days - days, 0).sum(axis=1)
+
+        # Curriculum compactness: per-curriculum slot masks, 2 points per isolated lecture
+        nr_curricula = len(self.curricula_courses)
+        index = ((bats * nr_curricula + self.incidence_curricula) * self.nr_periods
+                 + periods[:, self.incidence_lecture]).ravel()
+        slots = np.bincount(index, minlength=n * nr_curricula * self.nr_periods)
+        slots = slots.reshape(n, nr_curricula, self.nr_days, self.nr_slots_per_day)
+        occupied = slots > 0
+        neighbour = np.zeros_like(occupied)
+        neighbour[..., 1:] |= occupied[..., :-1]
+        neighbour[..., :-1] |= occupied[..., 1:]
+        penalties[:, 2] = 2 * np.where(neighbour, 0, slots).sum(axis=(1, 2, 3))
+
+        # Room stability: distinct rooms per course, 1 point per room after the first
+        index = ((bats * self.nr_courses + course) * self.nr_rooms + rooms).ravel()
+        used = np.bincount(index, minlength=n * self.nr_courses * self.nr_rooms)
+        used = np.count_nonzero(used.reshape(n, self.nr_courses, self.nr_rooms), axis=2)
+        penalties[:, 3] = np.maximum(used - 1, 0).sum(axis=1)
+
+        return penalties
+
+    def soft_cost(self, periods, rooms):
+        """Return the total ITC-2007 soft cost of each timetable of a batch."""
+        return self.soft_penalties(periods, rooms).sum(axis=1)
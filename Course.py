@@ -12,6 +12,7 @@ class Course:
         :param nr_students: Number of students taking the course.
         """
         self.model = model
+        self.index = len(model.courses)  # Position of the course in the model
         self.course_id = course_id
         self.teacher = teacher
         self.nr_lectures = nr_lectures
@@ -83,7 +84,8 @@ class Course:
         :param slot: The slot index.
         """
         self.unavailable_periods.append((day, slot))
-        
+        self.available[day][slot] = False
+
 
     def set_available(self, day, slot, av):
         """
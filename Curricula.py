@@ -9,7 +9,7 @@ class Curricula:
         self.model = model
         self.curricula_id = curricula_id
         self.courses = []
-        self.constraint = self.CurriculaConstraint(model)
+        self.constraint = self.CurriculaConstraint(model, self)
         model.add_constraint(self.constraint)
 
     def get_model(self):
@@ -104,10 +104,17 @@ class Curricula:
         return 0
 
     class CurriculaConstraint:
-        def __init__(self, model):
+        def __init__(self, model, curricula):
             """Constructor for the curricula constraint."""
             self.model = model  # Set the model in RoomConstraint
+            self.curricula = curricula
             self.placement = [[None for _ in range(self.model.nr_slots_per_day)] for _ in range(self.model.nr_days)]
+            self.constraint_listeners = None
+            self.variables = []  # Lectures of the courses of this curricula
+
+        def add_variable(self, lecture):
+            """Add a lecture (variable) to the curricula constraint."""
+            self.variables.append(lecture)
 
         def get_placement(self, day, slot):
             """Return the placement of a lecture for the given day and slot."""
@@ -144,8 +151,8 @@ class Curricula:
 
         def __str__(self):
             """String representation of the curricula constraint."""
-            return str(self)
+            return str(self.curricula)
 
         def __hash__(self):
             """Return the hash code of the curricula constraint."""
-            return hash(self)
+            return hash(self.curricula)
@@ -0,0 +1,197 @@
+import glob
+import os
+import random
+import time
+
+from CompiledInstance import CompiledInstance
+
+
+class DsaturSolver:
+    def __init__(self, model, seed=None, max_repairs=None, time_limit=10.0):
+        """
+        Construction solver that colours the lecture conflict graph with periods.
+        Lectures are vertices; lectures of conflicting courses (ProblemModel.get_conflict_graph) and
+        lectures of the same course are adjacent. A period can take at most one lecture per room.
+
+        :param model: The problem model (ProblemModel).
+        :param seed: Seed used to break ties.
+        :param max_repairs: Maximal number of ejections when a lecture has no free period
+                            (defaults to ten per lecture).
+        :param time_limit: Wall-clock budget in seconds.
+        """
+        self.model = model
+        self.rng = random.Random(seed)
+        self.time_limit = time_limit
+        self.instance = CompiledInstance(model)
+        self.max_repairs = max_repairs if max_repairs is not None else 10 * self.instance.nr_lectures
+        self.stats = {}
+
+    def solve(self):
+        """
+        Colour the lectures in saturation-degree order and assign rooms per period.
+
+        :return: List of tuples (course_id, room_id, day, slot), or None if no feasible colouring was found.
+        """
+        start = time.perf_counter()
+        periods = self.colour()
+        if periods is None:
+            self.stats["seconds"] = time.perf_counter() - start
+            return None
+        rooms = self.assign_rooms(periods)
+        self.stats["seconds"] = time.perf_counter() - start
+        return self.instance.to_solution(periods, rooms)
+
+    def colour(self):
+        """
+        Assign a period to every lecture. The next course to colour is the one with the fewest
+        periods left (highest saturation), ties broken by the number of conflicting lectures
+        still to be placed; it gets the feasible period that the fewest of those lectures can
+        still use. A lecture without a feasible period ejects the conflicting lectures from the
+        least occupied period (bounded repair).
+
+        :return: Period index of each lecture, or None when the repair budget or time runs out.
+        """
+        instance = self.instance
+        courses = self.model.get_courses()
+        nr_courses, nr_periods, nr_rooms = instance.nr_courses, instance.nr_periods, instance.nr_rooms
+        neighbours = instance.course_conflicts
+        available = [
+            sum(1 << (d * instance.nr_slots_per_day + s)
+                for d in range(instance.nr_days) for s in range(instance.nr_slots_per_day)
+                if course.is_available(d, s))
+            for course in courses
+        ]
+
+        # Occupancy indexes: periods of each course, number of (own or conflicting) lectures
+        # blocking each course in each period, and lectures taught in each period
+        course_periods = [[] for _ in range(nr_courses)]
+        block_count = [[0] * nr_periods for _ in range(nr_courses)]
+        blocked = [0] * nr_courses
+        period_load = [0] * nr_periods
+        full = 0
+        remaining = instance.course_lectures.tolist()
+        tabu = {}
+        repairs = 0
+        deadline = time.perf_counter() + self.time_limit
+
+        def block(c, p, delta):
+            for n in neighbours[c] + [c]:
+                block_count[n][p] += delta
+                if block_count[n][p]:
+                    blocked[n] |= 1 << p
+                else:
+                    blocked[n] &= ~(1 << p)
+
+        def place(c, p):
+            nonlocal full
+            course_periods[c].append(p)
+            remaining[c] -= 1
+            period_load[p] += 1
+            if period_load[p] == nr_rooms:
+                full |= 1 << p
+            block(c, p, 1)
+
+        def eject(c, p):
+            nonlocal full
+            course_periods[c].remove(p)
+            remaining[c] += 1
+            period_load[p] -= 1
+            full &= ~(1 << p)
+            block(c, p, -1)
+
+        def pending_load(c):
+            return sum(remaining[n] for n in neighbours[c])
+
+        while any(remaining):
+            if time.perf_counter() > deadline:
+                return None
+            candidates = [c for c in range(nr_courses) if remaining[c]]
+            free = {c: available[c] & ~blocked[c] & ~full for c in candidates}
+            c = min(candidates, key=lambda c: (bin(free[c]).count("1"), -pending_load(c), self.rng.random()))
+
+            if free[c]:
+                options = [p for p in range(nr_periods) if (free[c] >> p) & 1]
+                p = min(options, key=lambda p: (
+                    sum(1 for n in neighbours[c] if remaining[n] and ((available[n] & ~blocked[n]) >> p) & 1),
+                    self.rng.random()))
+                place(c, p)
+                continue
+
+            # Bounded repair: eject the conflicting lectures from the cheapest non-tabu period
+            repairs += 1
+            if repairs > self.max_repairs:
+                return None
+            own = sum(1 << p for p in course_periods[c])
+            options = [p for p in range(nr_periods) if (available[c] >> p) & 1 and not (own >> p) & 1]
+            if not options:
+                return None
+
+            def ejection_cost(p):
+                conflicting = sum(course_periods[n].count(p) for n in neighbours[c])
+                room = 1 if period_load[p] - conflicting >= nr_rooms else 0
+                return conflicting + room + (nr_periods if tabu.get((c, p), -1) >= repairs else 0), self.rng.random()
+
+            p = min(options, key=ejection_cost)
+            for n in neighbours[c]:
+                while p in course_periods[n]:
+                    eject(n, p)
+                    tabu[(n, p)] = repairs + 7
+            if period_load[p] >= nr_rooms:
+                victims = [n for n in range(nr_courses) if n != c and p in course_periods[n]]
+                n = self.rng.choice(victims)
+                eject(n, p)
+                tabu[(n, p)] = repairs + 7
+            place(c, p)
+
+        self.stats["repairs"] = repairs
+        lecture_periods = []
+        for c in range(nr_courses):
+            lecture_periods.extend(sorted(course_periods[c]))
+        return lecture_periods
+
+    def assign_rooms(self, periods):
+        """
+        Assign rooms independently in each period: the lectures with the most students get the
+        largest rooms, which minimises the total capacity overflow of the period.
+
+        :param periods: Period index of each lecture.
+        :return: Room index of each lecture.
+        """
+        instance = self.instance
+        students = instance.course_students[instance.lecture_course].tolist()
+        largest_first = instance.rooms_by_capacity.tolist()[::-1]
+        by_period = {}
+        for lecture, p in enumerate(periods):
+            by_period.setdefault(p, []).append(lecture)
+
+        rooms = [0] * len(periods)
+        for lectures in by_period.values():
+            lectures.sort(key=lambda lecture: -students[lecture])
+            for lecture, room in zip(lectures, largest_first):
+                rooms[lecture] = room
+        return rooms
+
+
+def main():
+    from data_processing import DataProcessor
+    from ProblemModel import ProblemModel
+
+    print(f"{'instance':<10} {'lectures':>8} {'feasible':>8} {'ms':>8} {'repairs':>8} {'cost':>8}")
+    for file_path in sorted(glob.glob("./ConvertedFiles/comp*_converted.xlsx")):
+        model = ProblemModel()
+        DataProcessor(file_path).initialize_model(model=model)
+        solver = DsaturSolver(model, seed=0)
+        solution = solver.solve()
+        name = os.path.basename(file_path).split("_")[0]
+        if solution is None:
+            print(f"{name:<10} {solver.instance.nr_lectures:>8} {'no':>8} {solver.stats['seconds'] * 1000:>8.1f}")
+            continue
+        periods, rooms = solver.instance.from_solution(solution)
+        feasible = not any(solver.instance.hard_violations(periods, rooms).values())
+        cost = int(solver.instance.soft_cost(periods, rooms)[0])
+        print(f"{name:<10} {solver.instance.nr_lectures:>8} {'yes' if feasible else 'no':>8} "
+              f"{solver.stats['seconds'] * 1000:>8.1f} {solver.stats['repairs']:>8} {cost:>8}")
+
+
+if __name__ == "__main__":
+    main()
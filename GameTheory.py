@@ -1,4 +1,25 @@
-def game_theory_timetabling(problem_model):
+import time
+
+from checkpoint import Checkpointer
+from instrumentation import count, event, timer
+from MinConflictsRepair import repair_solution
+
+
+def game_theory_timetabling(problem_model, checkpoint=None, checkpoint_interval=60.0, resume=False, time_limit=None,
+                            seed=None):
+    """
+    Schedule the lectures by repeatedly letting every lecture choose its best period-room pair and
+    resolving the remaining conflicts, for at most 50 iterations.
+
+    :param problem_model: The problem model (ProblemModel).
+    :param checkpoint: Optional path of a checkpoint file the strategies are saved to after an iteration.
+    :param checkpoint_interval: Seconds between two checkpoints.
+    :param resume: Continue from the checkpoint file if it exists.
+    :param time_limit: Optional wall-clock budget in seconds (covering a resumed run as a whole); when it
+                       runs out, the iterations stop and the lectures left unscheduled are repaired.
+    :param seed: Seed of the min-conflicts repair.
+    :return: List of tuples (course_id, room_id, day, slot).
+    """
     import random
     from collections import defaultdict
 
@@ -81,7 +102,7 @@ def game_theory_timetabling(problem_model):
         if best_assignment:
             strategies[course_id][lecture_index] = best_assignment
         else:
-            print(f"Warning: Could not assign lecture {lecture_index + 1} of course {course_id}")
+            count("gametheory.unassignable")
             conflict_penalty[course_id] += 1  # Increase conflict penalty for reassignment prioritization
 
     def resolve_conflicts():
@@ -100,7 +121,7 @@ def game_theory_timetabling(problem_model):
                 if period in assigned_periods:
                     # Conflict detected
                     conflicting_course = assigned_periods[period]
-                    print(f"Conflict detected between {course_id} and {conflicting_course} at period {period}")
+                    count("gametheory.conflicts")
                     unassigned_lectures.append((course_id, lecture_index))
                     unassigned_lectures.append((conflicting_course, next(
                         (idx for idx, l in enumerate(strategies[conflicting_course]) if l and l[0] == period),
@@ -109,36 +130,76 @@ def game_theory_timetabling(problem_model):
                 else:
                     assigned_periods[period] = course_id
 
-        # Reassign unassigned lectures
-        for course_id, lecture_index in set(unassigned_lectures):
+        # Reassign unassigned lectures (once each, in the order they were found)
+        for course_id, lecture_index in dict.fromkeys(unassigned_lectures):
             assign_lecture(course_id, lecture_index)
 
-    # Main iteration loop
+    # Resume from the strategies of the last checkpoint
     max_iterations = 50
-    for iteration in range(max_iterations):
-        print(f"Iteration {iteration + 1}/{max_iterations}: Refining timetable...")
-        for course in courses:
-            for lecture_index in range(len(course.lectures)):
-                assign_lecture(course.get_id(), lecture_index)
+    checkpointer = Checkpointer(checkpoint, checkpoint_interval, engine="gametheory")
+    saved = checkpointer.load() if resume else None
+    first_iteration, elapsed = 0, 0.0
+    if saved is not None:
+        rooms_by_id = {room.get_id(): room for room in rooms}
+        for course_id, lectures in saved["strategies"].items():
+            strategies[course_id] = [None if lecture is None else (lecture[0], rooms_by_id[lecture[1]])
+                                     for lecture in lectures]
+        conflict_penalty.update(saved["conflict_penalty"])
+        first_iteration, elapsed = saved["iteration"], saved["elapsed"]
+        if saved["done"]:
+            first_iteration = max_iterations
+    start = time.perf_counter() - elapsed
+    deadline = None if time_limit is None else start + time_limit
+
+    def checkpoint_state(iteration, done=False):
+        return {"strategies": {course_id: [None if lecture is None else (lecture[0], lecture[1].get_id())
+                                           for lecture in lectures] for course_id, lectures in strategies.items()},
+                "conflict_penalty": dict(conflict_penalty), "iteration": iteration, "done": done,
+                "elapsed": time.perf_counter() - start}
 
-        resolve_conflicts()
+    # Main iteration loop
+    remaining_conflicts = None
+    stopped = False
+    for iteration in range(first_iteration, max_iterations):
+        with timer("gametheory.iteration", iteration=iteration + 1):
+            for course in courses:
+                for lecture_index in range(len(course.lectures)):
+                    if deadline is not None and time.perf_counter() >= deadline:
+                        stopped = True
+                        break
+                    assign_lecture(course.get_id(), lecture_index)
+                if stopped:
+                    break
+            else:
+                resolve_conflicts()
+        if stopped:
+            # Out of time: a resumed run repeats this iteration
+            event("gametheory.deadline", iteration=iteration + 1)
+            checkpointer.save(checkpoint_state(iteration))
+            break
 
         # Check for conflicts
         remaining_conflicts = sum(1 for c_id, lectures in strategies.items() for lec in lectures if lec is None)
+        event("gametheory.unassigned", iteration=iteration + 1, lectures=remaining_conflicts)
         if remaining_conflicts == 0:
-            print("All lectures successfully scheduled!")
             break
-    else:
-        print("Maximum iterations reached. Some conflicts may remain.")
+        if checkpointer.due():
+            checkpointer.save(checkpoint_state(iteration + 1))
+    if remaining_conflicts is not None and not stopped:
+        checkpointer.save(checkpoint_state(iteration + 1, done=True))
 
-    # Build the solution
+    # Build the solution, placing the lectures left unscheduled with the min-conflicts repair
     solution = []
     for course_id, lectures in strategies.items():
         for lecture in lectures:
-            if lecture is None:
-                raise ValueError(f"Lecture of course {course_id} is unscheduled.")
-            period, room = lecture
-            day, slot = period
-            solution.append((course_id, room.get_id(), day, slot))
-
+            if lecture is not None:
+                period, room = lecture
+                day, slot = period
+                solution.append((course_id, room.get_id(), day, slot))
+    repair_time = 5.0 if deadline is None else max(0.1, min(5.0, deadline - time.perf_counter()))
+    solution = repair_solution(solution, problem_model, time_limit=repair_time, seed=seed)
+
+    missing = sum(course.get_nr_lectures() for course in courses) - len(solution)
+    if missing:
+        raise ValueError(f"{missing} lectures are unscheduled after the repair.")
     return solution
@@ -0,0 +1,57 @@
+class LazySwap:
+    def __init__(self, first, second):
+        """
+        Swap of the placements of two lectures of different courses. The swap is not applied to the
+        model when it is created; its value is computed on first use, without changing the model.
+
+        :param first: New placement of the first lecture (the time and room of the second lecture).
+        :param second: New placement of the second lecture (the time and room of the first lecture).
+        """
+        self.first = first
+        self.second = second
+        self.first_old = first.variable().get_assignment()
+        self.second_old = second.variable().get_assignment()
+        self.delta = None
+
+    def variables(self):
+        """Return the two swapped lectures."""
+        return self.first.variable(), self.second.variable()
+
+    def assignments(self):
+        """Return the new placements of the two lectures."""
+        return self.first, self.second
+
+    def value(self):
+        """
+        Return the change of the total penalty if the swap is applied.
+        Room capacity, room stability and minimum working days only depend on the lectures of the same
+        course, so the two halves of the swap are evaluated independently. A curriculum shared by both
+        courses keeps the same occupied periods, so its compactness does not change.
+        """
+        if self.delta is None:
+            shared = set(self.first.variable().get_course().get_curriculas()) & \
+                     set(self.second.variable().get_course().get_curriculas())
+            self.delta = (_penalty(self.first, shared) - _penalty(self.first_old, shared) +
+                          _penalty(self.second, shared) - _penalty(self.second_old, shared))
+        return self.delta
+
+    def assign(self, iteration):
+        """Apply the swap to the model."""
+        lecture1, lecture2 = self.variables()
+        lecture1.unassign(iteration)
+        lecture2.unassign(iteration)
+        lecture1.assign(iteration, self.first)
+        lecture2.assign(iteration, self.second)
+
+    def __str__(self):
+        """String representation of the swap."""
+        return f"{self.first_old} <-> {self.second_old} ({self.value():+d})"
+
+
+def _penalty(placement, ignore_curriculas):
+    """Return the penalty of a placement without the compactness of the given curricula."""
+    penalty = placement.get_room_cap_penalty() + placement.get_room_penalty() + placement.get_min_days_penalty()
+    for curricula in placement.variable().get_course().get_curriculas():
+        if curricula not in ignore_curriculas:
+            penalty += curricula.get_compact_penalty_for_placement(placement)
+    return penalty
@@ -1,3 +1,4 @@
+from LazySwap import LazySwap
 from Placement import Placement
 
 class Lecture:
@@ -19,13 +20,18 @@ class Lecture:
         for curricula in self.course.get_curriculas():
             curricula.get_constraint().add_variable(self)
         
+        self.value = None  # Current placement
         self.values = self.compute_values()
-        #self.model.add_variable(self)
+        self.model.add_variable(self)
 
     def get_course(self):
         """Return the course to which this lecture belongs."""
         return self.course
 
+    def get_assignment(self):
+        """Return the current placement of this lecture, or None if it is unassigned."""
+        return self.value
+
     def compute_values(self):
         """
         Compute the domain for the lecture: Cartesian product of all available days and times,
@@ -75,15 +81,15 @@ class Lecture:
             return cmp
 
         return 0
-    """
     def find_swap(self, another):
-        
+        """
         Find a swap with another lecture, ensuring that the swap is valid according to various constraints.
-        
+        Feasibility is checked in constant time against the teacher and curricula occupancy.
+
         :param another: The other lecture to swap with.
-        :return: A swap object if valid, otherwise None.
-    
-        if not isinstance(another, Lecture):
+        :return: A swap object (LazySwap) if valid, otherwise None.
+        """
+        if not isinstance(another, Lecture) or another is self:
             return None
         if self.get_course() == another.get_course():
             return None
@@ -96,27 +102,44 @@ class Lecture:
             return None
         if not another.get_course().is_available(p1.get_day(), p1.get_slot()):
             return None
+
+        # Check teacher and curricula conflicts for the swap
+        pair = (self, another)
         if self.get_course().get_teacher() != another.get_course().get_teacher():
-            if self.get_course().get_teacher().get_constraint().get_placement(p2.get_day(), p2.get_slot()) is not None:
+            conflict = self.get_course().get_teacher().get_constraint().get_placement(p2.get_day(), p2.get_slot())
+            if conflict and conflict.variable() not in pair:
                 return None
-            if another.get_course().get_teacher().get_constraint().get_placement(p1.get_day(), p1.get_slot()) is not None:
+            conflict = another.get_course().get_teacher().get_constraint().get_placement(p1.get_day(), p1.get_slot())
+            if conflict and conflict.variable() not in pair:
                 return None
-
-        # Check curricula conflicts for the swap
         for curricula in self.course.get_curriculas():
             conflict = curricula.get_constraint().get_placement(p2.get_day(), p2.get_slot())
-            if conflict and conflict.variable() != another:
+            if conflict and conflict.variable() not in pair:
                 return None
         for curricula in another.get_course().get_curriculas():
             conflict = curricula.get_constraint().get_placement(p1.get_day(), p1.get_slot())
-            if conflict and conflict.variable() != self:
+            if conflict and conflict.variable() not in pair:
                 return None
 
         # Create placements for swapped lectures
         np1 = Placement(self, p2.get_room(), p2.get_day(), p2.get_slot())
         np2 = Placement(another, p1.get_room(), p1.get_day(), p1.get_slot())
         return LazySwap(np1, np2)
-    """
+
+    def find_improving_swaps(self, candidates=None):
+        """
+        Find all valid swaps of this lecture that decrease the total penalty.
+
+        :param candidates: Lectures to consider swapping with (defaults to all lectures of the model).
+        :return: List of swaps (LazySwap), the most improving first.
+        """
+        swaps = []
+        for another in candidates if candidates is not None else self.model.get_variables():
+            swap = self.find_swap(another)
+            if swap is not None and swap.value() < 0:
+                swaps.append(swap)
+        swaps.sort(key=lambda swap: swap.value())
+        return swaps
 
     def assign(self, iteration, value):
         """
@@ -125,11 +148,12 @@ class Lecture:
         :param iteration: The iteration of the assignment.
         :param value: The value (placement) to assign.
         """
+        if value is None:
+            self.unassign(iteration)
+            return
         self.model.before_assigned(iteration, value)
         if self.value is not None:
             self.unassign(iteration)
-        if value is None:
-            return
         self.value = value
         value.get_room().get_constraint().assigned(iteration, value)
         for curricula in self.course.get_curriculas():
@@ -0,0 +1,332 @@
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from Bat import timetable_key
+from BatPopulationGeneration import BatPopulationGeneration
+from checkpoint import Checkpointer
+from CompiledInstance import CompiledInstance
+from instrumentation import count, event
+from MinConflictsRepair import MinConflictsRepair
+from SimulatedAnnealing import random_move
+from TimetableState import TimetableState
+
+
+class MemeticAlgorithm:
+    def __init__(self, model, population_size=20, offspring=None, time_limit=60.0, crossover="day",
+                 mutation_moves=5, local_search_moves=None, repair_steps=None, repair_time_limit=10.0,
+                 tournament_size=2, workers=1, seed=None, verbose=True, max_generations=None, checkpoint=None,
+                 checkpoint_interval=60.0, resume=False, stop_event=None, on_generation=None):
+        """
+        Memetic algorithm over complete timetables: parents chosen by tournament are recombined,
+        repaired, mutated and improved by a short local search; the best distinct timetables survive.
+        The default time limit equals the 60 seconds given to TimetableIP.
+
+        :param model: The problem model (ProblemModel).
+        :param population_size: Number of timetables kept in the population.
+        :param offspring: Number of children bred in each generation (defaults to the population size).
+        :param time_limit: Wall-clock budget in seconds.
+        :param crossover: "day" (a child takes the lectures of a random half of the days from the first
+                          parent and the rest from the second) or "curriculum" (the courses of random
+                          curricula take their lectures from the first parent, the others from the second).
+        :param mutation_moves: Number of random moves applied to each child.
+        :param local_search_moves: Number of moves tried by the hill climber on each child (defaults to
+                                   five per lecture).
+        :param repair_steps: Number of steps of the repair of one child (defaults to two per lecture); bounding
+                             the repair by steps keeps a run reproducible for a seed and number of workers.
+        :param repair_time_limit: Wall-clock safety limit of the repair of one child in seconds.
+        :param tournament_size: Number of timetables competing to become a parent.
+        :param workers: Number of processes breeding children.
+        :param seed: Seed of the initial population, the selection and the children.
+        :param verbose: Print a line per generation.
+        :param max_generations: Optional bound on the number of generations; with a seed it makes a run reproducible.
+        :param checkpoint: Optional path of a checkpoint file the population is saved to.
+        :param checkpoint_interval: Seconds between two checkpoints.
+        :param resume: Continue from the checkpoint file if it exists (the time limit and generation bound
+                       cover the resumed run as a whole).
+        :param stop_event: Optional event; the evolution stops as soon as it is set.
+        :param on_generation: Optional callable(memetic) called after the initial population and after every
+                              generation, e.g. to exchange timetables with other solvers (see inject).
+        """
+        if crossover not in ("day", "curriculum"):
+            raise ValueError(f"Unknown crossover: {crossover}")
+        self.model = model
+        self.population_size = population_size
+        self.offspring = offspring or population_size
+        self.time_limit = time_limit
+        self.crossover = crossover
+        self.mutation_moves = mutation_moves
+        self.repair_time_limit = repair_time_limit
+        self.tournament_size = tournament_size
+        self.workers = workers
+        self.seed = seed
+        self.verbose = verbose
+        self.max_generations = max_generations
+        self.checkpointer = Checkpointer(checkpoint, checkpoint_interval, engine="memetic")
+        self.resume = resume
+        self.stop_event = stop_event
+        self.on_generation = on_generation
+        self.instance = CompiledInstance(model)
+        self.local_search_moves = local_search_moves if local_search_moves is not None \
+            else 5 * self.instance.nr_lectures
+        self.repair_steps = repair_steps if repair_steps is not None else 2 * self.instance.nr_lectures
+        self.rng = np.random.default_rng(seed)
+
+        self.periods = None  # Array (population_size, nr_lectures)
+        self.rooms = None
+        self.costs = None
+        self.generation = 0
+        self.stats = {}
+        self.history = []  # One record per generation: elapsed time, best and mean cost, children bred
+
+    def settings(self):
+        """Return the breeding settings shipped to the breeding processes."""
+        return {"crossover": self.crossover, "mutation_moves": self.mutation_moves,
+                "local_search_moves": self.local_search_moves, "repair_steps": self.repair_steps,
+                "repair_time_limit": self.repair_time_limit}
+
+    def initial_population(self):
+        """Construct (and repair) the initial population with BatPopulationGeneration."""
+        generator = BatPopulationGeneration(self.model, self.population_size, workers=self.workers,
+                                            seed=self.seed, repair=True)
+        timetables = [self.instance.from_solution(solution) for solution in generator.generate_population()]
+        timetables = [(p, r) for p, r in timetables if not any(self.instance.hard_violations(p, r).values())]
+        if not timetables:
+            raise ValueError("Could not construct a feasible initial population.")
+        self.periods = np.array([p for p, _ in timetables])
+        self.rooms = np.array([r for _, r in timetables])
+        self.costs = self.instance.soft_cost(self.periods, self.rooms)
+
+    def select(self):
+        """Return the index of a parent chosen by tournament."""
+        candidates = self.rng.integers(len(self.costs), size=self.tournament_size)
+        return candidates[np.argmin(self.costs[candidates])]
+
+    def breed(self, pool):
+        """
+        Breed one generation of children, in parallel when a pool is given.
+
+        :return: Tuple (periods, rooms) of arrays with one row per child that could be repaired.
+        """
+        tasks = []
+        for seed in self.rng.integers(2 ** 63, size=self.offspring).tolist():
+            a, b = self.select(), self.select()
+            tasks.append((self.periods[a], self.rooms[a], self.periods[b], self.rooms[b], seed))
+        if pool is None:
+            children = [breed_child(self.instance, self.settings(), *task) for task in tasks]
+        else:
+            size = -(-len(tasks) // self.workers)
+            chunks = [tasks[i:i + size] for i in range(0, len(tasks), size)]
+            children = [child for chunk in pool.map(_breed_chunk, chunks) for child in chunk]
+        children = [child for child in children if child is not None]
+        if not children:
+            return None, None
+        return np.array([p for p, _ in children]), np.array([r for _, r in children])
+
+    def survive(self, periods, rooms):
+        """Keep the best distinct timetables of the population and the children."""
+        periods = np.concatenate((self.periods, periods))
+        rooms = np.concatenate((self.rooms, rooms))
+        costs = np.concatenate((self.costs, self.instance.soft_cost(periods[len(self.costs):],
+                                                                    rooms[len(self.costs):])))
+        keep, seen = [], set()
+        for i in np.argsort(costs, kind="stable").tolist():
+            key = timetable_key(periods[i], rooms[i], self.instance.nr_rooms)
+            if key not in seen:
+                seen.add(key)
+                keep.append(i)
+            if len(keep) == self.population_size:
+                break
+        self.periods, self.rooms, self.costs = periods[keep], rooms[keep], costs[keep]
+
+    def inject(self, periods, rooms):
+        """Add a feasible timetable to the population; it stays if it is among the best distinct timetables."""
+        self.survive(np.asarray(periods, dtype=np.int64)[np.newaxis], np.asarray(rooms, dtype=np.int64)[np.newaxis])
+
+    def solve(self):
+        """
+        Evolve the population until the time limit.
+
+        :return: The best timetable found as a list of tuples (course_id, room_id, day, slot).
+        """
+        saved = self.checkpointer.load() if self.resume else None
+        if saved is None:
+            start = time.perf_counter()
+            self.initial_population()
+            self.log(time.perf_counter() - start, 0)
+            self.checkpointer.save(self.checkpoint_state(time.perf_counter() - start))
+        else:
+            self.generation = saved["generation"]
+            self.periods, self.rooms = saved["periods"].astype(np.int64), saved["rooms"].astype(np.int64)
+            self.costs = saved["costs"]
+            self.rng.bit_generator.state = saved["rng"]
+            start = time.perf_counter() - saved["elapsed"]
+        deadline = start + self.time_limit
+        if self.on_generation is not None:
+            self.on_generation(self)
+
+        pool = None
+        if self.workers > 1:
+            pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_breeding_worker,
+                                       initargs=(self.instance, self.settings()))
+        try:
+            while time.perf_counter() < deadline and not (self.stop_event is not None and self.stop_event.is_set()) \
+                    and (self.max_generations is None or self.generation < self.max_generations):
+                self.generation += 1
+                periods, rooms = self.breed(pool)
+                if periods is not None:
+                    self.survive(periods, rooms)
+                self.log(time.perf_counter() - start, 0 if periods is None else len(periods))
+                if self.on_generation is not None:
+                    self.on_generation(self)
+                if self.checkpointer.due():
+                    self.checkpointer.save(self.checkpoint_state(time.perf_counter() - start))
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        self.checkpointer.save(self.checkpoint_state(time.perf_counter() - start))
+
+        self.stats = {"seconds": time.perf_counter() - start, "generations": self.generation,
+                      "best": int(self.costs[0])}
+        count("memetic.generations", self.generation)
+        return self.get_solution()
+
+    def get_solution(self):
+        """Return the best timetable of the population as a list of tuples (course_id, room_id, day, slot)."""
+        best = int(np.argmin(self.costs))
+        return self.instance.to_solution(self.periods[best], self.rooms[best])
+
+    def checkpoint_state(self, elapsed):
+        """Return the state of the search saved in a checkpoint."""
+        return {"generation": self.generation, "periods": self.periods.astype(np.int16),
+                "rooms": self.rooms.astype(np.int16), "costs": self.costs, "rng": self.rng.bit_generator.state,
+                "elapsed": elapsed}
+
+    def log(self, elapsed, children):
+        """Record (and print) the state of the population after a generation."""
+        record = {"time": round(elapsed, 3), "generation": self.generation, "best": int(self.costs.min()),
+                  "mean": round(float(self.costs.mean()), 1), "children": children}
+        self.history.append(record)
+        event("memetic.generation", **record)
+        if self.verbose:
+            print(f"[{record['time']:8.2f}s] generation {record['generation']}: best {record['best']}, "
+                  f"mean {record['mean']}, {children} children")
+
+
+def crossover_child(instance, periods1, rooms1, periods2, rooms2, rng, crossover):
+    """
+    Recombine two timetables.
+
+    :return: Tuple (periods, rooms, flagged) where lectures without a placement have period -1 and
+             flagged are the lectures taken from the second parent (installed last by the repair).
+    """
+    periods = [-1] * instance.nr_lectures
+    rooms = [-1] * instance.nr_lectures
+    flagged = set()
+    first = 0
+    if crossover == "day":
+        # Both halves come from different days, so only the number of lectures per course can be wrong
+        days = {d for d in range(instance.nr_days) if rng.random() < 0.5}
+        for n in instance.course_lectures.tolist():
+            lectures = range(first, first + n)
+            placements = [(periods1[l], rooms1[l]) for l in lectures if periods1[l] // instance.nr_slots_per_day in days]
+            placements += [(periods2[l], rooms2[l]) for l in lectures
+                           if periods2[l] // instance.nr_slots_per_day not in days]
+            rng.shuffle(placements)
+            for l, (p, r) in zip(lectures, placements):
+                periods[l], rooms[l] = p, r
+            first += n
+    else:
+        chosen = set()
+        for members in instance.curricula_courses:
+            if rng.random() < 0.5:
+                chosen.update(members.tolist())
+        for c, n in enumerate(instance.course_lectures.tolist()):
+            for l in range(first, first + n):
+                if c in chosen:
+                    periods[l], rooms[l] = periods1[l], rooms1[l]
+                else:
+                    periods[l], rooms[l] = periods2[l], rooms2[l]
+                    flagged.add(l)
+            first += n
+    return periods, rooms, flagged
+
+
+def breed_child(instance, settings, periods1, rooms1, periods2, rooms2, seed):
+    """
+    Breed one child: crossover, repair, mutation and hill climbing.
+
+    :return: Tuple (periods, rooms) of lists, or None if the child could not be repaired.
+    """
+    rng = random.Random(seed)
+    periods, rooms, flagged = crossover_child(instance, periods1.tolist(), rooms1.tolist(), periods2.tolist(),
+                                              rooms2.tolist(), rng, settings["crossover"])
+    repair = MinConflictsRepair(None, time_limit=settings["repair_time_limit"], seed=rng.random(), instance=instance,
+                                max_steps=settings["repair_steps"])
+    periods, rooms = repair.repair_timetable(periods, rooms, flagged)
+    if min(periods) < 0:
+        return None
+
+    state = TimetableState(instance, periods, rooms)
+    for _ in range(settings["mutation_moves"]):
+        _, changes = random_move(state, rng)
+        if changes is not None:
+            state.apply(changes)
+    for _ in range(settings["local_search_moves"]):
+        _, changes = random_move(state, rng)
+        if changes is not None:
+            delta, undo = state.apply(changes)
+            if delta > 0:
+                state.apply(undo)
+    return state.period, state.room
+
+
+_worker_instance = None
+_worker_settings = None
+
+
+def _init_breeding_worker(instance, settings):
+    """Keep the compiled instance and the breeding settings resident in a breeding process."""
+    global _worker_instance, _worker_settings
+    _worker_instance = instance
+    _worker_settings = settings
+
+
+def _breed_chunk(tasks):
+    """Breed one child per task in a breeding process."""
+    return [breed_child(_worker_instance, _worker_settings, *task) for task in tasks]
+
+
+def main():
+    from data_processing import DataProcessor
+    from ProblemModel import ProblemModel
+
+    file_path = sys.argv[1] if len(sys.argv) > 1 else "./ConvertedFiles/comp01_converted.xlsx"
+    time_limit = float(sys.argv[2]) if len(sys.argv) > 2 else 60.0
+    model = ProblemModel()
+    DataProcessor(file_path).initialize_model(model=model)
+
+    memetic = MemeticAlgorithm(model, time_limit=time_limit, workers=os.cpu_count() or 1, seed=0)
+    memetic.solve()
+    print(f"Memetic: cost {memetic.stats['best']} after {memetic.stats['seconds']:.1f}s "
+          f"({memetic.stats['generations']} generations)")
+
+    if "--ip" in sys.argv:
+        from integer_program import TimetableIP
+
+        start = time.perf_counter()
+        solution = TimetableIP(model).solve()
+        elapsed = time.perf_counter() - start
+        if solution and solution != (None, None):
+            periods, rooms = memetic.instance.from_solution(solution)
+            print(f"TimetableIP: cost {int(memetic.instance.soft_cost(periods, rooms)[0])} after {elapsed:.1f}s")
+        else:
+            print(f"TimetableIP: no solution after {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import random
+import time
+
+import numpy as np
+
+from CompiledInstance import CompiledInstance
+from TimetableState import TimetableState
+
+
+class MinConflictsRepair:
+    def __init__(self, model, time_limit=5.0, seed=None, tabu_tenure=10, instance=None, max_steps=None):
+        """
+        Repair operator that turns a near-feasible timetable into a feasible one with min-conflicts
+        moves and ejection chains. Only the violating lectures and the lectures they eject (conflict
+        neighbours, or room occupants of a full period) are moved.
+
+        :param model: The problem model (ProblemModel).
+        :param time_limit: Wall-clock budget in seconds.
+        :param seed: Seed used to break ties.
+        :param tabu_tenure: Number of placements during which a lecture may not return to a period it was ejected from.
+        :param instance: The compiled instance, if already available (then model may be None).
+        :param max_steps: Optional bound on the number of repair steps; with a seed it makes the repair
+                          reproducible, the time limit then only being a safety limit.
+        """
+        self.model = model
+        self.time_limit = time_limit
+        self.rng = random.Random(seed)
+        self.tabu_tenure = tabu_tenure
+        self.max_steps = max_steps
+        self.instance = instance if instance is not None else CompiledInstance(model)
+        self.stats = {}
+
+    def flagged_lectures(self, periods, rooms, violations):
+        """
+        Return the lectures named in a violation report (the format of test.detect_violations):
+        lectures of the listed courses in the listed periods, and all lectures sharing a listed room and period.
+        """
+        instance = self.instance
+        flagged_courses = set()
+        for conflict in violations.get("conflicts", []):
+            day, slot = conflict["period"]
+            flagged_courses.add((conflict["course1"], day, slot))
+            flagged_courses.add((conflict["course2"], day, slot))
+        for entry in violations.get("availability", []):
+            flagged_courses.add((entry["course_id"], entry["day"], entry["slot"]))
+        flagged_rooms = {(entry["room_id"], entry["day"], entry["slot"]) for entry in violations.get("room_occupation", [])}
+
+        flagged = set()
+        for lecture, (c, p, r) in enumerate(zip(instance.lecture_course.tolist(), periods, rooms)):
+            if p < 0:
+                continue
+            day, slot = divmod(p, instance.nr_slots_per_day)
+            if (instance.course_ids[c], day, slot) in flagged_courses or \
+                    (instance.room_ids[r], day, slot) in flagged_rooms:
+                flagged.add(lecture)
+        return flagged
+
+    def repair(self, solution, violations=None):
+        """
+        Repair a timetable. The lectures not named in the violation report are installed first; the
+        named lectures are kept when they still fit, and all other lectures (including missing ones)
+        are queued. A queued lecture goes to the non-tabu available period whose conflicting lectures
+        have the smallest total weight (min-conflicts), then the smallest penalty increase; the ejected
+        lectures are queued in turn (ejection chain) and their weights grow, so that lectures ejected
+        over and over become expensive to eject and the chain moves on to other lectures.
+
+        :param solution: List of tuples (course_id, room_id, day, slot).
+        :param violations: Optional violation report as returned by test.detect_violations; without it
+                           the lectures are installed in timetable order.
+        :return: The repaired timetable as a list of tuples, or the timetable with the fewest unassigned
+                 lectures when the time limit or step bound is reached (stats["feasible"] tells which).
+        """
+        periods, rooms = self.instance.from_solution(solution)
+        flagged = self.flagged_lectures(periods.tolist(), rooms.tolist(), violations) if violations else set()
+        periods, rooms = self.repair_timetable(periods, rooms, flagged)
+        return [entry for entry, p in zip(self.instance.to_solution(periods, rooms), periods) if p >= 0]
+
+    def repair_timetable(self, periods, rooms, flagged=()):
+        """
+        Repair a timetable given by lecture indices (see repair).
+
+        :param periods: Period index of each lecture (-1 if unscheduled).
+        :param rooms: Room index of each lecture (-1 if unscheduled).
+        :param flagged: Lectures named in a violation report; they are installed last.
+        :return: Tuple (periods, rooms) of lists; lectures still unscheduled at the time limit or step bound
+                 have period -1.
+        """
+        start = time.perf_counter()
+        instance = self.instance
+        periods, rooms = np.asarray(periods).tolist(), np.asarray(rooms).tolist()
+
+        state = TimetableState(instance, [-1] * instance.nr_lectures, [-1] * instance.nr_lectures)
+        queue = []
+        order = [l for l in range(instance.nr_lectures) if l not in flagged] + sorted(flagged)
+        for lecture in order:
+            p, r = periods[lecture], rooms[lecture]
+            if p >= 0 and 0 <= r and state.can_place(lecture, p) and state.room_at[p][r] < 0:
+                state.add(lecture, p, r)
+            else:
+                queue.append(lecture)
+        touched = set(queue)
+
+        neighbours = [set(n) for n in state.neighbours]
+        weight = [1] * instance.nr_lectures  # Grows every time a lecture is ejected (breakout)
+        tabu = {}
+        step, ejections = 0, 0
+        best_missing, best = len(queue), (list(state.period), list(state.room))
+        deadline = start + self.time_limit
+        while queue and (self.max_steps is None or step < self.max_steps) and time.perf_counter() < deadline:
+            step += 1
+            # Most constrained lecture first: the fewest periods without a conflict
+            lecture = min(queue, key=lambda l: (sum(1 for p in range(instance.nr_periods) if state.can_place(l, p)),
+                                                self.rng.random()))
+            queue.remove(lecture)
+            c = state.course[lecture]
+
+            options = []
+            for p in range(instance.nr_periods):
+                if not state.available[c][p]:
+                    continue
+                victims = [other for other in state.period_lectures[p] if state.course[other] in neighbours[c]]
+                if not victims and all(r >= 0 for r in state.room_at[p]):
+                    occupants = [other for other in state.period_lectures[p] if other not in touched] or \
+                                list(state.period_lectures[p])
+                    victims = [self.rng.choice(occupants)]
+                if any(state.course[other] == c for other in victims):
+                    continue  # Never eject a lecture of the same course to take its period
+                is_tabu = tabu.get((lecture, p), 0) > step
+                if victims:
+                    delta = 0
+                else:
+                    delta = state.add(lecture, p, state.free_room(lecture, p))
+                    state.remove(lecture)
+                options.append((is_tabu, sum(weight[other] for other in victims), delta, self.rng.random(), p, victims))
+            if not options:
+                queue.append(lecture)
+                continue
+
+            _, _, _, _, p, victims = min(options)
+            for other in victims:
+                state.remove(other)
+                tabu[(other, p)] = step + self.tabu_tenure
+                weight[other] += 1
+                queue.append(other)
+                touched.add(other)
+                ejections += 1
+            state.add(lecture, p, state.free_room(lecture, p, preferred=rooms[lecture]))
+
+            if len(queue) < best_missing:
+                best_missing, best = len(queue), (list(state.period), list(state.room))
+
+        self.stats = {"seconds": time.perf_counter() - start, "steps": step, "ejections": ejections,
+                      "touched": len(touched), "unassigned": best_missing, "feasible": best_missing == 0}
+        return best
+
+
+def repair_solution(solution, model, violations=None, time_limit=5.0, seed=None, instance=None):
+    """
+    Post-processing step for any solver: repair a timetable with MinConflictsRepair if it violates a hard constraint.
+
+    :param solution: List of tuples (course_id, room_id, day, slot).
+    :param model: The problem model (ProblemModel).
+    :param violations: Optional violation report as returned by test.detect_violations.
+    :param time_limit: Wall-clock budget of the repair in seconds.
+    :param seed: Seed used to break ties.
+    :param instance: The compiled instance, if already available (then model may be None).
+    :return: The repaired timetable (unchanged if it was already feasible).
+    """
+    repairer = MinConflictsRepair(model, time_limit=time_limit, seed=seed, instance=instance)
+    periods, rooms = repairer.instance.from_solution(solution)
+    if len(solution) == repairer.instance.nr_lectures and not any(
+            repairer.instance.hard_violations(periods, rooms).values()):
+        return solution
+    return repairer.repair(solution, violations)
@@ -14,6 +14,14 @@ class Placement:
         self.slot = slot
         self.hash_code = hash(f"{lecture.get_course().get_id()} {self.get_room().get_id()} {self.get_day()} {self.get_slot()}")
 
+    def variable(self):
+        """Return the lecture of this placement."""
+        return self.lecture
+
+    def assigned(self, iteration):
+        """Record the iteration in which this placement was assigned."""
+        self.iteration = iteration
+
     def get_room(self):
         """Return the room assigned to this placement."""
         return self.room
@@ -28,7 +36,7 @@ class Placement:
 
     def __str__(self):
         """String representation of the placement."""
-        compact_penalty = sum(curricula.get_compact_penalty(self) for curricula in self.lecture.get_course().get_curriculas())
+        compact_penalty = self.get_compact_penalty()
         return f"{self.lecture.get_name()} = {self.get_room().get_id()} {self.get_day()} {self.get_slot()} [{self.get_room_cap_penalty()}+{self.get_min_days_penalty()}+{compact_penalty}+{self.get_room_penalty()}]"
 
     def get_room_cap_penalty(self):
@@ -84,7 +92,7 @@ class Placement:
         Compute the curriculum compactness penalty for this placement.
         Lectures belonging to the same curriculum should be adjacent to each other.
         """
-        return sum(curricula.get_compact_penalty(self) for curricula in self.lecture.get_course().get_curriculas())
+        return sum(curricula.get_compact_penalty_for_placement(self) for curricula in self.lecture.get_course().get_curriculas())
 
     def to_int(self):
         """Return the overall penalty as an integer."""
@@ -112,5 +120,5 @@ class Placement:
         return self.hash_code
 
     def tabu_element(self):
-        """Return the placement as an element for the tabu list (course id, day, time, and room id)."""
-        return f"{self.lecture.get_course().get_id()}:{self.get_day()}:{self.get_slot()}:{self.get_room().get_id()}"
+        """Return the placement as an element for the tabu list (course index, day, time, and room index)."""
+        return (self.lecture.get_course().index, self.day, self.slot, self.room.index)
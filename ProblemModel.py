@@ -4,8 +4,10 @@ import os
 from Course import Course
 from Curricula import Curricula
 from Lecture import Lecture
+from Placement import Placement
 from Room import Room
 from Teacher import Teacher
+from timetable_io import read_output_file
 
 
 class ProblemModel:
@@ -28,7 +30,8 @@ class ProblemModel:
         self.room_cap_penalty = 0
 
         # Assignments for variables
-        self.assigned_variables = None
+        self.variables = []
+        self.assigned_variables = set()
         self.unassigned_variables = None
         self.perturb_variables = None
 
@@ -41,6 +44,14 @@ class ProblemModel:
         """Add a constraint to the model."""
         self.constraints.append(constraint)
 
+    def add_variable(self, lecture):
+        """Add a lecture (variable) to the model."""
+        self.variables.append(lecture)
+
+    def get_variables(self):
+        """Return the list of all lectures."""
+        return self.variables
+
     def get_name(self):
         """Return the name of the model instance."""
         return self.model_name
@@ -137,6 +148,66 @@ class ProblemModel:
 
         return conflict_graph
 
+    def install_solution(self, solution, iteration=0):
+        """
+        Install a timetable into the constraint structures in one pass, replacing the current assignment.
+        Unlike assigning the lectures one by one, no conflicts are resolved: a placement clashing with an
+        installed one (same room, teacher or curricula at the same time) is skipped, and the penalties
+        are computed once at the end.
+
+        :param solution: Iterable of tuples (course_id, room_id, day, slot), e.g. a list or a Solution.
+        :param iteration: The iteration recorded in the placements.
+        :return: List of the tuples that were not installed (clashes, unknown courses or rooms, surplus lectures).
+        """
+        nr_days, nr_slots = self.nr_days, self.nr_slots_per_day
+        for constraint in self.constraints:
+            constraint.placement = [[None] * nr_slots for _ in range(nr_days)]
+        for lecture in self.variables:
+            lecture.value = None
+        self.assigned_variables = set()
+
+        courses = {course.get_id(): course for course in self.courses}
+        rooms = {room.get_id(): room for room in self.rooms}
+        placed = {}
+        skipped = []
+        for assignment in solution:
+            course_id, room_id, day, slot = assignment
+            day, slot = int(day), int(slot)
+            course, room = courses.get(course_id), rooms.get(room_id)
+            idx = placed.get(course_id, 0)
+            if course is None or room is None or idx >= course.get_nr_lectures() or \
+                    not (0 <= day < nr_days and 0 <= slot < nr_slots):
+                skipped.append(assignment)
+                continue
+            constraints = [room.get_constraint(), course.get_teacher().get_constraint()]
+            constraints.extend(curricula.get_constraint() for curricula in course.get_curriculas())
+            if any(constraint.placement[day][slot] is not None for constraint in constraints):
+                skipped.append(assignment)
+                continue
+            lecture = course.get_lecture(idx)
+            placed[course_id] = idx + 1
+            placement = Placement(lecture, room, day, slot)
+            for constraint in constraints:
+                constraint.placement[day][slot] = placement
+            lecture.value = placement
+            placement.assigned(iteration)
+            self.assigned_variables.add(lecture)
+
+        self.compact_penalty = self.get_compact_penalty(True)
+        self.room_penalty = self.get_room_penalty(True)
+        self.min_days_penalty = self.get_min_days_penalty(True)
+        self.room_cap_penalty = self.get_room_cap_penalty(True)
+        return skipped
+
+    def load_solution(self, filename, iteration=0):
+        """
+        Read a timetable from an output file (one "course_id room_id day slot" line per lecture) and
+        install it with install_solution.
+
+        :return: List of the tuples that were not installed.
+        """
+        return self.install_solution(read_output_file(filename), iteration)
+
     def get_compact_penalty(self, precise):
         """
         Curriculum compactness penalty.
@@ -218,14 +289,19 @@ class ProblemModel:
         }
         return info
 
+    def before_unassigned(self, iteration, placement):
+        """Hook called before a placement is unassigned."""
+        pass
+
     def after_unassigned(self, iteration, placement):
         """Update penalties after unassigning a placement."""
         lecture = placement.variable()
+        self.assigned_variables.discard(lecture)
         self.room_penalty -= placement.get_room_penalty()
         self.room_cap_penalty -= placement.get_room_cap_penalty()
         self.min_days_penalty -= placement.get_min_days_penalty()
         for curricula in lecture.get_course().get_curriculas():
-            self.compact_penalty -= curricula.get_compact_penalty(placement)
+            self.compact_penalty -= curricula.get_compact_penalty_for_placement(placement)
 
     def before_assigned(self, iteration, placement):
         """Update penalties before assigning a placement."""
@@ -234,4 +310,8 @@ class ProblemModel:
         self.room_penalty += placement.get_room_penalty()
         self.room_cap_penalty += placement.get_room_cap_penalty()
         for curricula in lecture.get_course().get_curriculas():
-            self.compact_penalty += curricula.get_compact_penalty(placement)
+            self.compact_penalty += curricula.get_compact_penalty_for_placement(placement)
+
+    def after_assigned(self, iteration, placement):
+        """Hook called after a placement is assigned."""
+        self.assigned_variables.add(placement.variable())
@@ -10,7 +10,8 @@ class Room:
         self.model = model
         self.room_id = room_id
         self.size = size
-        self.constraint = self.RoomConstraint(model)
+        self.index = len(model.rooms)  # Position of the room in the model
+        self.constraint = self.RoomConstraint(model, self)
         model.add_constraint(self.constraint)
 
     def get_model(self):
@@ -53,16 +54,22 @@ class Room:
         return self.constraint
 
     class RoomConstraint:
-        def __init__(self, model):
+        def __init__(self, model, room):
             """Constructor for the RoomConstraint."""
             self.model = model  # Set the model in RoomConstraint
+            self.room = room
             # Now the model is properly initialized, and we can use it to access nr_days and nr_slots_per_day
             self.placement = [[None for _ in range(self.model.nr_slots_per_day)] for _ in range(self.model.nr_days)]
             self.assigned_variables = None
+            self.variables = []  # Lectures that can be placed in this room
+
+        def add_variable(self, lecture):
+            """Add a lecture (variable) to the room's constraint."""
+            self.variables.append(lecture)
 
         def compute_conflicts(self, placement, conflicts):
             """Compute conflicts, i.e., another placement that uses this room at the same time."""
-            if placement.get_room() != Room.this:
+            if placement.get_room() != self.room:
                 return
             if self.placement[placement.get_day()][placement.get_slot()] is not None and \
                     self.placement[placement.get_day()][placement.get_slot()].variable() != placement.variable():
@@ -70,22 +77,22 @@ class Room:
 
         def in_conflict(self, placement):
             """Check if there is a conflict, i.e., if another lecture is placed in the same room at the same time."""
-            if placement.get_room() != Room.this:
+            if placement.get_room() != self.room:
                 return False
             return self.placement[placement.get_day()][placement.get_slot()] is not None and \
                    self.placement[placement.get_day()][placement.get_slot()].variable() != placement.variable()
 
         def is_consistent(self, placement1, placement2):
             """Check if two placements are consistent (i.e., they are not placed at the same day and time)."""
-            if placement1.get_room() != Room.this:
+            if placement1.get_room() != self.room:
                 return True
-            if placement2.get_room() != Room.this:
+            if placement2.get_room() != self.room:
                 return True
             return placement1.get_day() != placement2.get_day() or placement1.get_slot() != placement2.get_slot()
 
         def assigned(self, iteration, placement):
             """Assign a placement to this room."""
-            if placement.get_room() == Room.this:
+            if placement.get_room() == self.room:
                 if self.placement[placement.get_day()][placement.get_slot()] is not None:
                     conflicts = {self.placement[placement.get_day()][placement.get_slot()]}
                     self.placement[placement.get_day()][placement.get_slot()].variable().unassign(iteration)
@@ -98,16 +105,16 @@ class Room:
 
         def unassigned(self, iteration, placement):
             """Unassign a placement from this room."""
-            if placement.get_room() == Room.this:
+            if placement.get_room() == self.room:
                 self.placement[placement.get_day()][placement.get_slot()] = None
 
         def __str__(self):
             """String representation of the room constraint."""
-            return str(Room.this)
+            return str(self.room)
 
         def __hash__(self):
             """Return the hash code of the room constraint."""
-            return hash(Room.this)
+            return hash(self.room)
 
         def get_placement(self, day, slot):
             """Return the placement of a lecture in this room at the given day and time."""
@@ -0,0 +1,163 @@
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from CompiledInstance import CompiledInstance
+from TimetableState import TimetableState
+from timetable_io import generate_output_file, read_output_file
+
+
+class RoomOptimizer:
+    def __init__(self, model, workers=1, max_rounds=50):
+        """
+        Post-processing stage that re-assigns rooms without touching periods. With all other periods
+        fixed, the rooms of one period form an assignment problem (a course has at most one lecture
+        per period), solved exactly as a min-cost flow: lecture -> room arcs cost the capacity overflow
+        plus the room stability penalty the room would add to the course.
+
+        :param model: The problem model (ProblemModel).
+        :param workers: Number of processes solving the periods of a round.
+        :param max_rounds: Maximal number of rounds over all periods.
+        """
+        self.model = model
+        self.workers = workers
+        self.max_rounds = max_rounds
+        self.instance = CompiledInstance(model)
+        self.stats = {}
+
+    def period_problem(self, state, period):
+        """
+        Build the assignment problem of one period from the current timetable.
+
+        :return: Tuple (lectures, current rooms, cost matrix) with one row per lecture of the period.
+        """
+        lectures = sorted(state.period_lectures[period])
+        current = [state.room[lecture] for lecture in lectures]
+        costs = np.empty((len(lectures), self.instance.nr_rooms), dtype=np.int64)
+        for i, lecture in enumerate(lectures):
+            c = state.course[lecture]
+            used = np.array(state.room_count[c]) > 0
+            used[state.room[lecture]] = state.room_count[c][state.room[lecture]] > 1  # Rooms of the other lectures
+            others = self.instance.course_lectures[c] > 1
+            costs[i] = np.array(state.overflow[c]) + np.where(used | (not others), 0, 1)
+        return lectures, current, costs
+
+    def optimize(self, solution):
+        """
+        Re-optimise the rooms of a timetable. In each round the assignment problems of all periods
+        are solved against the same timetable (in parallel when workers > 1); the new rooms are then
+        applied period by period and kept when they do not increase the total penalty. Rounds are
+        repeated until no period changes.
+
+        :param solution: List of tuples (course_id, room_id, day, slot).
+        :return: The timetable with re-optimised rooms as a list of tuples.
+        """
+        start = time.perf_counter()
+        periods, rooms = self.instance.from_solution(solution)
+        if (periods < 0).any():
+            raise ValueError("The room optimiser needs a complete timetable.")
+        state = TimetableState(self.instance, periods, rooms)
+        initial = state.cost
+
+        pool = None
+        if self.workers > 1:
+            pool = ProcessPoolExecutor(max_workers=self.workers)
+        rounds, changed = 0, 0
+        try:
+            while rounds < self.max_rounds:
+                rounds += 1
+                problems = [self.period_problem(state, p) for p in range(self.instance.nr_periods)
+                            if state.period_lectures[p]]
+                tasks = [(current, costs) for _, current, costs in problems]
+                if pool is None:
+                    assignments = [assign_rooms(*task) for task in tasks]
+                else:
+                    assignments = list(pool.map(_assign_rooms_task, tasks, chunksize=max(1, len(tasks) // self.workers)))
+
+                round_changes = 0
+                for (lectures, current, _), new in zip(problems, assignments):
+                    changes = [(lecture, state.period[lecture], room)
+                               for lecture, room, old in zip(lectures, new, current) if room != old]
+                    if not changes:
+                        continue
+                    delta, undo = state.apply(changes)
+                    if delta < 0:
+                        round_changes += 1
+                    else:
+                        state.apply(undo)
+                changed += round_changes
+                if round_changes == 0:
+                    break
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        self.stats = {"seconds": time.perf_counter() - start, "rounds": rounds, "changed_periods": changed,
+                      "initial": initial, "final": state.cost, "delta": state.cost - initial}
+        return state.to_solution()
+
+
+def assign_rooms(current, costs):
+    """
+    Solve the room assignment problem of one period as a min-cost flow
+    (source -> lecture -> room -> sink, unit capacities). Among optimal assignments the one keeping
+    the most lectures in their current room is chosen.
+
+    :param current: Current room of each lecture.
+    :param costs: Array (lectures, rooms) with the cost of each lecture in each room.
+    :return: List with the new room of each lecture.
+    """
+    from ortools.graph.python import min_cost_flow
+
+    nr_lectures, nr_rooms = costs.shape
+    scale = nr_lectures + 1  # Keeping a room only breaks ties between equally good assignments
+    flow = min_cost_flow.SimpleMinCostFlow()
+    source, sink = nr_lectures + nr_rooms, nr_lectures + nr_rooms + 1
+    arcs = {}
+    for i in range(nr_lectures):
+        flow.add_arc_with_capacity_and_unit_cost(source, i, 1, 0)
+        for r in range(nr_rooms):
+            cost = int(costs[i, r]) * scale + (0 if r == current[i] else 1)
+            arcs[flow.add_arc_with_capacity_and_unit_cost(i, nr_lectures + r, 1, cost)] = (i, r)
+    for r in range(nr_rooms):
+        flow.add_arc_with_capacity_and_unit_cost(nr_lectures + r, sink, 1, 0)
+    flow.set_node_supply(source, nr_lectures)
+    flow.set_node_supply(sink, -nr_lectures)
+    if flow.solve() != flow.OPTIMAL:
+        return list(current)
+
+    rooms = list(current)
+    for arc, (i, r) in arcs.items():
+        if flow.flow(arc):
+            rooms[i] = r
+    return rooms
+
+
+def _assign_rooms_task(task):
+    """Solve the room assignment problem of one period in a worker process."""
+    return assign_rooms(*task)
+
+
+def main():
+    import os
+
+    from data_processing import DataProcessor
+    from ProblemModel import ProblemModel
+
+    if len(sys.argv) < 3:
+        print("Usage: python RoomOptimizer.py <instance.xlsx> <solution.out> [output.out]")
+        return
+    model = ProblemModel()
+    DataProcessor(sys.argv[1]).initialize_model(model=model)
+    optimizer = RoomOptimizer(model, workers=os.cpu_count() or 1)
+    solution = optimizer.optimize(read_output_file(sys.argv[2]))
+    generate_output_file(solution, sys.argv[3] if len(sys.argv) > 3 else sys.argv[2])
+    stats = optimizer.stats
+    print(f"Cost {stats['initial']} -> {stats['final']} ({stats['delta']:+d}) in {stats['rounds']} rounds, "
+          f"{stats['seconds']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+import glob
+import math
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+from checkpoint import Checkpointer
+from CompiledInstance import CompiledInstance
+from DsaturSolver import DsaturSolver
+from instrumentation import count, event
+from TimetableState import TimetableState
+
+
+class SimulatedAnnealing:
+    def __init__(self, model, time_limit=60.0, max_iterations=None, initial_temperature=2.0, cooling=0.97,
+                 steps_per_temperature=None, min_temperature=0.05, reheat_after=30, reheat_factor=0.5,
+                 move_weights=(0.4, 0.2, 0.4), seed=None, log_interval=1.0, verbose=True, checkpoint=None,
+                 checkpoint_interval=60.0, resume=False):
+        """
+        Simulated annealing over a feasible timetable with Kempe-chain, single-lecture and room moves.
+        Every move keeps the timetable feasible and is evaluated by its delta on a TimetableState.
+
+        :param model: The problem model (ProblemModel).
+        :param time_limit: Wall-clock budget in seconds.
+        :param max_iterations: Optional bound on the number of moves; with a seed it makes a run reproducible
+                               independently of the machine speed.
+        :param initial_temperature: Starting temperature.
+        :param cooling: Factor applied to the temperature after every steps_per_temperature moves.
+        :param steps_per_temperature: Moves per temperature level (defaults to ten per lecture).
+        :param min_temperature: Temperature at which the search reheats.
+        :param reheat_after: Number of temperature levels without a new best timetable after which the search reheats.
+        :param reheat_factor: Reheating restarts from the best timetable at reheat_factor * initial_temperature.
+        :param move_weights: Relative frequencies of Kempe-chain, single-lecture and room moves.
+        :param seed: Seed of the move sampling and acceptance.
+        :param log_interval: Seconds between two progress records.
+        :param verbose: Print the progress records.
+        :param checkpoint: Optional path of a checkpoint file the search state is saved to.
+        :param checkpoint_interval: Seconds between two checkpoints.
+        :param resume: Continue from the checkpoint file if it exists (the time limit and iteration bound
+                       cover the resumed run as a whole).
+        """
+        self.model = model
+        self.time_limit = time_limit
+        self.max_iterations = max_iterations
+        self.initial_temperature = initial_temperature
+        self.cooling = cooling
+        self.steps_per_temperature = steps_per_temperature
+        self.min_temperature = min_temperature
+        self.reheat_after = reheat_after
+        self.reheat_factor = reheat_factor
+        self.move_weights = move_weights
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.log_interval = log_interval
+        self.verbose = verbose
+        self.instance = CompiledInstance(model)
+        self.checkpointer = Checkpointer(checkpoint, checkpoint_interval, engine="annealing")
+        self.resume = resume
+
+        self.state = None
+        self.iteration = 0
+        self.best_value = None
+        self.best_periods = None
+        self.best_rooms = None
+        self.stats = {}
+        self.history = []  # Progress records: elapsed time, temperature, current and best cost, moves per second
+
+    def load(self, solution):
+        """Build the timetable state of a solution given as a list of tuples (course_id, room_id, day, slot)."""
+        periods, rooms = self.instance.from_solution(solution)
+        if (periods < 0).any() or any(self.instance.hard_violations(periods, rooms).values()):
+            raise ValueError("Simulated annealing needs a complete and feasible starting timetable.")
+        self.state = TimetableState(self.instance, periods, rooms)
+
+    def get_solution(self):
+        """Return the best timetable found as a list of tuples (course_id, room_id, day, slot)."""
+        return self.instance.to_solution(self.best_periods, self.best_rooms)
+
+    def solve(self, solution=None):
+        """
+        Anneal from a feasible timetable until the time limit or the iteration bound.
+        A move is accepted when it does not worsen the cost, otherwise with probability
+        exp(-delta / temperature).
+
+        :param solution: Optional starting timetable; otherwise one is constructed with DsaturSolver.
+        :return: The best timetable found as a list of tuples (course_id, room_id, day, slot),
+                 or None if no starting timetable could be constructed.
+        """
+        saved = self.checkpointer.load() if self.resume else None
+        steps = self.steps_per_temperature or 10 * self.instance.nr_lectures
+        if saved is None:
+            if solution is None:
+                solution = DsaturSolver(self.model, seed=self.seed).solve()
+                if solution is None:
+                    return None
+            self.load(solution)
+            self.best_value = self.state.cost
+            self.best_periods, self.best_rooms = list(self.state.period), list(self.state.room)
+            temperature = self.initial_temperature
+            stagnant, reheats, level_best = 0, 0, self.best_value
+            accepted = {"kempe": 0, "move": 0, "room": 0}
+            elapsed = 0.0
+        else:
+            self.state = TimetableState.restore(self.instance, saved["state"])
+            self.iteration = saved["iteration"]
+            self.rng.setstate(saved["rng"])
+            self.best_value = saved["best_value"]
+            self.best_periods, self.best_rooms = saved["best_periods"].tolist(), saved["best_rooms"].tolist()
+            temperature, stagnant, reheats, level_best = \
+                saved["temperature"], saved["stagnant"], saved["reheats"], saved["level_best"]
+            accepted = saved["accepted"]
+            elapsed = saved["elapsed"]
+        state = self.state
+
+        start = time.perf_counter() - elapsed
+        deadline = start + self.time_limit
+        last_log, logged_iteration = time.perf_counter(), self.iteration
+
+        while self.max_iterations is None or self.iteration < self.max_iterations:
+            if self.iteration % 100 == 0 and time.perf_counter() >= deadline:
+                break
+            self.iteration += 1
+            kind, changes = random_move(state, self.rng, self.move_weights)
+            if changes is not None:
+                delta, undo = state.apply(changes)
+                if delta <= 0 or self.rng.random() < math.exp(-delta / temperature):
+                    accepted[kind] += 1
+                    if state.cost < self.best_value:
+                        self.best_value = state.cost
+                        self.best_periods, self.best_rooms = list(state.period), list(state.room)
+                else:
+                    state.apply(undo)
+
+            if self.iteration % steps == 0:
+                temperature *= self.cooling
+                stagnant = 0 if self.best_value < level_best else stagnant + 1
+                level_best = self.best_value
+                if temperature < self.min_temperature or stagnant >= self.reheat_after:
+                    reheats += 1
+                    stagnant = 0
+                    temperature = self.reheat_factor * self.initial_temperature
+                    self.state = state = TimetableState(self.instance, self.best_periods, self.best_rooms)
+
+            if self.iteration % 1000 == 0:
+                now = time.perf_counter()
+                if now - last_log >= self.log_interval:
+                    self.log(now - start, temperature, state.cost, (self.iteration - logged_iteration) / (now - last_log))
+                    last_log, logged_iteration = now, self.iteration
+                if self.checkpointer.due():
+                    self.checkpointer.save(self.checkpoint_state(now - start, temperature, stagnant, reheats,
+                                                                 level_best, accepted))
+
+        elapsed = time.perf_counter() - start
+        self.checkpointer.save(self.checkpoint_state(elapsed, temperature, stagnant, reheats, level_best, accepted))
+        self.log(elapsed, temperature, state.cost, self.iteration / max(elapsed, 1e-9))
+        self.stats = {"seconds": elapsed, "iterations": self.iteration, "reheats": reheats, "accepted": accepted}
+        count("annealing.iterations", self.iteration)
+        for kind, moves in accepted.items():
+            count(f"annealing.accepted.{kind}", moves)
+        count("annealing.reheats", reheats)
+        return self.get_solution()
+
+    def checkpoint_state(self, elapsed, temperature, stagnant, reheats, level_best, accepted):
+        """Return the state of the search saved in a checkpoint."""
+        return {"state": self.state.snapshot(), "iteration": self.iteration, "rng": self.rng.getstate(),
+                "best_value": self.best_value, "best_periods": np.array(self.best_periods, dtype=np.int16),
+                "best_rooms": np.array(self.best_rooms, dtype=np.int16), "temperature": temperature,
+                "stagnant": stagnant, "reheats": reheats, "level_best": level_best, "accepted": dict(accepted),
+                "elapsed": elapsed}
+
+    def log(self, elapsed, temperature, value, moves_per_second):
+        """Record (and print) a progress record."""
+        record = {"time": round(elapsed, 3), "iteration": self.iteration, "temperature": round(temperature, 4),
+                  "cost": value, "best": self.best_value, "moves_per_second": round(moves_per_second, 1)}
+        self.history.append(record)
+        event("annealing.progress", **record)
+        if self.verbose:
+            print(f"[{record['time']:8.2f}s] iteration {record['iteration']}: T {record['temperature']}, "
+                  f"cost {value}, best {self.best_value}, {record['moves_per_second']} moves/s")
+
+
+def random_move(state, rng, weights=(0.4, 0.2, 0.4)):
+    """
+    Sample a feasible neighbour of a complete and feasible timetable: a Kempe-chain swap between the
+    period of a random lecture and another period, a move of the lecture to a conflict-free period
+    and free room, or a move/swap of its room inside its period.
+
+    :param state: The timetable (TimetableState).
+    :param rng: Random number generator (random.Random).
+    :param weights: Relative frequencies of Kempe-chain, single-lecture and room moves.
+    :return: Tuple (kind, changes) where changes is a list of (lecture, period, room), or (kind, None)
+             if the sampled move is infeasible.
+    """
+    instance = state.instance
+    lecture = rng.randrange(instance.nr_lectures)
+    period, room = state.period[lecture], state.room[lecture]
+    kind = rng.choices(("kempe", "move", "room"), weights=weights)[0]
+
+    if kind == "room":
+        other_room = rng.randrange(instance.nr_rooms)
+        if other_room == room:
+            return kind, None
+        other = state.room_at[period][other_room]
+        if other < 0:
+            return kind, [(lecture, period, other_room)]
+        return kind, [(lecture, period, other_room), (other, period, room)]
+
+    other_period = rng.randrange(instance.nr_periods - 1)
+    other_period += other_period >= period
+    if kind == "kempe":
+        return kind, state.kempe_changes(lecture, other_period)
+    if not state.can_place(lecture, other_period):
+        return kind, None
+    other_room = state.free_room(lecture, other_period, preferred=room)
+    if other_room < 0:
+        return kind, None
+    return kind, [(lecture, other_period, other_room)]
+
+
+def main():
+    from data_processing import DataProcessor
+    from ProblemModel import ProblemModel
+
+    time_limit = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    print(f"{'instance':<10} {'lectures':>8} {'initial':>8} {'final':>8} {'feasible':>8} {'moves/s':>10} {'reheats':>8}")
+    for file_path in sorted(glob.glob("./ConvertedFiles/comp*_converted.xlsx")):
+        model = ProblemModel()
+        DataProcessor(file_path).initialize_model(model=model)
+        name = os.path.basename(file_path).split("_")[0]
+        solver = SimulatedAnnealing(model, time_limit=time_limit, seed=0, verbose=False)
+        start = DsaturSolver(model, seed=0).solve()
+        if start is None:
+            print(f"{name:<10} {solver.instance.nr_lectures:>8} {'-':>8}")
+            continue
+        initial = int(solver.instance.soft_cost(*solver.instance.from_solution(start))[0])
+        solution = solver.solve(start)
+        periods, rooms = solver.instance.from_solution(solution)
+        feasible = not any(solver.instance.hard_violations(periods, rooms).values())
+        cost = int(solver.instance.soft_cost(periods, rooms)[0])
+        rate = solver.stats["iterations"] / solver.stats["seconds"]
+        print(f"{name:<10} {solver.instance.nr_lectures:>8} {initial:>8} {cost:>8} {'yes' if feasible else 'no':>8} "
+              f"{rate:>10.0f} {solver.stats['reheats']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import numpy as np
+
+from timetable_io import read_output_file
+
+# Soft penalty components, in the order of CompiledInstance.soft_penalties
+COMPONENTS = ["RoomCapacity", "MinimumWorkingDays", "CurriculumCompactness", "RoomStability"]
+
+
+class Solution:
+    def __init__(self, instance, periods, rooms):
+        """
+        Compact timetable: the period and room index of every lecture of a compiled instance, stored
+        in one read-only int16 array of shape (2, lectures) (-1 for an unscheduled lecture).
+        A Solution iterates as the usual tuples (course_id, room_id, day, slot), so it can be passed to
+        every function taking a timetable in the tuple format, and it is hashable.
+
+        :param instance: The compiled instance (CompiledInstance) the indices refer to.
+        :param periods: Period index of each lecture.
+        :param rooms: Room index of each lecture.
+        """
+        data = np.empty((2, instance.nr_lectures), dtype=np.int16)
+        data[0] = periods
+        data[1] = rooms
+        self._set(instance, data)
+
+    def _set(self, instance, data):
+        data.flags.writeable = False
+        self.instance = instance
+        self.data = data
+        self._hash = None
+        self._assignments = None
+
+    @classmethod
+    def from_buffer(cls, instance, buffer):
+        """Create a solution sharing the memory of a buffer written by tobytes() (no copy is made)."""
+        solution = cls.__new__(cls)
+        solution._set(instance, np.frombuffer(buffer, dtype=np.int16).reshape(2, instance.nr_lectures))
+        return solution
+
+    @classmethod
+    def from_tuples(cls, instance, solution):
+        """Create a solution from a timetable given as tuples (course_id, room_id, day, slot)."""
+        if isinstance(solution, Solution):
+            return solution
+        return cls(instance, *instance.from_solution(solution))
+
+    @classmethod
+    def from_out_file(cls, instance, filename):
+        """Read a solution from an output file (see timetable_io.read_output_file)."""
+        return cls.from_tuples(instance, read_output_file(filename))
+
+    @property
+    def periods(self):
+        """Read-only view of the period index of each lecture."""
+        return self.data[0]
+
+    @property
+    def rooms(self):
+        """Read-only view of the room index of each lecture."""
+        return self.data[1]
+
+    def tobytes(self):
+        return self.data.tobytes()
+
+    def to_tuples(self):
+        """Return the timetable as a list of tuples (course_id, room_id, day, slot) of the scheduled lectures."""
+        instance = self.instance
+        course_ids, room_ids, slots = instance.course_ids, instance.room_ids, instance.nr_slots_per_day
+        return [(course_ids[c], room_ids[r], p // slots, p % slots)
+                for c, p, r in zip(instance.lecture_course.tolist(), self.periods.tolist(), self.rooms.tolist())
+                if p >= 0]
+
+    def write(self, filename):
+        """Write the timetable to an output file."""
+        with open(filename, "w") as f:
+            for course_id, room_id, day, slot in self:
+                f.write(f"{course_id} {room_id} {day} {slot}\n")
+
+    def is_complete(self):
+        return bool((self.periods >= 0).all())
+
+    def hard_violations(self):
+        """Count the hard constraint violations (see CompiledInstance.hard_violations)."""
+        return self.instance.hard_violations(self.periods, self.rooms)
+
+    def is_feasible(self):
+        return not any(self.hard_violations().values())
+
+    def soft_penalties(self):
+        """Return the soft penalties [RoomCapacity, MinimumWorkingDays, CurriculumCompactness, RoomStability]."""
+        return self.instance.soft_penalties(self.periods, self.rooms)[0].tolist()
+
+    def cost(self):
+        """Return the total soft penalty."""
+        return int(self.instance.soft_cost(self.periods, self.rooms)[0])
+
+    def score(self):
+        """
+        Check the hard constraints and compute the soft penalties, as reported by the benchmark, the CLI
+        and the solver service.
+
+        :return: Dictionary with the hard violations, feasibility, the soft penalty of every component and
+                 the cost (None if the timetable is infeasible).
+        """
+        violations = self.hard_violations()
+        feasible = not any(violations.values())
+        penalties = self.soft_penalties()
+        return {"hard_violations": violations, "feasible": feasible, **dict(zip(COMPONENTS, penalties)),
+                "cost": int(sum(penalties)) if feasible else None}
+
+    def __iter__(self):
+        return iter(self.to_tuples())
+
+    def __len__(self):
+        return int((self.periods >= 0).sum())
+
+    def __contains__(self, assignment):
+        """Check whether a tuple (course_id, room_id, day, slot) is part of the timetable."""
+        if self._assignments is None:
+            instance = self.instance
+            codes = (instance.lecture_course * instance.nr_periods + self.periods.astype(np.int64)) \
+                * instance.nr_rooms + self.rooms
+            self._assignments = set(codes[self.periods >= 0].tolist())
+        try:
+            course_id, room_id, day, slot = assignment
+            c = self.instance.course_index[course_id]
+            r = self.instance.room_index[room_id]
+        except (KeyError, TypeError, ValueError):
+            return False
+        p = self.instance.period(int(day), int(slot))
+        return (c * self.instance.nr_periods + p) * self.instance.nr_rooms + r in self._assignments
+
+    def __eq__(self, other):
+        if not isinstance(other, Solution):
+            return NotImplemented
+        return self.data.shape == other.data.shape and bool((self.data == other.data).all())
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(self.data.tobytes())
+        return self._hash
+
+    def __getstate__(self):
+        return {"instance": self.instance, "data": self.data.tobytes()}
+
+    def __setstate__(self, state):
+        self._set(state["instance"], np.frombuffer(state["data"], dtype=np.int16).reshape(2, -1).copy())
+
+    def __repr__(self):
+        return f"Solution({len(self)}/{self.instance.nr_lectures} lectures scheduled)"
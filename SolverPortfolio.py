@@ -0,0 +1,353 @@
+import contextlib
+import io
+import multiprocessing
+import os
+import queue
+import sys
+import time
+
+import numpy as np
+
+from checkpoint import Checkpointer
+from CompiledInstance import CompiledInstance
+from timetable_io import generate_output_file
+
+
+class IncumbentStore:
+    def __init__(self, nr_lectures, context=multiprocessing):
+        """
+        Best timetable shared by the processes of a portfolio. The store is a shared-memory array
+        holding the cost, a version stamp, the index of the publishing solver and the period and
+        room of every lecture; it is guarded by the array's lock.
+
+        :param nr_lectures: Number of lectures of the instance.
+        :param context: Multiprocessing context in which the shared array is created.
+        """
+        self.nr_lectures = nr_lectures
+        self.array = context.Array("q", 3 + 2 * nr_lectures)
+
+    def version(self):
+        """Return the number of incumbents published so far."""
+        return self.array[1]
+
+    def cost(self):
+        """Return the cost of the incumbent, or None if nothing was published yet."""
+        with self.array.get_lock():
+            return self.array[0] if self.array[1] else None
+
+    def publish(self, periods, rooms, cost, solver=0):
+        """
+        Publish a feasible timetable if it is better than the incumbent.
+
+        :return: True if the timetable became the incumbent.
+        """
+        n = self.nr_lectures
+        with self.array.get_lock():
+            if self.array[1] and cost >= self.array[0]:
+                return False
+            self.array[0] = int(cost)
+            self.array[1] += 1
+            self.array[2] = solver
+            self.array[3:3 + n] = [int(p) for p in periods]
+            self.array[3 + n:] = [int(r) for r in rooms]
+            return True
+
+    def get(self):
+        """Return the incumbent as a tuple (cost, version, solver, periods, rooms), or None."""
+        n = self.nr_lectures
+        with self.array.get_lock():
+            if not self.array[1]:
+                return None
+            values = np.frombuffer(self.array.get_obj(), dtype=np.int64).copy()
+        return int(values[0]), int(values[1]), int(values[2]), values[3:3 + n], values[3 + n:]
+
+
+class SolverPortfolio:
+    def __init__(self, model, solvers=("dsatur", "annealing", "tabu", "memetic"), time_limit=60.0, seed=None,
+                 slice_time=5.0, verbose=True, checkpoint=None, checkpoint_interval=60.0, resume=False):
+        """
+        Run several solvers on the same problem model in separate processes under one wall-clock budget.
+        Improving solvers publish their timetables in a shared IncumbentStore; the local searches restart
+        from the incumbent when it is better than their own best, the memetic algorithm adds it to its
+        population and CP-SAT takes it as a hint.
+        The model is inherited by forked processes, so it is loaded only once.
+
+        :param model: The problem model (ProblemModel).
+        :param solvers: Names of the solvers to run (keys of PORTFOLIO_SOLVERS).
+        :param time_limit: Wall-clock budget in seconds shared by all solvers.
+        :param seed: Seed from which the seed of each solver is derived.
+        :param slice_time: Seconds a local search runs before it publishes and checks the incumbent.
+        :param verbose: Print every new incumbent.
+        :param checkpoint: Optional path of a checkpoint file the incumbent is saved to when it improves.
+        :param checkpoint_interval: Seconds between two checkpoints.
+        :param resume: Start from the incumbent of the checkpoint file if it exists: the solvers keep no state
+                       of their own, so they continue from it as from any incumbent, and the time limit covers
+                       both runs.
+        """
+        for name in solvers:
+            if name not in PORTFOLIO_SOLVERS:
+                raise ValueError(f"Unknown solver: {name}")
+        self.model = model
+        self.solvers = list(solvers)
+        self.time_limit = time_limit
+        self.seed = seed
+        self.slice_time = slice_time
+        self.verbose = verbose
+        self.checkpointer = Checkpointer(checkpoint, checkpoint_interval, engine="portfolio")
+        self.resume = resume
+        self.instance = CompiledInstance(model)
+        self.stats = {}
+
+    def run(self, grace=2.0):
+        """
+        Run the portfolio until the time limit or until every solver has finished, then stop the
+        solvers (forcefully after grace seconds).
+
+        :return: The best timetable found as a list of tuples (course_id, room_id, day, slot), or None.
+        """
+        context = multiprocessing.get_context("fork")
+        store = IncumbentStore(self.instance.nr_lectures, context)
+        stop_event = context.Event()
+        results = context.Queue()
+        start = time.time()
+        saved = self.checkpointer.load() if self.resume else None
+        if saved is not None:
+            solver = self.solvers.index(saved["solver"]) if saved["solver"] in self.solvers else 0
+            store.publish(saved["periods"], saved["rooms"], saved["cost"], solver)
+            start -= saved["elapsed"]
+        deadline = start + self.time_limit
+        seeds = np.random.SeedSequence(self.seed).generate_state(len(self.solvers)).tolist()
+
+        processes = []
+        for index, name in enumerate(self.solvers):
+            process = context.Process(
+                target=_run_member,
+                args=(name, index, self.model, self.instance, store, deadline, stop_event, seeds[index],
+                      self.slice_time, results),
+                daemon=True,
+            )
+            process.start()
+            processes.append(process)
+
+        incumbents = []
+        seen = 0
+        while time.time() < deadline and any(process.is_alive() for process in processes):
+            time.sleep(0.05)
+            if store.version() != seen:
+                cost, seen, solver, _, _ = store.get()
+                incumbents.append({"time": round(time.time() - start, 3), "cost": cost,
+                                   "solver": self.solvers[solver]})
+                if self.verbose:
+                    print(f"[{time.time() - start:8.2f}s] incumbent {cost} from {self.solvers[solver]}")
+                if self.checkpointer.due():
+                    self.checkpointer.save(self.checkpoint_state(store, time.time() - start))
+
+        stop_event.set()
+        for process in processes:
+            process.join(timeout=max(0.0, deadline + grace - time.time()))
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+        members = {name: "terminated" for name in self.solvers}
+        while True:
+            try:
+                name, status = results.get_nowait()
+            except queue.Empty:
+                break
+            members[name] = status
+
+        if store.version():
+            self.checkpointer.save(self.checkpoint_state(store, time.time() - start))
+        best = store.get()
+        self.stats = {"seconds": time.time() - start, "members": members, "incumbents": incumbents,
+                      "best_cost": None if best is None else best[0],
+                      "best_solver": None if best is None else self.solvers[best[2]]}
+        if best is None:
+            return None
+        return self.instance.to_solution(best[3], best[4])
+
+    def checkpoint_state(self, store, elapsed):
+        """Return the incumbent of the store, saved in a checkpoint."""
+        cost, _, solver, periods, rooms = store.get()
+        return {"cost": cost, "solver": self.solvers[solver], "periods": periods.astype(np.int16),
+                "rooms": rooms.astype(np.int16), "elapsed": elapsed}
+
+
+def publish(store, instance, solver, solution):
+    """
+    Publish a timetable given as a list of tuples if it is complete and feasible.
+
+    :return: Tuple (periods, rooms, cost), or None if the timetable is not feasible.
+    """
+    if not solution:
+        return None
+    periods, rooms = instance.from_solution(solution)
+    if (periods < 0).any() or any(instance.hard_violations(periods, rooms).values()):
+        return None
+    cost = int(instance.soft_cost(periods, rooms)[0])
+    store.publish(periods, rooms, cost, solver)
+    return periods, rooms, cost
+
+
+def starting_point(store, instance, own):
+    """Return the incumbent if it is better than the solver's own best (cost, solution), else the own best."""
+    incumbent = store.get()
+    if incumbent is not None and (own is None or incumbent[0] < own[0]):
+        return incumbent[0], instance.to_solution(incumbent[3], incumbent[4])
+    return own
+
+
+@contextlib.contextmanager
+def _silenced():
+    """Silence the prints of a solver, including those of native code, in a portfolio process."""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    with open(os.devnull, "w") as devnull:
+        os.dup2(devnull.fileno(), 1)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                yield
+        finally:
+            os.dup2(saved, 1)
+            os.close(saved)
+
+
+def _run_dsatur(model, instance, store, solver, deadline, stop_event, seed, slice_time):
+    from DsaturSolver import DsaturSolver
+
+    publish(store, instance, solver, DsaturSolver(model, seed=seed, time_limit=deadline - time.time()).solve())
+
+
+def _run_local_search(engine, model, instance, store, solver, deadline, stop_event, seed, slice_time):
+    """Run a local search in slices, publishing after each slice and restarting from a better incumbent."""
+    from DsaturSolver import DsaturSolver
+
+    own = None
+    iteration = 0
+    while not stop_event.is_set() and time.time() < deadline:
+        own = starting_point(store, instance, own)
+        if own is None:
+            solution = DsaturSolver(model, seed=seed, time_limit=max(0.0, deadline - time.time())).solve()
+            result = publish(store, instance, solver, solution)
+            if result is None:
+                return
+            own = result[2], solution
+        iteration += 1
+        budget = min(slice_time, deadline - time.time())
+        if budget <= 0:
+            break
+        solution = engine(model, budget, seed + iteration).solve(own[1])
+        result = publish(store, instance, solver, solution)
+        if result is not None and result[2] < own[0]:
+            own = result[2], solution
+
+
+def _run_annealing(*args):
+    from SimulatedAnnealing import SimulatedAnnealing
+
+    _run_local_search(lambda model, budget, seed: SimulatedAnnealing(model, time_limit=budget, seed=seed,
+                                                                     verbose=False), *args)
+
+
+def _run_tabu(*args):
+    from TabuSearch import TabuSearch
+
+    _run_local_search(lambda model, budget, seed: TabuSearch(model, time_limit=budget, seed=seed, verbose=False),
+                      *args)
+
+
+def _run_memetic(model, instance, store, solver, deadline, stop_event, seed, slice_time):
+    """Evolve a population that takes in every better incumbent and publishes its own improvements."""
+    from MemeticAlgorithm import MemeticAlgorithm
+
+    seen = {"version": None}
+
+    def exchange(memetic):
+        best = int(np.argmin(memetic.costs))
+        store.publish(memetic.periods[best], memetic.rooms[best], int(memetic.costs[best]), solver)
+        incumbent = store.get()
+        if incumbent is not None and incumbent[1] != seen["version"] and incumbent[0] < memetic.costs[best]:
+            memetic.inject(incumbent[3], incumbent[4])
+        seen["version"] = None if incumbent is None else incumbent[1]
+
+    memetic = MemeticAlgorithm(model, time_limit=0.9 * (deadline - time.time()), seed=seed, verbose=False,
+                               stop_event=stop_event, on_generation=exchange)
+    publish(store, instance, solver, memetic.solve())
+
+
+def _run_ip(model, instance, store, solver, deadline, stop_event, seed, slice_time):
+    from integer_program import TimetableIP
+
+    incumbent = store.get()
+    hint = None if incumbent is None else instance.to_solution(incumbent[3], incumbent[4])
+    with _silenced():
+        solution = TimetableIP(model, time_limit=0.9 * (deadline - time.time()), seed=seed).solve(hint)
+    if solution != (None, None):
+        publish(store, instance, solver, solution)
+
+
+def _run_gametheory(model, instance, store, solver, deadline, stop_event, seed, slice_time):
+    from GameTheory import game_theory_timetabling
+
+    with _silenced():
+        solution = game_theory_timetabling(model, time_limit=0.9 * (deadline - time.time()), seed=seed)
+    publish(store, instance, solver, solution)
+
+
+def _run_bat(model, instance, store, solver, deadline, stop_event, seed, slice_time):
+    from Bat import BatAlgorithm
+
+    while not stop_event.is_set() and time.time() < deadline:
+        bat = BatAlgorithm(D=instance.nr_lectures, NP=40, N_Gen=20, A=0.9, r=0.5, Qmin=0.0, Qmax=2.0,
+                           Lower=0.0, Upper=1.0, function=None, seed=seed)
+        bat.move_bat(model)
+        solution = bat.get_solution(model, seed=seed)
+        publish(store, instance, solver, solution)
+        seed += 1
+
+
+# Solvers available to the portfolio: name -> runner(model, instance, store, solver, deadline, stop_event, seed, slice_time)
+PORTFOLIO_SOLVERS = {
+    "dsatur": _run_dsatur,
+    "annealing": _run_annealing,
+    "tabu": _run_tabu,
+    "memetic": _run_memetic,
+    "ip": _run_ip,
+    "gametheory": _run_gametheory,
+    "bat": _run_bat,
+}
+
+
+def _run_member(name, solver, model, instance, store, deadline, stop_event, seed, slice_time, results):
+    """Run one solver of the portfolio and report how it ended."""
+    try:
+        PORTFOLIO_SOLVERS[name](model, instance, store, solver, deadline, stop_event, seed, slice_time)
+        results.put((name, "finished"))
+    except Exception as e:
+        results.put((name, f"failed: {e}"))
+
+
+def main():
+    from data_processing import DataProcessor
+    from ProblemModel import ProblemModel
+
+    file_path = sys.argv[1] if len(sys.argv) > 1 else "./ConvertedFiles/comp01_converted.xlsx"
+    time_limit = float(sys.argv[2]) if len(sys.argv) > 2 else 60.0
+    solvers = sys.argv[3].split(",") if len(sys.argv) > 3 else ("dsatur", "annealing", "tabu", "memetic")
+    model = ProblemModel()
+    DataProcessor(file_path).initialize_model(model=model)
+
+    portfolio = SolverPortfolio(model, solvers=solvers, time_limit=time_limit, seed=0)
+    solution = portfolio.run()
+    print(f"Members: {portfolio.stats['members']}")
+    if solution is None:
+        print("No feasible timetable found.")
+        return
+    print(f"Best cost {portfolio.stats['best_cost']} from {portfolio.stats['best_solver']}")
+    generate_output_file(solution, "./Validator/Solution_portfolio.out")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+import asyncio
+import http.client
+import itertools
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from instrumentation import instrumentation
+from timetable_io import generate_output_file, read_output_file
+
+# Problem models resident in this process: instance path -> (ProblemModel, CompiledInstance)
+_models = {}
+_progress = None
+
+
+def load_instance(path):
+    """
+    Return the problem model and compiled instance of an instance file, loading them only once per process.
+
+    :return: Tuple (model, instance, cached).
+    """
+    from CompiledInstance import CompiledInstance
+    from data_processing import DataProcessor
+    from ProblemModel import ProblemModel
+
+    if path in _models:
+        return _models[path] + (True,)
+    model = ProblemModel()
+    DataProcessor(path).initialize_model(model=model)
+    _models[path] = model, CompiledInstance(model)
+    return _models[path] + (False,)
+
+
+def _init_worker(progress):
+    """Keep the progress queue and silence the solvers' prints (including native logs) in a pool worker."""
+    global _progress
+    _progress = progress
+    sys.stdout.flush()
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+
+
+def run_job(job_id, job):
+    """
+    Run a solve, validate or score job in a pool worker. Instrumentation records of the solvers are
+    forwarded to the service as progress events while the job runs.
+
+    :param job_id: Identifier of the job, attached to its progress events.
+    :param job: Dictionary with the type of the job ("solve", "validate" or "score"), the instance path and
+                either the solver settings (solver, time_limit, seed, cores) or the timetable to check.
+    :return: Dictionary with the result of the job.
+    """
+    from cli import CLI_SOLVERS
+    from Solution import Solution
+
+    def forward(record):
+        _progress.put((job_id, record))
+
+    was_enabled = instrumentation.enabled
+    instrumentation.listeners.append(forward)
+    if not was_enabled:
+        instrumentation.enable()
+    try:
+        start = time.perf_counter()
+        model, instance, cached = load_instance(job["instance"])
+        forward({"type": "event", "name": "service.instance", "cached": cached,
+                 "seconds": round(time.perf_counter() - start, 6)})
+        if job["type"] == "solve":
+            start = time.perf_counter()
+            solution = CLI_SOLVERS[job.get("solver", "annealing")][0](
+                job["instance"], model, float(job.get("time_limit", 10.0)), job.get("seed"), int(job.get("cores", 1)))
+            result = {"seconds": round(time.perf_counter() - start, 3), "timetable": None}
+            if solution:
+                result.update(Solution.from_tuples(instance, solution).score())
+                result["timetable"] = [list(assignment) for assignment in solution]
+            return result
+        solution = [(course, room, int(day), int(slot)) for course, room, day, slot in job["timetable"]]
+        result = Solution.from_tuples(instance, solution).score()
+        if job["type"] == "validate":
+            return {"hard_violations": result["hard_violations"], "feasible": result["feasible"]}
+        return result
+    finally:
+        instrumentation.listeners.remove(forward)
+        if not was_enabled:
+            instrumentation.disable()
+            instrumentation.reset()
+        _progress.put((job_id, None))  # The job's progress is complete
+
+
+class SolverService:
+    def __init__(self, host="127.0.0.1", port=8765, unix_socket=None, workers=1, preload=()):
+        """
+        Long-running solver service. It accepts jobs over HTTP (TCP or a Unix socket), runs them on a
+        process pool whose workers keep the problem models resident, and streams the progress of each
+        job back as JSON lines.
+
+        Endpoints:
+        - POST /jobs with a JSON job (see run_job): streams {"event": "accepted"}, the progress events
+          and finally {"event": "result"} or {"event": "error"}, one JSON object per line;
+        - GET /health: state of the service and the instances it has loaded.
+
+        :param host: Host of the TCP server.
+        :param port: Port of the TCP server.
+        :param unix_socket: Path of a Unix socket to listen on instead of TCP.
+        :param workers: Number of pool processes.
+        :param preload: Instance paths loaded before the pool is forked, so that every worker has them.
+        """
+        self.host = host
+        self.port = port
+        self.unix_socket = unix_socket
+        self.workers = workers
+        self.preload = [os.path.abspath(path) for path in preload]
+        self.instances = set()
+        self.jobs = {}  # job id -> asyncio.Queue of progress records
+        self.job_ids = itertools.count(1)
+        self.completed = 0
+        self.server = None
+
+    async def start(self):
+        """Load the preloaded instances, start the process pool and open the server."""
+        self.loop = asyncio.get_running_loop()
+        for path in self.preload:
+            load_instance(path)
+            self.instances.add(path)
+        context = multiprocessing.get_context("fork")
+        self.progress = context.Queue()
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context, initializer=_init_worker,
+                                        initargs=(self.progress,))
+        self.pump = threading.Thread(target=self._pump_progress, daemon=True)
+        self.pump.start()
+        if self.unix_socket:
+            self.server = await asyncio.start_unix_server(self.handle, path=self.unix_socket)
+        else:
+            self.server = await asyncio.start_server(self.handle, self.host, self.port)
+            self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """Close the server and shut the process pool down."""
+        self.server.close()
+        await self.server.wait_closed()
+        self.pool.shutdown(cancel_futures=True)
+        self.progress.put(None)
+        if self.unix_socket and os.path.exists(self.unix_socket):
+            os.unlink(self.unix_socket)
+
+    async def serve_forever(self):
+        await self.start()
+        where = self.unix_socket or f"http://{self.host}:{self.port}"
+        print(f"Solver service listening on {where} with {self.workers} workers")
+        self.loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.stop()
+
+    def _pump_progress(self):
+        """Move progress records from the pool's queue to the queues of the jobs (runs in a thread)."""
+        while True:
+            item = self.progress.get()
+            if item is None:
+                return
+            self.loop.call_soon_threadsafe(self._dispatch, *item)
+
+    def _dispatch(self, job_id, record):
+        if job_id in self.jobs:
+            self.jobs[job_id].put_nowait(record)
+
+    async def handle(self, reader, writer):
+        """Serve one HTTP request."""
+        try:
+            request_line = (await reader.readline()).decode().split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode().strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if len(request_line) < 2:
+                return
+            method, path = request_line[0], request_line[1]
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+            if method == "GET" and path == "/health":
+                await self.respond(writer, 200, {"status": "ok", "workers": self.workers,
+                                                 "instances": sorted(self.instances),
+                                                 "running": len(self.jobs), "completed": self.completed})
+            elif method == "POST" and path == "/jobs":
+                try:
+                    job = json.loads(body)
+                    if not isinstance(job, dict):
+                        raise ValueError("a job must be a JSON object")
+                    if job.get("type") not in ("solve", "validate", "score") or "instance" not in job:
+                        raise ValueError("a job needs a type (solve, validate or score) and an instance")
+                    if job["type"] != "solve" and "timetable" not in job:
+                        raise ValueError(f"a {job['type']} job needs a timetable")
+                    job["instance"] = os.path.abspath(job["instance"])
+                except ValueError as e:
+                    await self.respond(writer, 400, {"event": "error", "error": str(e)})
+                    return
+                await self.stream_job(writer, job)
+            else:
+                await self.respond(writer, 404, {"error": f"no route for {method} {path}"})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, payload):
+        """Send a complete JSON response."""
+        body = json.dumps(payload).encode()
+        writer.write(f"HTTP/1.1 {status} {http.client.responses[status]}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+        await writer.drain()
+
+    async def stream_job(self, writer, job):
+        """Submit a job to the pool and stream its progress and result as chunked JSON lines."""
+        job_id = next(self.job_ids)
+        events = asyncio.Queue()
+        self.jobs[job_id] = events
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\n"
+                     b"Connection: close\r\n\r\n")
+
+        async def send(payload):
+            line = (json.dumps(payload) + "\n").encode()
+            writer.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+            await writer.drain()
+
+        start = time.perf_counter()
+        try:
+            await send({"event": "accepted", "job": job_id, "type": job["type"]})
+            future = self.loop.run_in_executor(self.pool, run_job, job_id, job)
+            # A worker that dies never reports the end of its progress
+            future.add_done_callback(lambda f: (f.cancelled() or f.exception()) and events.put_nowait(None))
+            while True:
+                record = await events.get()
+                if record is None:
+                    break
+                await send({"event": "progress", "job": job_id, **record})
+            try:
+                result = await future
+                self.instances.add(job["instance"])
+                await send({"event": "result", "job": job_id, "seconds": round(time.perf_counter() - start, 3),
+                            **result})
+            except Exception as e:
+                await send({"event": "error", "job": job_id, "error": f"{type(e).__name__}: {e}"})
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+        finally:
+            del self.jobs[job_id]
+            self.completed += 1
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+def submit(job, address="127.0.0.1:8765", timeout=None):
+    """
+    Submit a job to a solver service and yield its events (dictionaries) as they arrive.
+
+    :param job: The job (see run_job).
+    :param address: "host:port" of the service, or the path of its Unix socket.
+    """
+    if ":" in address and not os.path.exists(address):
+        host, port = address.rsplit(":", 1)
+        connection = http.client.HTTPConnection(host, int(port), timeout=timeout)
+    else:
+        connection = _UnixHTTPConnection(address, timeout=timeout)
+    try:
+        connection.request("POST", "/jobs", body=json.dumps(job), headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        while True:
+            line = response.readline()
+            if not line:
+                break
+            yield json.loads(line)
+    finally:
+        connection.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Timetabling solver service and client.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="run the service")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--unix-socket", default=None)
+    serve.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    serve.add_argument("--preload", nargs="*", default=[], help="instance files loaded at startup")
+    client = commands.add_parser("submit", help="submit a job and print its events")
+    client.add_argument("instance")
+    client.add_argument("--address", default="127.0.0.1:8765", help="host:port or Unix socket path")
+    client.add_argument("--type", default="solve", choices=("solve", "validate", "score"))
+    client.add_argument("--solver", default="annealing")
+    client.add_argument("--time-limit", type=float, default=10.0)
+    client.add_argument("--seed", type=int, default=0)
+    client.add_argument("--timetable", default=None, help=".out file checked by validate and score jobs")
+    client.add_argument("--output", default=None, help=".out file receiving the timetable of a solve job")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        service = SolverService(args.host, args.port, args.unix_socket, args.workers, args.preload)
+        try:
+            asyncio.run(service.serve_forever())
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            pass
+        return
+
+    job = {"type": args.type, "instance": os.path.abspath(args.instance)}
+    if args.type == "solve":
+        job.update(solver=args.solver, time_limit=args.time_limit, seed=args.seed)
+    else:
+        job["timetable"] = read_output_file(args.timetable)
+    for event in submit(job, args.address):
+        if event["event"] == "result" and event.get("timetable"):
+            timetable = event.pop("timetable")
+            if args.output:
+                generate_output_file([tuple(assignment) for assignment in timetable], args.output)
+        print(json.dumps(event))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import random
+import time
+from collections import deque
+
+from checkpoint import Checkpointer
+from instrumentation import count, event
+from LazySwap import LazySwap
+
+
+class TabuSearch:
+    def __init__(self, model, time_limit=60.0, tabu_size=40, sample_size=200, swap_probability=0.3, seed=None,
+                 log_interval=1.0, verbose=True, max_iterations=None, checkpoint=None, checkpoint_interval=60.0,
+                 resume=False):
+        """
+        Tabu search over the Lecture/Placement constraint model.
+
+        :param model: The problem model (ProblemModel) with its lectures created.
+        :param time_limit: Wall-clock budget in seconds.
+        :param tabu_size: Number of recently left placements that may not be re-entered.
+        :param sample_size: Number of neighbours sampled in each iteration.
+        :param swap_probability: Probability of sampling a swap instead of a move.
+        :param seed: Seed of the neighbourhood sampling.
+        :param log_interval: Seconds between two progress records.
+        :param verbose: Print the progress records.
+        :param max_iterations: Optional bound on the number of iterations; with a seed it makes a run reproducible.
+        :param checkpoint: Optional path of a checkpoint file the search state is saved to.
+        :param checkpoint_interval: Seconds between two checkpoints.
+        :param resume: Continue from the checkpoint file if it exists (the time limit and iteration bound
+                       cover the resumed run as a whole).
+        """
+        self.model = model
+        self.time_limit = time_limit
+        self.tabu_size = tabu_size
+        self.sample_size = sample_size
+        self.swap_probability = swap_probability
+        self.rng = random.Random(seed)
+        self.log_interval = log_interval
+        self.verbose = verbose
+        self.max_iterations = max_iterations
+        self.checkpointer = Checkpointer(checkpoint, checkpoint_interval, engine="tabu")
+        self.resume = resume
+
+        self.iteration = 0
+        self.tabu = deque()
+        self.tabu_set = set()
+        self.best_value = None
+        self.best_solution = None
+        self.history = []  # Progress records: elapsed time, current and best cost, moves evaluated per second
+
+    def load(self, solution):
+        """
+        Install a timetable into the model, replacing the current assignment.
+
+        :param solution: List of tuples (course_id, room_id, day, slot).
+        """
+        self.model.install_solution(solution, self.iteration)
+
+    def get_solution(self):
+        """Return the current assignment as a list of tuples (course_id, room_id, day, slot)."""
+        solution = []
+        for lecture in self.model.get_variables():
+            placement = lecture.get_assignment()
+            if placement is not None:
+                solution.append((lecture.get_course().get_id(), placement.get_room().get_id(),
+                                 placement.get_day(), placement.get_slot()))
+        return solution
+
+    def is_free(self, lecture, placement, ignore=None):
+        """
+        Check that the placement does not clash with the room, teacher or curricula of any other lecture
+        (besides the lecture ignore).
+        """
+        day, slot = placement.get_day(), placement.get_slot()
+        constraints = [placement.get_room().get_constraint(), lecture.get_course().get_teacher().get_constraint()]
+        constraints.extend(curricula.get_constraint() for curricula in lecture.get_course().get_curriculas())
+        for constraint in constraints:
+            other = constraint.get_placement(day, slot)
+            if other is not None and other.variable() is not lecture and other.variable() is not ignore:
+                return False
+        return True
+
+    def move_delta(self, lecture, placement):
+        """Return the change of the total penalty if the lecture is moved to the placement."""
+        return placement.to_int() - lecture.get_assignment().to_int()
+
+    def make_tabu(self, placement):
+        """Forbid re-entering a placement for the next tabu_size iterations."""
+        element = placement.tabu_element()
+        self.tabu.append(element)
+        self.tabu_set.add(element)
+        if len(self.tabu) > self.tabu_size:
+            old = self.tabu.popleft()
+            if old not in self.tabu:
+                self.tabu_set.discard(old)
+
+    def solve(self, solution=None):
+        """
+        Improve a feasible timetable until the time limit. In each iteration the best sampled
+        non-tabu neighbour is applied, even if it is worse; a tabu neighbour is allowed when it
+        leads to a new best timetable (aspiration).
+
+        :param solution: Optional starting timetable; otherwise the model's current assignment is used.
+        :return: The best timetable found as a list of tuples (course_id, room_id, day, slot).
+        """
+        saved = self.checkpointer.load() if self.resume else None
+        if saved is None:
+            if solution is not None:
+                self.load(solution)
+            self.best_value, self.best_solution = self.model.get_total_value(), self.get_solution()
+            evaluated, elapsed = 0, 0.0
+        else:
+            self.iteration = saved["iteration"]
+            self.load(saved["solution"])
+            self.rng.setstate(saved["rng"])
+            self.tabu = deque(saved["tabu"])
+            self.tabu_set = set(self.tabu)
+            self.best_value, self.best_solution = saved["best_value"], saved["best_solution"]
+            evaluated, elapsed = saved["evaluated"], saved["elapsed"]
+        lectures = [lecture for lecture in self.model.get_variables() if lecture.get_assignment() is not None]
+        value = self.model.get_total_value()
+
+        start = time.perf_counter() - elapsed
+        deadline = start + self.time_limit
+        last_log, logged_evaluated = time.perf_counter(), evaluated
+        while time.perf_counter() < deadline and (self.max_iterations is None or self.iteration < self.max_iterations):
+            self.iteration += 1
+            best_move, best_delta, ties = None, None, 0
+            for _ in range(self.sample_size):
+                lecture = self.rng.choice(lectures)
+                if self.rng.random() < self.swap_probability:
+                    swap = lecture.find_swap(self.rng.choice(lectures))
+                    if swap is None:
+                        continue
+                    delta = swap.value()
+                    move = swap
+                    targets = swap.assignments()
+                else:
+                    placement = self.rng.choice(lecture.values)
+                    if placement == lecture.get_assignment() or not self.is_free(lecture, placement):
+                        continue
+                    delta = self.move_delta(lecture, placement)
+                    move = (lecture, placement)
+                    targets = (placement,)
+                evaluated += 1
+
+                tabu = any(target.tabu_element() in self.tabu_set for target in targets)
+                if tabu and value + delta >= self.best_value:
+                    continue
+                if best_delta is None or delta < best_delta:
+                    best_move, best_delta, ties = move, delta, 1
+                elif delta == best_delta:
+                    ties += 1
+                    if self.rng.random() * ties < 1:
+                        best_move = move
+
+            if best_move is not None:
+                if isinstance(best_move, LazySwap):
+                    for lecture in best_move.variables():
+                        self.make_tabu(lecture.get_assignment())
+                    best_move.assign(self.iteration)
+                else:
+                    lecture, placement = best_move
+                    self.make_tabu(lecture.get_assignment())
+                    lecture.assign(self.iteration, placement)
+                value = self.model.get_total_value()
+                if value < self.best_value:
+                    self.best_value, self.best_solution = value, self.get_solution()
+
+            now = time.perf_counter()
+            if now - last_log >= self.log_interval:
+                self.log(now - start, value, (evaluated - logged_evaluated) / (now - last_log))
+                last_log, logged_evaluated = now, evaluated
+            if self.checkpointer.due():
+                self.checkpointer.save(self.checkpoint_state(now - start, evaluated))
+
+        self.checkpointer.save(self.checkpoint_state(time.perf_counter() - start, evaluated))
+        self.log(time.perf_counter() - start, value, evaluated / max(time.perf_counter() - start, 1e-9))
+        count("tabu.iterations", self.iteration)
+        count("tabu.evaluated_moves", evaluated)
+        return self.best_solution
+
+    def checkpoint_state(self, elapsed, evaluated):
+        """Return the state of the search saved in a checkpoint."""
+        return {"solution": self.get_solution(), "iteration": self.iteration, "rng": self.rng.getstate(),
+                "tabu": list(self.tabu), "best_value": self.best_value, "best_solution": self.best_solution,
+                "evaluated": evaluated, "elapsed": elapsed}
+
+    def log(self, elapsed, value, moves_per_second):
+        """Record (and print) a progress record."""
+        record = {"time": round(elapsed, 3), "iteration": self.iteration, "cost": value, "best": self.best_value,
+                  "moves_per_second": round(moves_per_second, 1)}
+        self.history.append(record)
+        event("tabu.progress", **record)
+        if self.verbose:
+            print(f"[{record['time']:8.2f}s] iteration {record['iteration']}: cost {value}, best {self.best_value}, "
+                  f"{record['moves_per_second']} moves/s")
@@ -10,7 +10,7 @@ class Teacher:
         self.teacher_id = teacher_id
         self.courses = []
         self.unavailability = []
-        self.constraint = self.TeacherConstraint(model)  # Pass model to TeacherConstraint
+        self.constraint = self.TeacherConstraint(model, self)  # Pass model to TeacherConstraint
         model.add_constraint(self.constraint)
 
     def add_course(self, course):
@@ -59,10 +59,11 @@ class Teacher:
         return self.constraint
 
     class TeacherConstraint:
-        def __init__(self, model):
+        def __init__(self, model, teacher):
             """Constructor for TeacherConstraint class."""
             super().__init__()  # Call the constructor of the parent (Constraint) class
             self.model = model  # Initialize model for TeacherConstraint
+            self.teacher = teacher
             self.placement = [[None for _ in range(self.model.nr_slots_per_day)] for _ in range(self.model.nr_days)]
             self.assigned_variables = None
             self.variables = []  # This will hold the lectures assigned to the teacher
@@ -108,8 +109,8 @@ class Teacher:
 
         def __str__(self):
             """String representation of the teacher constraint."""
-            return str(Teacher.this)
+            return str(self.teacher)
 
         def __hash__(self):
             """Return the hash code of the teacher constraint."""
-            return hash(Teacher.this)
+            return hash(self.teacher)
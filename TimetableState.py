@@ -0,0 +1,241 @@
+import numpy as np
+
+
+class TimetableState:
+    def __init__(self, instance, periods, rooms):
+        """
+        Timetable over a compiled instance with incrementally maintained occupancy indexes and
+        soft penalties, so that moves can be evaluated by their delta.
+
+        :param instance: The compiled instance (CompiledInstance).
+        :param periods: Period index of each lecture.
+        :param rooms: Room index of each lecture.
+        """
+        self.instance = instance
+        nr_courses, nr_periods, nr_rooms = instance.nr_courses, instance.nr_periods, instance.nr_rooms
+        self.slots = instance.nr_slots_per_day
+        self.course = instance.lecture_course.tolist()
+        self.min_days = instance.course_min_days.tolist()
+        self.neighbours = [n + [c] for c, n in enumerate(instance.course_conflicts)]  # Including the course itself
+        self.curricula = instance.course_curricula
+        self.available = instance.course_available.tolist()
+        self.overflow = np.maximum(instance.course_students[:, np.newaxis] - instance.room_capacity[np.newaxis, :],
+                                   0).tolist()
+
+        # Occupancy indexes
+        self.period = [-1] * instance.nr_lectures
+        self.room = [-1] * instance.nr_lectures
+        self.room_at = [[-1] * nr_rooms for _ in range(nr_periods)]  # Lecture in each (period, room)
+        self.period_lectures = [{} for _ in range(nr_periods)]  # Lectures of each period, in insertion order
+        self.blocking = [[0] * nr_periods for _ in range(nr_courses)]  # Own and conflicting lectures per period
+        self.day_count = [[0] * instance.nr_days for _ in range(nr_courses)]
+        self.nr_days = [0] * nr_courses
+        self.room_count = [[0] * nr_rooms for _ in range(nr_courses)]
+        self.nr_rooms = [0] * nr_courses
+        self.curricula_count = [[0] * nr_periods for _ in instance.curricula_courses]
+
+        # Room capacity, minimum working days, curriculum compactness, room stability
+        self.penalties = [0, 0, 0, 0]
+        self.penalties[1] = 5 * sum(self.min_days)
+        for lecture, (p, r) in enumerate(zip(np.asarray(periods).tolist(), np.asarray(rooms).tolist())):
+            if p >= 0:
+                self.add(lecture, p, r)
+
+    @property
+    def cost(self):
+        """Total soft penalty of the timetable."""
+        return sum(self.penalties)
+
+    def get_periods(self):
+        """Return the period index of each lecture as an array."""
+        return np.array(self.period, dtype=np.int64)
+
+    def get_rooms(self):
+        """Return the room index of each lecture as an array."""
+        return np.array(self.room, dtype=np.int64)
+
+    def to_solution(self):
+        """Return the timetable as a list of tuples (course_id, room_id, day, slot)."""
+        return self.instance.to_solution(self.period, self.room)
+
+    def snapshot(self):
+        """
+        Return the timetable as int16 arrays (periods, rooms, order), where order lists the lectures of
+        every period in the order they were placed: Kempe chains follow that order, so restoring it lets
+        a search continue exactly as it would have.
+        """
+        order = [lecture for lectures in self.period_lectures for lecture in lectures]
+        return (np.array(self.period, dtype=np.int16), np.array(self.room, dtype=np.int16),
+                np.array(order, dtype=np.int16))
+
+    @classmethod
+    def restore(cls, instance, snapshot):
+        """Rebuild a timetable state from a snapshot."""
+        periods, rooms, order = snapshot
+        state = cls(instance, periods, rooms)
+        state.period_lectures = [{} for _ in state.period_lectures]
+        for lecture in order.tolist():
+            state.period_lectures[state.period[lecture]][lecture] = None
+        return state
+
+    def can_place(self, lecture, period):
+        """Check that the lecture can be taught in the period without a conflict or unavailability."""
+        c = self.course[lecture]
+        own = 1 if self.period[lecture] == period else 0
+        return self.available[c][period] and self.blocking[c][period] == own
+
+    def compact_local(self, q, period):
+        """Compactness penalty of curriculum q in the period and its neighbours of the same day."""
+        count = self.curricula_count[q]
+        slot = period % self.slots
+        first = period - slot
+        penalty = 0
+        for t in range(max(slot - 1, 0), min(slot + 2, self.slots)):
+            p = first + t
+            if count[p] and not (t > 0 and count[p - 1]) and not (t + 1 < self.slots and count[p + 1]):
+                penalty += 2 * count[p]
+        return penalty
+
+    def add(self, lecture, period, room):
+        """Place an unscheduled lecture and return the change of the total penalty."""
+        c = self.course[lecture]
+        before = self.cost
+        self.period[lecture] = period
+        self.room[lecture] = room
+        self.room_at[period][room] = lecture
+        self.period_lectures[period][lecture] = None
+        for n in self.neighbours[c]:
+            self.blocking[n][period] += 1
+
+        self.penalties[0] += self.overflow[c][room]
+        day = period // self.slots
+        self.day_count[c][day] += 1
+        if self.day_count[c][day] == 1:
+            self.nr_days[c] += 1
+            if self.nr_days[c] <= self.min_days[c]:
+                self.penalties[1] -= 5
+        self.room_count[c][room] += 1
+        if self.room_count[c][room] == 1:
+            self.nr_rooms[c] += 1
+            if self.nr_rooms[c] > 1:
+                self.penalties[3] += 1
+        for q in self.curricula[c]:
+            local = self.compact_local(q, period)
+            self.curricula_count[q][period] += 1
+            self.penalties[2] += self.compact_local(q, period) - local
+        return self.cost - before
+
+    def remove(self, lecture):
+        """Unschedule a lecture and return the change of the total penalty."""
+        c = self.course[lecture]
+        period, room = self.period[lecture], self.room[lecture]
+        before = self.cost
+        self.period[lecture] = -1
+        self.room[lecture] = -1
+        if self.room_at[period][room] == lecture:
+            self.room_at[period][room] = -1
+        self.period_lectures[period].pop(lecture, None)
+        for n in self.neighbours[c]:
+            self.blocking[n][period] -= 1
+
+        self.penalties[0] -= self.overflow[c][room]
+        day = period // self.slots
+        self.day_count[c][day] -= 1
+        if self.day_count[c][day] == 0:
+            if self.nr_days[c] <= self.min_days[c]:
+                self.penalties[1] += 5
+            self.nr_days[c] -= 1
+        self.room_count[c][room] -= 1
+        if self.room_count[c][room] == 0:
+            if self.nr_rooms[c] > 1:
+                self.penalties[3] -= 1
+            self.nr_rooms[c] -= 1
+        for q in self.curricula[c]:
+            local = self.compact_local(q, period)
+            self.curricula_count[q][period] -= 1
+            self.penalties[2] += self.compact_local(q, period) - local
+        return self.cost - before
+
+    def apply(self, changes):
+        """
+        Reassign several lectures at once.
+
+        :param changes: List of (lecture, period, room).
+        :return: Tuple (delta, undo) with the change of the total penalty and the changes that revert it.
+        """
+        before = self.cost
+        undo = [(lecture, self.period[lecture], self.room[lecture]) for lecture, _, _ in changes]
+        for lecture, _, _ in changes:
+            self.remove(lecture)
+        for lecture, period, room in changes:
+            self.add(lecture, period, room)
+        return self.cost - before, undo
+
+    def free_room(self, lecture, period, preferred=-1):
+        """
+        Return a free room of the period for the lecture: the preferred room if it is free, otherwise
+        the smallest room that fits, otherwise the largest free room; -1 if the period is full.
+        """
+        room_at = self.room_at[period]
+        if preferred >= 0 and room_at[preferred] < 0:
+            return preferred
+        overflow = self.overflow[self.course[lecture]]
+        fallback = -1
+        for r in self.instance.rooms_by_capacity.tolist():
+            if room_at[r] < 0:
+                if overflow[r] == 0:
+                    return r
+                fallback = r
+        return fallback
+
+    def kempe_chain(self, lecture, other_period):
+        """
+        Compute the Kempe chain of a lecture between its period and another period: the connected
+        component of the lecture in the conflict graph induced by the lectures of both periods.
+
+        :return: Tuple (chain of the lecture's period, chain of the other period).
+        """
+        periods = (self.period[lecture], other_period)
+        by_course = ({}, {})
+        for side, p in enumerate(periods):
+            for other in self.period_lectures[p]:
+                by_course[side].setdefault(self.course[other], []).append(other)
+
+        chains = ([lecture], [])
+        seen = {lecture}
+        frontier = [(lecture, 0)]
+        while frontier:
+            current, side = frontier.pop()
+            for n in self.neighbours[self.course[current]]:
+                for other in by_course[1 - side].get(n, ()):
+                    if other not in seen:
+                        seen.add(other)
+                        chains[1 - side].append(other)
+                        frontier.append((other, 1 - side))
+        return chains
+
+    def kempe_changes(self, lecture, other_period):
+        """
+        Return the changes that swap the Kempe chain of the lecture between its period and the other
+        period, keeping rooms where possible; None if a lecture of the chain is unavailable in its new
+        period or a period runs out of rooms.
+        """
+        p1, p2 = self.period[lecture], other_period
+        chain1, chain2 = self.kempe_chain(lecture, other_period)
+        changes = []
+        for chain, leaving, target in ((chain1, chain2, p2), (chain2, chain1, p1)):
+            leaving = set(leaving)
+            taken = {self.room[other] for other in self.period_lectures[target] if other not in leaving}
+            for other in chain:
+                if not self.available[self.course[other]][target]:
+                    return None
+                room = self.room[other]
+                if room in taken:
+                    overflow = self.overflow[self.course[other]]
+                    free = [r for r in self.instance.rooms_by_capacity.tolist() if r not in taken]
+                    if not free:
+                        return None
+                    room = next((r for r in free if overflow[r] == 0), free[-1])
+                taken.add(room)
+                changes.append((other, target, room))
+        return changes
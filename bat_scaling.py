@@ -0,0 +1,46 @@
+import os
+import sys
+import time
+
+from Bat import BatAlgorithm
+from data_processing import DataProcessor
+from ProblemModel import ProblemModel
+
+
+def measure(model, workers, population_size=200, generations=10, seed=0):
+    """
+    Run the bat algorithm with the given number of evaluation processes.
+
+    :return: Tuple (generations per second, best fitness).
+    """
+    bat = BatAlgorithm(D=sum(course.get_nr_lectures() for course in model.get_courses()), NP=population_size,
+                       N_Gen=generations, A=0.9, r=0.5, Qmin=0.0, Qmax=2.0, Lower=0.0, Upper=1.0,
+                       function=None, seed=seed, workers=workers)
+    bat.open_pool(model)
+    try:
+        bat.init_bat(model)
+        start = time.perf_counter()
+        for _ in range(generations):
+            S = bat.generate_candidates()
+            bat.accept(S, bat.evaluate(S, model))
+        elapsed = time.perf_counter() - start
+    finally:
+        bat.close_pool()
+    return generations / elapsed, bat.f_min
+
+
+def main():
+    file_path = sys.argv[1] if len(sys.argv) > 1 else "./ConvertedFiles/comp07_converted.xlsx"
+    model = ProblemModel()
+    DataProcessor(file_path).initialize_model(model=model)
+
+    print(f"{'workers':>8} {'gen/s':>8} {'speedup':>8} {'best':>12}")
+    baseline = None
+    for workers in range(1, (os.cpu_count() or 1) + 1):
+        rate, best = measure(model, workers)
+        baseline = baseline or rate
+        print(f"{workers:>8} {rate:>8.2f} {rate / baseline:>8.2f} {best:>12.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,8 @@
+import multiprocessing
 import random
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
 def parse_dataset(content):
     data = {
@@ -11,7 +15,7 @@ def parse_dataset(content):
 
     for line in content:
         line = line.strip()
-        if not line:
+        if not line or line == "END.":
             continue
 
         # Detecting sections
@@ -19,10 +23,11 @@ def parse_dataset(content):
             section = line[:-1].lower()
             continue
 
-        # Parse general information
-        if section == "general":
-            key, value = line.split(":")
-            data["general"][key.strip().lower()] = int(value.strip())
+        # Parse general information (header lines before the first section)
+        if section is None or section == "general":
+            key, value = line.split(":", 1)
+            value = value.strip()
+            data["general"][key.strip().lower()] = int(value) if value.lstrip("-").isdigit() else value
 
         # Parse courses
         elif section == "courses":
@@ -37,14 +42,16 @@ def parse_dataset(content):
                 "teacher_id": teacher_id,
                 "lectures": lectures,
                 "min_days": min_days,
-                "unavailability": [],  # Placeholder for unavailability constraints
+                "students": students,
+                "unavailability": [],  # Filled from the UNAVAILABILITY_CONSTRAINTS section
             })
 
         # Parse rooms
         elif section == "rooms":
             parts = line.split()
             room_id = parts[0]
-            data["rooms"].append({"room_id": room_id})
+            capacity = int(parts[1]) if len(parts) > 1 else 0
+            data["rooms"].append({"room_id": room_id, "capacity": capacity})
 
         # Parse curricula
         elif section == "curricula":
@@ -58,27 +65,86 @@ def parse_dataset(content):
                 "courses": courses
             })
 
+        # Parse unavailability constraints as (day, period) pairs of the course
+        elif section == "unavailability_constraints":
+            course_id, day, period = line.split()
+            for course in data["courses"]:
+                if course["course_id"] == course_id:
+                    course["unavailability"].append((int(day), int(period)))
+                    break
+
     return data
 
 
-def game_theory_with_heuristic(parsed_data):
+def build_conflict_graph(parsed_data):
+    """
+    Build the course conflict graph of a parsed dataset.
+    Two courses conflict if they share a curriculum or are taught by the same teacher.
+
+    :param parsed_data: The dataset as returned by parse_dataset.
+    :return: Dictionary mapping each course id to the set of conflicting course ids.
+    """
+    conflicts = {course["course_id"]: set() for course in parsed_data["courses"]}
+
+    for curriculum in parsed_data["curricula"]:
+        curriculum_courses = curriculum["courses"]
+        for i, course1 in enumerate(curriculum_courses):
+            for course2 in curriculum_courses[i + 1:]:
+                if course1 != course2:
+                    conflicts.setdefault(course1, set()).add(course2)
+                    conflicts.setdefault(course2, set()).add(course1)
+
+    by_teacher = {}
+    for course in parsed_data["courses"]:
+        by_teacher.setdefault(course["teacher_id"], []).append(course["course_id"])
+    for courses in by_teacher.values():
+        for i, course1 in enumerate(courses):
+            for course2 in courses[i + 1:]:
+                conflicts[course1].add(course2)
+                conflicts[course2].add(course1)
+
+    return conflicts
+
+
+class IncompleteTimetableError(ValueError):
+    def __init__(self, message, solution):
+        """
+        Raised when the best-response heuristic stops before every lecture has a conflict-free placement.
+
+        :param message: Description of the reason.
+        :param solution: The timetable reached so far as tuples (course_id, room_id, day, slot); it may
+                         violate hard constraints and leave lectures out, and can be repaired with repair_solution.
+        """
+        super().__init__(message)
+        self.solution = solution
+
+
+def game_theory_with_heuristic(parsed_data, rng=None, max_iterations=50, deadline=None, stop_event=None,
+                               verbose=True):
+    """
+    Schedule all lectures with the best-response heuristic.
+
+    :param parsed_data: The dataset as returned by parse_dataset.
+    :param rng: Optional random.Random; when given, the lecture order is shuffled on every iteration.
+    :param max_iterations: Number of refinement passes before giving up.
+    :param deadline: Optional time.monotonic() value after which the search is abandoned.
+    :param stop_event: Optional event; the search is abandoned as soon as it is set.
+    :param verbose: Print progress for every iteration.
+    :return: List of tuples (course_id, room_id, day, slot).
+    :raises IncompleteTimetableError: If no conflict-free timetable was reached (a ValueError carrying the
+                                      timetable reached so far).
+    """
     # Extract data
     courses = parsed_data["courses"]
     rooms = parsed_data["rooms"]
-    curricula = parsed_data["curricula"]
 
     # Define periods
-    days = 5
-    periods_per_day = 6
+    days = parsed_data["general"]["days"]
+    periods_per_day = parsed_data["general"]["periods_per_day"]
     periods = [(d, p) for d in range(days) for p in range(periods_per_day)]
 
     # Build Conflict Graph
-    conflict_graph = set()
-    for curriculum in curricula:
-        curriculum_courses = curriculum["courses"]
-        for i, course1 in enumerate(curriculum_courses):
-            for course2 in curriculum_courses[i + 1:]:
-                conflict_graph.add((course1, course2))
+    conflict_graph = build_conflict_graph(parsed_data)
 
     # Map unavailability constraints
     unavailability_constraints = {}
@@ -100,13 +166,12 @@ def game_theory_with_heuristic(parsed_data):
     # Strategies for each lecture
     strategies = {lecture: None for lecture in lectures}
 
-    # Room tracker
-    room_tracker = {period: set() for period in periods}
-
-    # Helper: Calculate payoff for a lecture
-    def calculate_payoff(lecture_id, period, room):
-        course_id = lecture_to_course[lecture_id]
+    # Occupancy indexes: rooms used and courses taught in each period
+    room_tracker = {period: Counter() for period in periods}
+    period_courses = {period: Counter() for period in periods}
 
+    # Helper: Calculate the room independent part of the payoff for a lecture
+    def calculate_period_payoff(course_id, period):
         # Base payoff
         payoff = 10
 
@@ -115,78 +180,120 @@ def game_theory_with_heuristic(parsed_data):
             payoff -= 100
 
         # Penalize repeated periods for the same course
-        assigned_periods = {assignment[0] for other_lecture, assignment in strategies.items()
-                            if assignment is not None and lecture_to_course[other_lecture] == course_id}
-        if period in assigned_periods:
+        if period_courses[period][course_id]:
             payoff -= 50
 
+        # Penalize curriculum and teacher conflicts
+        assigned = period_courses[period]
+        for other_course_id in conflict_graph[course_id]:
+            payoff -= 100 * assigned[other_course_id]
+
+        return payoff
+
+    # Helper: Calculate payoff for a lecture
+    def calculate_payoff(lecture_id, period, room):
+        payoff = calculate_period_payoff(lecture_to_course[lecture_id], period)
+
         # Penalize room conflicts
-        if room["room_id"] in room_tracker[period]:
+        if room_tracker[period][room["room_id"]]:
             payoff -= 1000  # Large penalty for conflicting room assignment
 
-        # Penalize curriculum conflicts
-        for other_lecture, assignment in strategies.items():
-            if other_lecture == lecture_id or assignment is None:
-                continue
-            other_course_id = lecture_to_course[other_lecture]
-            other_period, _ = assignment
-            if other_period == period:
-                if (course_id, other_course_id) in conflict_graph or (other_course_id, course_id) in conflict_graph:
-                    payoff -= 100
-
         return payoff
 
-    # Assign a lecture dynamically
+    def place(lecture_id, assignment):
+        period, room = assignment
+        strategies[lecture_id] = assignment
+        room_tracker[period][room["room_id"]] += 1
+        period_courses[period][lecture_to_course[lecture_id]] += 1
+
+    def remove(lecture_id):
+        period, room = strategies[lecture_id]
+        strategies[lecture_id] = None
+        room_tracker[period][room["room_id"]] -= 1
+        period_courses[period][lecture_to_course[lecture_id]] -= 1
+
+    # Assign a lecture dynamically; with an rng, ties between best assignments are broken at random
     def assign_lecture(lecture_id):
         best_payoff = -float("inf")
-        best_assignment = None
+        best_assignments = []
+        course_id = lecture_to_course[lecture_id]
 
         for period in periods:
+            period_payoff = calculate_period_payoff(course_id, period)
+            if period_payoff < best_payoff or (rng is None and period_payoff == best_payoff):
+                continue  # No room in this period can beat the best assignment
             for room in rooms:
-                payoff = calculate_payoff(lecture_id, period, room)
+                payoff = period_payoff - 1000 if room_tracker[period][room["room_id"]] else period_payoff
                 if payoff > best_payoff:
                     best_payoff = payoff
-                    best_assignment = (period, room)
+                    best_assignments = [(period, room)]
+                elif payoff == best_payoff and rng is not None:
+                    best_assignments.append((period, room))
 
         # Apply the best assignment
-        if best_assignment:
-            period, room = best_assignment
-            strategies[lecture_id] = best_assignment
-            room_tracker[period].add(room["room_id"])
+        if best_assignments:
+            place(lecture_id, best_assignments[0] if rng is None else rng.choice(best_assignments))
         else:
             strategies[lecture_id] = None
 
-    # Iterative improvement with reassessment
-    for iteration in range(50):
-        print(f"Iteration {iteration + 1}: Refining timetable...")
+    # A lecture is conflicting if its current assignment violates any hard constraint
+    def is_conflicting(lecture_id):
+        assignment = strategies[lecture_id]
+        if assignment is None:
+            return True
+        remove(lecture_id)
+        payoff = calculate_payoff(lecture_id, *assignment)
+        place(lecture_id, assignment)
+        return payoff < 10
+
+    # The timetable reached so far, handed to the repair when the search stops early
+    def current_timetable():
+        timetable = []
+        for lecture_id, assignment in strategies.items():
+            if assignment is not None:
+                (day, slot), room = assignment
+                timetable.append((lecture_to_course[lecture_id], room["room_id"], day, slot))
+        return timetable
 
-        unassigned_lectures = []
+    # Iterative improvement with reassessment
+    order = list(lectures)
+    unassigned_lectures = list(lectures)  # Nothing is placed yet
+    for iteration in range(max_iterations):
+        if verbose:
+            print(f"Iteration {iteration + 1}: Refining timetable...")
+        if rng is not None:
+            rng.shuffle(order)
 
         # Reevaluate all lectures dynamically
-        for lecture_id in lectures:
-            current_assignment = strategies[lecture_id]
-            if current_assignment is not None:
+        for lecture_id in order:
+            if stop_event is not None and stop_event.is_set():
+                raise IncompleteTimetableError("Search stopped before the timetable was complete.",
+                                               current_timetable())
+            if deadline is not None and time.monotonic() > deadline:
+                raise IncompleteTimetableError("Time limit reached before the timetable was complete.",
+                                               current_timetable())
+
+            if strategies[lecture_id] is not None:
                 # Temporarily unassign the lecture
-                period, room = current_assignment
-                room_tracker[period].remove(room["room_id"])
-                strategies[lecture_id] = None
+                remove(lecture_id)
 
             # Reassign the lecture dynamically
             assign_lecture(lecture_id)
 
-            # Track unassigned lectures
-            if strategies[lecture_id] is None:
-                unassigned_lectures.append(lecture_id)
+        # Track lectures that are unassigned or still violate a hard constraint
+        unassigned_lectures = [lecture_id for lecture_id in lectures if is_conflicting(lecture_id)]
 
         # Progress Logging
         if not unassigned_lectures:
-            print("No unassigned lectures. Timetable finalized.")
+            if verbose:
+                print("No unassigned lectures. Timetable finalized.")
             break
-        else:
+        elif verbose:
             print(f"Unassigned lectures detected: {unassigned_lectures}")
     else:
         # Raise an error only after all iterations are exhausted
-        raise ValueError(f"Could not assign the following lectures after 50 iterations: {unassigned_lectures}")
+        raise IncompleteTimetableError(f"Could not assign the following lectures after {max_iterations} "
+                                       f"iterations: {unassigned_lectures}", current_timetable())
 
     # Build the solution
     solution = []
@@ -201,21 +308,160 @@ def game_theory_with_heuristic(parsed_data):
     return solution
 
 
+def compute_cost(solution, parsed_data):
+    """
+    Compute the ITC-2007 soft constraint penalties of a solution, as reported by the validator.
+
+    :param solution: List of tuples (course_id, room_id, day, slot).
+    :param parsed_data: The dataset as returned by parse_dataset.
+    :return: Dictionary with the penalty of each soft constraint.
+    """
+    courses = {course["course_id"]: course for course in parsed_data["courses"]}
+    capacity = {room["room_id"]: room["capacity"] for room in parsed_data["rooms"]}
+
+    room_capacity = 0
+    course_days = {course_id: set() for course_id in courses}
+    course_rooms = {course_id: set() for course_id in courses}
+    for course_id, room_id, day, slot in solution:
+        room_capacity += max(0, courses[course_id]["students"] - capacity[room_id])
+        course_days[course_id].add(day)
+        course_rooms[course_id].add(room_id)
+
+    # Each day below the minimum counts as 5 points, each extra room as 1 point
+    min_days = sum(5 * max(0, course["min_days"] - len(course_days[course_id]))
+                   for course_id, course in courses.items())
+    room_stability = sum(max(0, len(rooms) - 1) for rooms in course_rooms.values())
+
+    # Each lecture of a curriculum without an adjacent lecture of the same curriculum counts as 2 points
+    occupied = {course_id: set() for course_id in courses}
+    for course_id, room_id, day, slot in solution:
+        occupied[course_id].add((day, slot))
+    compactness = 0
+    for curriculum in parsed_data["curricula"]:
+        curriculum_periods = Counter()
+        for course_id in curriculum["courses"]:
+            curriculum_periods.update(occupied.get(course_id, ()))
+        for (day, slot), count in curriculum_periods.items():
+            if (day, slot - 1) not in curriculum_periods and (day, slot + 1) not in curriculum_periods:
+                compactness += 2 * count
+
+    return {
+        "RoomCapacity": room_capacity,
+        "MinimumWorkingDays": min_days,
+        "CurriculumCompactness": compactness,
+        "RoomStability": room_stability,
+    }
+
+
+_stop_event = None
+
+
+def _init_restart_worker(stop_event):
+    """Store the shared stop event in the worker process."""
+    global _stop_event
+    _stop_event = stop_event
+
+
+def _restart_worker(parsed_data, seed, deadline):
+    """
+    Run one randomized restart. Signals the other workers to stop once a complete timetable is found.
+
+    :return: Tuple (seed, solution, partial): solution is None if the restart did not complete, and
+             partial is then the timetable it reached (see IncompleteTimetableError).
+    """
+    try:
+        solution = game_theory_with_heuristic(parsed_data, rng=random.Random(seed), deadline=deadline,
+                                              stop_event=_stop_event, verbose=False)
+    except IncompleteTimetableError as e:
+        return seed, None, e.solution
+    _stop_event.set()
+    return seed, solution, None
+
+
+def multi_start_game_theory(parsed_data, restarts=8, time_limit=60.0, workers=None, seed=None, model=None):
+    """
+    Run randomized restarts of game_theory_with_heuristic in a process pool under a shared time limit.
+    As soon as one restart reaches a complete timetable the remaining ones are cancelled. With a model,
+    the result is post-processed by repair_solution: when no restart completes, the timetable of the
+    restart with the fewest hard violations is repaired instead of giving up.
+
+    :param parsed_data: The dataset as returned by parse_dataset.
+    :param restarts: Number of randomized lecture orderings to try.
+    :param time_limit: Wall-clock budget in seconds shared by all restarts.
+    :param workers: Number of worker processes (defaults to the number of CPUs).
+    :param seed: Seed from which the seed of each restart is derived.
+    :param model: Optional problem model (ProblemModel) of the same instance, needed for the repair.
+    :return: Tuple (solution, cost) of the best complete timetable by validator cost, or (None, None).
+    """
+    seeds = [random.Random(seed).getrandbits(32) + i for i in range(restarts)]
+    deadline = time.monotonic() + time_limit
+    stop_event = multiprocessing.Event()
+    best_solution, best_cost = None, None
+    partials = []
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_restart_worker,
+                             initargs=(stop_event,)) as executor:
+        pending = {executor.submit(_restart_worker, parsed_data, s, deadline) for s in seeds}
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                # Out of time: queued restarts are cancelled, the running ones notice the deadline themselves
+                stop_event.set()
+                for future in pending:
+                    future.cancel()
+                done, pending = wait(pending).done, set()
+            for future in done:
+                if future.cancelled():  # Cancelled before it started: no result
+                    continue
+                restart_seed, solution, partial = future.result()
+                if solution is None:
+                    partials.append(partial)
+                    continue
+                cost = sum(compute_cost(solution, parsed_data).values())
+                if best_cost is None or cost < best_cost:
+                    best_solution, best_cost = solution, cost
+            if stop_event.is_set():
+                for future in pending:
+                    future.cancel()
+
+    if model is not None:
+        from CompiledInstance import CompiledInstance
+        from MinConflictsRepair import repair_solution
+
+        if best_solution is not None:
+            best_solution = repair_solution(best_solution, model, seed=seed)
+            best_cost = sum(compute_cost(best_solution, parsed_data).values())
+        elif partials:
+            instance = CompiledInstance(model)
+            partial = min(partials, key=lambda timetable: sum(
+                instance.hard_violations(*instance.from_solution(timetable)).values()))
+            solution = repair_solution(partial, model, seed=seed, instance=instance)
+            if len(solution) == instance.nr_lectures:
+                best_solution, best_cost = solution, sum(compute_cost(solution, parsed_data).values())
+    return best_solution, best_cost
+
+
 def main():
+    from data_processing import DataProcessor
+    from ProblemModel import ProblemModel
+
     # Load dataset
     file_path = "./Input Files/comp01.ctt"  # Replace with your file path
     with open(file_path, "r") as file:
         dataset_content = file.readlines()
 
     parsed_data = parse_dataset(dataset_content)
+    model = ProblemModel()
+    DataProcessor(file_path).initialize_model(model=model)
 
-    # Solve timetabling problem
+    # Solve timetabling problem, repairing the result if no restart completes
     print("Starting timetabling...")
-    try:
-        solution = game_theory_with_heuristic(parsed_data)
-    except ValueError as e:
-        print(f"Error: {e}")
+    solution, cost = multi_start_game_theory(parsed_data, model=model)
+    if solution is None:
+        print("Error: no restart produced a complete timetable within the time limit.")
         return
+    print(f"Best complete timetable has cost {cost}")
 
     # Write solution to file
     output_file = "./Validator/solution.out"
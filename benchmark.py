@@ -0,0 +1,400 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+# Modules run as entry points, whose startup time is benchmarked
+ENTRY_POINTS = ["main", "test", "benchmark", "cli", "SolverService", "SolverPortfolio", "SimulatedAnnealing",
+                "TabuSearch", "MemeticAlgorithm", "RoomOptimizer", "DsaturSolver", "batpop"]
+
+# Heavy packages that should only be imported when they are used
+HEAVY_MODULES = ["pandas", "ortools", "openpyxl"]
+
+
+def _run_dsatur(model, time_limit, seed, file_path):
+    from DsaturSolver import DsaturSolver
+
+    solver = DsaturSolver(model, seed=seed, time_limit=time_limit)
+    solution = solver.solve()
+    return solution, solver.stats["seconds"] if solution else None
+
+
+def _run_annealing(model, time_limit, seed, file_path):
+    from DsaturSolver import DsaturSolver
+    from SimulatedAnnealing import SimulatedAnnealing
+
+    start = time.perf_counter()
+    solution = DsaturSolver(model, seed=seed, time_limit=time_limit).solve()
+    if solution is None:
+        return None, None
+    first_feasible = time.perf_counter() - start
+    solver = SimulatedAnnealing(model, time_limit=max(0.0, time_limit - first_feasible), seed=seed, verbose=False)
+    return solver.solve(solution), first_feasible
+
+
+def _run_tabu(model, time_limit, seed, file_path):
+    from DsaturSolver import DsaturSolver
+    from TabuSearch import TabuSearch
+
+    start = time.perf_counter()
+    solution = DsaturSolver(model, seed=seed, time_limit=time_limit).solve()
+    if solution is None:
+        return None, None
+    first_feasible = time.perf_counter() - start
+    solver = TabuSearch(model, time_limit=max(0.0, time_limit - first_feasible), seed=seed, verbose=False)
+    return solver.solve(solution), first_feasible
+
+
+def _run_memetic(model, time_limit, seed, file_path):
+    from MemeticAlgorithm import MemeticAlgorithm
+
+    solver = MemeticAlgorithm(model, time_limit=time_limit, seed=seed, verbose=False)
+    solution = solver.solve()
+    return solution, solver.history[0]["time"]
+
+
+def _run_portfolio(model, time_limit, seed, file_path):
+    from SolverPortfolio import SolverPortfolio
+
+    solver = SolverPortfolio(model, time_limit=time_limit, seed=seed, verbose=False)
+    solution = solver.run()
+    incumbents = solver.stats["incumbents"]
+    return solution, incumbents[0]["time"] if incumbents else None
+
+
+def _run_ip(model, time_limit, seed, file_path):
+    from integer_program import TimetableIP
+
+    start = time.perf_counter()
+    solution = TimetableIP(model, time_limit=time_limit, seed=seed).solve()
+    if solution == (None, None):
+        return None, None
+    return solution, time.perf_counter() - start
+
+
+def _run_gametheory(model, time_limit, seed, file_path):
+    from GameTheory import game_theory_timetabling
+
+    start = time.perf_counter()
+    solution = game_theory_timetabling(model, time_limit=time_limit, seed=seed)
+    return solution, time.perf_counter() - start
+
+
+def _run_batpop(model, time_limit, seed, file_path, cores=1):
+    from batpop import multi_start_game_theory, parse_dataset
+
+    if not str(file_path).endswith(".ctt"):
+        raise ValueError("batpop reads the ITC-2007 .ctt format only")
+    with open(file_path) as f:
+        parsed_data = parse_dataset(f.readlines())
+    start = time.perf_counter()
+    solution, _ = multi_start_game_theory(parsed_data, restarts=max(8, cores), time_limit=time_limit,
+                                          workers=cores, seed=seed, model=model)
+    return solution, time.perf_counter() - start if solution else None
+
+
+def _run_bat(model, time_limit, seed, file_path, cores=1, checkpoint=None, checkpoint_interval=60.0, resume=False):
+    """
+    Restart the bat algorithm with new seeds until the time limit, keeping the best repaired timetable.
+    With a checkpoint, the restart loop (next seed, best timetable and elapsed time) is saved between restarts.
+    """
+    from Bat import BatAlgorithm
+    from checkpoint import Checkpointer
+    from CompiledInstance import CompiledInstance
+    from Solution import Solution
+
+    instance = CompiledInstance(model)
+    checkpointer = Checkpointer(checkpoint, checkpoint_interval, engine="bat-restarts")
+    start = time.perf_counter()
+    best, best_cost, first_feasible = None, None, None
+    seed = seed or 0
+    saved = checkpointer.load() if resume else None
+    if saved is not None:
+        start -= saved["elapsed"]
+        seed, best_cost, first_feasible = saved["seed"], saved["best_cost"], saved["first_feasible"]
+        if saved["best"] is not None:
+            best = Solution(instance, *saved["best"]).to_tuples()
+    deadline = start + time_limit
+    while time.perf_counter() < deadline:
+        bat = BatAlgorithm(D=instance.nr_lectures, NP=40, N_Gen=20, A=0.9, r=0.5, Qmin=0.0, Qmax=2.0,
+                           Lower=0.0, Upper=1.0, function=None, seed=seed, workers=cores)
+        bat.move_bat(model)
+        solution = bat.get_solution(model, seed=seed,
+                                    time_limit=max(0.1, min(5.0, deadline - time.perf_counter())))
+        periods, rooms = instance.from_solution(solution)
+        if not (periods < 0).any() and not any(instance.hard_violations(periods, rooms).values()):
+            if first_feasible is None:
+                first_feasible = time.perf_counter() - start
+            cost = int(instance.soft_cost(periods, rooms)[0])
+            if best_cost is None or cost < best_cost:
+                best, best_cost = solution, cost
+        seed += 1
+        if checkpointer.due() or time.perf_counter() >= deadline:
+            checkpointer.save({"seed": seed, "best": Solution.from_tuples(instance, best).data if best else None,
+                               "best_cost": best_cost, "first_feasible": first_feasible,
+                               "elapsed": time.perf_counter() - start})
+    return best, first_feasible
+
+
+# Solvers that can be benchmarked: name -> runner(model, time_limit, seed, file_path) returning
+# (solution, seconds until the first feasible timetable or None)
+BENCHMARK_SOLVERS = {
+    "dsatur": _run_dsatur,
+    "annealing": _run_annealing,
+    "tabu": _run_tabu,
+    "memetic": _run_memetic,
+    "portfolio": _run_portfolio,
+    "ip": _run_ip,
+    "gametheory": _run_gametheory,
+    "batpop": _run_batpop,
+    "bat": _run_bat,
+}
+
+
+def run_job(file_path, solver, time_limit, seed, profile_dir=None):
+    """
+    Load an instance, build its model and run one solver on it, measuring every phase.
+
+    :param profile_dir: Optional directory receiving a cProfile and memory profile of every phase.
+    :return: Dictionary with the measurements of the run.
+    """
+    from CompiledInstance import CompiledInstance
+    from data_processing import DataProcessor
+    from ProblemModel import ProblemModel
+    from profiling import Profiler
+    from Solution import COMPONENTS, Solution
+
+    record = {"instance": os.path.splitext(os.path.basename(file_path))[0], "solver": solver,
+              "seed": seed, "time_limit": time_limit}
+    profiler = Profiler(profile_dir, f"{record['instance']}.{solver}")
+    start = time.perf_counter()
+    processor = DataProcessor(file_path)
+    with profiler.phase("load"):
+        processor.load_data()
+    record["load_seconds"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model = ProblemModel()
+    with profiler.phase("build"):
+        processor.initialize_model(model=model)
+        instance = CompiledInstance(model)
+    record["build_seconds"] = time.perf_counter() - start
+
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    try:
+        with profiler.phase("solve"):
+            solution, first_feasible = BENCHMARK_SOLVERS[solver](model, time_limit, seed, file_path)
+        record["error"] = None
+    except Exception as e:
+        solution, first_feasible = None, None
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["solve_seconds"] = time.perf_counter() - start
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    record["cpu_seconds"] = time.process_time() - cpu_start + children.ru_utime + children.ru_stime
+    record["first_feasible_seconds"] = first_feasible
+
+    record["feasible"], record["cost"] = False, None
+    record.update(dict.fromkeys(COMPONENTS))
+    if solution:
+        with profiler.phase("post-process"):
+            record.update(Solution.from_tuples(instance, solution).score())
+    # Peak resident set size of this job's process (kilobytes on Linux)
+    record["peak_memory_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return record
+
+
+def _job_process(file_path, solver, time_limit, seed, profile_dir, results):
+    """Run one benchmark job in a fresh process, so that its peak memory and CPU time are its own."""
+    import contextlib
+    import io
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        record = run_job(file_path, solver, time_limit, seed, profile_dir)
+    results.put(record)
+
+
+def run_benchmark(instances, solvers, time_limit, seed, output, timeout_margin=60.0, profile_dir=None):
+    """
+    Run every solver on every instance, one process per job, and write the records to a JSON file.
+
+    :param instances: Paths of the instance files.
+    :param solvers: Names of the solvers (keys of BENCHMARK_SOLVERS).
+    :param time_limit: Time budget of each run in seconds.
+    :param seed: Seed of each run.
+    :param output: Path of the results file.
+    :param timeout_margin: Seconds beyond the time limit after which a job is killed.
+    :param profile_dir: Optional directory receiving the per-phase profiles of every job (see profiling.py).
+    :return: List of records.
+    """
+    context = multiprocessing.get_context("spawn")
+    records = []
+    for file_path in instances:
+        for solver in solvers:
+            results = context.Queue()
+            process = context.Process(target=_job_process, args=(file_path, solver, time_limit, seed, profile_dir,
+                                                                   results))
+            process.start()
+            try:
+                record = results.get(timeout=time_limit + timeout_margin)
+            except Exception:
+                record = {"instance": os.path.splitext(os.path.basename(file_path))[0], "solver": solver,
+                          "seed": seed, "time_limit": time_limit, "feasible": False, "cost": None,
+                          "error": "timeout"}
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+            records.append(record)
+            print(f"{record['instance']:<8} {solver:<12} cost {str(record['cost']):>6} "
+                  f"solve {record.get('solve_seconds', 0):7.2f}s" + (f"  ({record['error']})" if record["error"] else ""))
+
+    with open(output, "w") as f:
+        json.dump({"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count(),
+                   "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "records": records}, f, indent=1)
+    print(f"Results saved to {output}")
+    return records
+
+
+def measure_startup(entry_point, repeats=5, instance=None):
+    """
+    Measure the startup time of an entry point: the wall-clock time of a fresh interpreter importing
+    its module (and optionally loading an instance), minus that of a bare interpreter.
+
+    :param entry_point: Name of the module.
+    :param repeats: Number of measurements; the median is reported.
+    :param instance: Optional instance file loaded into a model after the import.
+    :return: Dictionary with the median startup seconds and the heavy modules that were imported.
+    """
+    script = f"import {entry_point}\n"
+    if instance:
+        script += ("from data_processing import DataProcessor\nfrom ProblemModel import ProblemModel\n"
+                   f"DataProcessor({instance!r}).initialize_model(model=ProblemModel())\n")
+    script += f"import sys\nprint(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+
+    def run(code):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        return time.perf_counter() - start, result
+
+    baseline = statistics.median(run("pass")[0] for _ in range(repeats))
+    timings, heavy, error = [], "", None
+    for _ in range(repeats):
+        seconds, result = run(script)
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"
+            break
+        timings.append(seconds)
+        heavy = result.stdout.strip().splitlines()[-1] if result.stdout.strip() else ""
+    return {"entry_point": entry_point, "instance": instance, "error": error,
+            "seconds": statistics.median(timings) - baseline if timings else None,
+            "heavy_modules": heavy.split(",") if heavy else []}
+
+
+def compare(baseline_path, current_path, cost_tolerance=0.0, time_tolerance=0.2):
+    """
+    Compare two results files and flag regressions of the current run against the baseline:
+    lost feasibility, a higher cost (beyond cost_tolerance, relative) or slower load, build,
+    first-feasible or CPU times and higher peak memory (beyond time_tolerance, relative, and beyond
+    0.05 seconds or 1 MB).
+
+    :return: List of regression messages.
+    """
+    with open(baseline_path) as f:
+        baseline = {(r["instance"], r["solver"]): r for r in json.load(f)["records"]}
+    with open(current_path) as f:
+        current = {(r["instance"], r["solver"]): r for r in json.load(f)["records"]}
+
+    regressions = []
+    print(f"{'instance':<8} {'solver':<12} {'cost':>13} {'first feasible':>17} {'cpu':>15} {'memory MB':>13}")
+    for key in sorted(baseline.keys() & current.keys()):
+        old, new = baseline[key], current[key]
+        name = f"{key[0]} {key[1]}"
+        if old.get("feasible") and not new.get("feasible"):
+            regressions.append(f"{name}: no longer feasible")
+        elif old.get("cost") is not None and new.get("cost") is not None and \
+                new["cost"] > old["cost"] * (1 + cost_tolerance):
+            regressions.append(f"{name}: cost {old['cost']} -> {new['cost']}")
+        for metric, floor in (("load_seconds", 0.05), ("build_seconds", 0.05), ("first_feasible_seconds", 0.05),
+                              ("cpu_seconds", 0.05), ("peak_memory_kb", 1024)):
+            if old.get(metric) and new.get(metric) and new[metric] > old[metric] * (1 + time_tolerance) and \
+                    new[metric] - old[metric] > floor:  # Ignore noise on very short timings
+                regressions.append(f"{name}: {metric} {old[metric]:.3f} -> {new[metric]:.3f}")
+
+        def pair(metric, scale=1.0, fmt="{:.2f}"):
+            values = [r.get(metric) for r in (old, new)]
+            return " -> ".join("-" if v is None else fmt.format(v * scale) for v in values)
+
+        print(f"{key[0]:<8} {key[1]:<12} {pair('cost', fmt='{:.0f}'):>13} {pair('first_feasible_seconds'):>17} "
+              f"{pair('cpu_seconds'):>15} {pair('peak_memory_kb', 1 / 1024, '{:.0f}'):>13}")
+
+    for key in sorted(baseline.keys() - current.keys()):
+        regressions.append(f"{key[0]} {key[1]}: missing from {current_path}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the timetabling solvers on the ITC-2007 instances.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="run the benchmark")
+    run.add_argument("--solvers", default="dsatur,annealing",
+                     help=f"comma-separated solvers ({', '.join(BENCHMARK_SOLVERS)})")
+    run.add_argument("--instances", default=None, help="comma-separated instance names (default: all)")
+    run.add_argument("--directory", default="./Input Files", help="directory of the .ctt instance files")
+    run.add_argument("--time-limit", type=float, default=10.0)
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--output", default="benchmark_results.json")
+    run.add_argument("--profile", default=None, metavar="DIRECTORY",
+                     help="write per-phase cProfile, flamegraph and memory profiles of every job to DIRECTORY")
+    startup = commands.add_parser("startup", help="measure the startup time of the entry points")
+    startup.add_argument("--entry-points", default=",".join(ENTRY_POINTS), help="comma-separated module names")
+    startup.add_argument("--instance", default="./Input Files/comp01.ctt",
+                         help="instance loaded after the import (empty to only import)")
+    startup.add_argument("--repeats", type=int, default=5)
+    startup.add_argument("--output", default=None, help="optional JSON file receiving the measurements")
+    diff = commands.add_parser("compare", help="compare two results files")
+    diff.add_argument("baseline")
+    diff.add_argument("current")
+    diff.add_argument("--cost-tolerance", type=float, default=0.0)
+    diff.add_argument("--time-tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        solvers = args.solvers.split(",")
+        for solver in solvers:
+            if solver not in BENCHMARK_SOLVERS:
+                parser.error(f"unknown solver {solver}")
+        instances = sorted(glob.glob(os.path.join(args.directory, "comp*.ctt")))
+        if args.instances:
+            wanted = set(args.instances.split(","))
+            instances = [path for path in instances if os.path.splitext(os.path.basename(path))[0] in wanted]
+        run_benchmark(instances, solvers, args.time_limit, args.seed, args.output, profile_dir=args.profile)
+    elif args.command == "startup":
+        records = []
+        print(f"{'entry point':<20} {'startup s':>10}  heavy modules imported")
+        for entry_point in args.entry_points.split(","):
+            record = measure_startup(entry_point, args.repeats, args.instance or None)
+            records.append(record)
+            seconds = "-" if record["seconds"] is None else f"{record['seconds']:.3f}"
+            print(f"{entry_point:<20} {seconds:>10}  " + (record["error"] or ", ".join(record["heavy_modules"]) or "none"))
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump({"python": platform.python_version(), "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                           "records": records}, f, indent=1)
+    else:
+        regressions = compare(args.baseline, args.current, args.cost_tolerance, args.time_tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Checkpoints of long-running searches.
+
+A solver given a checkpoint path periodically saves its state (incumbent, population or swarm,
+random generator state, iteration and elapsed time) to that file and, when asked to resume, continues
+from it instead of starting over. The random generator continues from the state stored in the
+checkpoint, so the seed given to a resumed run is not used: a run bounded by iterations rather than
+time ends exactly where an uninterrupted one would. The remaining time budget is the time limit minus
+the elapsed time stored in the checkpoint.
+
+The state is pickled. Timetables are stored as int16 arrays, so the checkpoint of a local search
+takes a few kilobytes and that of a memetic population a few tens of kilobytes; a bat swarm keeps its
+float64 positions, velocities and frequencies (about 280 KB for 40 bats on comp07). The checkpoint is
+written to a temporary file that then replaces the previous one, so an interrupted write never leaves
+a truncated checkpoint behind.
+"""
+import os
+import pickle
+import time
+
+from instrumentation import count, timer
+
+CHECKPOINT_VERSION = 1
+
+
+class Checkpointer:
+    def __init__(self, path, interval=60.0, engine=None):
+        """
+        :param path: Path of the checkpoint file; None disables checkpointing.
+        :param interval: Minimum number of seconds between two checkpoints.
+        :param engine: Name of the solver, checked when the checkpoint is loaded.
+        """
+        self.path = path
+        self.interval = interval
+        self.engine = engine
+        self.last = time.perf_counter()
+        self.writes = 0
+        self.write_seconds = 0.0
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def due(self):
+        """Check whether the interval has passed since the last checkpoint."""
+        return self.enabled and time.perf_counter() - self.last >= self.interval
+
+    def save(self, state):
+        """Write the state (a dictionary) of the solver to the checkpoint file."""
+        if not self.enabled:
+            return
+        start = time.perf_counter()
+        with timer("checkpoint.write", engine=self.engine):
+            write_checkpoint(self.path, {"version": CHECKPOINT_VERSION, "engine": self.engine,
+                                         "saved": time.time(), "state": state})
+        self.last = time.perf_counter()
+        self.writes += 1
+        self.write_seconds += self.last - start
+        count("checkpoint.writes")
+
+    def load(self):
+        """
+        Read the state saved by the same solver.
+
+        :return: The state, or None if checkpointing is disabled or no checkpoint was written yet.
+        """
+        if not self.enabled or not os.path.exists(self.path):
+            return None
+        checkpoint = read_checkpoint(self.path)
+        if checkpoint.get("version") != CHECKPOINT_VERSION or checkpoint.get("engine") != self.engine:
+            raise ValueError(f"{self.path} is not a checkpoint of {self.engine} "
+                             f"(engine {checkpoint.get('engine')}, version {checkpoint.get('version')})")
+        self.last = time.perf_counter()
+        return checkpoint["state"]
+
+
+def write_checkpoint(path, checkpoint):
+    """Atomically replace the checkpoint file with the pickled checkpoint."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def read_checkpoint(path):
+    """Read a checkpoint file written by write_checkpoint."""
+    with open(path, "rb") as f:
+        return pickle.load(f)
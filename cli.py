@@ -0,0 +1,287 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+
+from benchmark import BENCHMARK_SOLVERS
+from timetable_io import generate_output_file
+
+
+def _run_ip(file_path, model, time_limit, seed, cores, checkpoint=None, checkpoint_interval=60.0, resume=False):
+    from integer_program import TimetableIP
+
+    solution = TimetableIP(model, time_limit=time_limit, num_workers=cores, checkpoint=checkpoint,
+                           checkpoint_interval=checkpoint_interval, resume=resume, seed=seed).solve()
+    return None if solution == (None, None) else solution
+
+
+def _run_gametheory(file_path, model, time_limit, seed, cores, checkpoint=None, checkpoint_interval=60.0, resume=False):
+    from GameTheory import game_theory_timetabling
+
+    return game_theory_timetabling(model, checkpoint=checkpoint, checkpoint_interval=checkpoint_interval,
+                                   resume=resume, time_limit=time_limit, seed=seed)
+
+
+def _run_batpop(file_path, model, time_limit, seed, cores):
+    return BENCHMARK_SOLVERS["batpop"](model, time_limit, seed, file_path, cores=cores)[0]
+
+
+def _run_bat(file_path, model, time_limit, seed, cores, checkpoint=None, checkpoint_interval=60.0, resume=False):
+    return BENCHMARK_SOLVERS["bat"](model, time_limit, seed, file_path, cores=cores, checkpoint=checkpoint,
+                                    checkpoint_interval=checkpoint_interval, resume=resume)[0]
+
+
+def _run_portfolio(file_path, model, time_limit, seed, cores, checkpoint=None, checkpoint_interval=60.0, resume=False):
+    from SolverPortfolio import SolverPortfolio
+
+    # DSatur finishes within a second; every other member keeps one core busy
+    members = ("dsatur", "annealing", "tabu", "memetic")[:max(2, cores + 1)]
+    return SolverPortfolio(model, solvers=members, time_limit=time_limit, seed=seed, verbose=False,
+                           checkpoint=checkpoint, checkpoint_interval=checkpoint_interval, resume=resume).run()
+
+
+def _run_heuristic(name):
+    def run(file_path, model, time_limit, seed, cores):
+        return BENCHMARK_SOLVERS[name](model, time_limit, seed, file_path)[0]
+
+    return run
+
+
+def _run_annealing(file_path, model, time_limit, seed, cores, checkpoint=None, checkpoint_interval=60.0, resume=False):
+    from SimulatedAnnealing import SimulatedAnnealing
+
+    return SimulatedAnnealing(model, time_limit=time_limit, seed=seed, verbose=False, checkpoint=checkpoint,
+                              checkpoint_interval=checkpoint_interval, resume=resume).solve()
+
+
+def _run_tabu(file_path, model, time_limit, seed, cores, checkpoint=None, checkpoint_interval=60.0, resume=False):
+    from DsaturSolver import DsaturSolver
+    from TabuSearch import TabuSearch
+
+    solution = None
+    if not (resume and checkpoint and os.path.exists(checkpoint)):
+        solution = DsaturSolver(model, seed=seed).solve()
+        if solution is None:
+            return None
+    return TabuSearch(model, time_limit=time_limit, seed=seed, verbose=False, checkpoint=checkpoint,
+                      checkpoint_interval=checkpoint_interval, resume=resume).solve(solution)
+
+
+def _run_memetic(file_path, model, time_limit, seed, cores, checkpoint=None, checkpoint_interval=60.0, resume=False):
+    from MemeticAlgorithm import MemeticAlgorithm
+
+    return MemeticAlgorithm(model, time_limit=time_limit, seed=seed, workers=cores, verbose=False,
+                            checkpoint=checkpoint, checkpoint_interval=checkpoint_interval, resume=resume).solve()
+
+
+# Solvers of the command line: name -> (runner(file_path, model, time_limit, seed, cores), default cores per job)
+CLI_SOLVERS = {
+    "ip": (_run_ip, 8),
+    "gametheory": (_run_gametheory, 1),
+    "batpop": (_run_batpop, 4),
+    "bat": (_run_bat, 1),
+    "portfolio": (_run_portfolio, 3),
+    "dsatur": (_run_heuristic("dsatur"), 1),
+    "annealing": (_run_annealing, 1),
+    "tabu": (_run_tabu, 1),
+    "memetic": (_run_memetic, 1),
+}
+
+# Solvers whose runners take checkpoint, checkpoint_interval and resume arguments (batpop stops at its first
+# complete timetable, so it has no long search to resume)
+CHECKPOINT_SOLVERS = ("portfolio", "ip", "gametheory", "annealing", "tabu", "memetic", "bat")
+
+
+def find_instances(paths):
+    """
+    Expand the given files and directories into a sorted list of instance files (.ctt and .xlsx).
+    """
+    instances = []
+    for path in paths:
+        if os.path.isdir(path):
+            instances += sorted(glob.glob(os.path.join(path, "*.ctt")) + glob.glob(os.path.join(path, "*.xlsx")))
+        elif os.path.isfile(path):
+            instances.append(path)
+        else:
+            raise FileNotFoundError(f"No such instance file or directory: {path}")
+    return instances
+
+
+def solve_job(file_path, solver, time_limit, seed, cores, output_dir, checkpoint_dir=None, checkpoint_interval=60.0,
+              resume=False):
+    """
+    Solve one instance with one solver, write the timetable to <output_dir>/<instance>.<solver>.out
+    and score it.
+
+    :param checkpoint_dir: Optional directory of the checkpoints <instance>.<solver>.ckpt of the solvers
+                           in CHECKPOINT_SOLVERS.
+    :param checkpoint_interval: Seconds between two checkpoints.
+    :param resume: Continue from the checkpoint of the job if it exists.
+    :return: Dictionary with the result of the job.
+    """
+    from CompiledInstance import CompiledInstance
+    from data_processing import DataProcessor
+    from ProblemModel import ProblemModel
+    from Solution import Solution
+
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    record = {"instance": name, "solver": solver, "seed": seed, "time_limit": time_limit, "cores": cores,
+              "output": None, "feasible": False, "cost": None, "error": None}
+    start = time.perf_counter()
+    try:
+        model = ProblemModel()
+        DataProcessor(file_path).initialize_model(model=model)
+        options = {}
+        if checkpoint_dir and solver in CHECKPOINT_SOLVERS:
+            options = {"checkpoint": os.path.join(checkpoint_dir, f"{name}.{solver}.ckpt"),
+                       "checkpoint_interval": checkpoint_interval, "resume": resume}
+        solution = CLI_SOLVERS[solver][0](file_path, model, time_limit, seed, cores, **options)
+    except Exception as e:
+        solution = None
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["seconds"] = round(time.perf_counter() - start, 3)
+
+    if solution:
+        record.update(Solution.from_tuples(CompiledInstance(model), solution).score())
+        record["output"] = os.path.join(output_dir, f"{name}.{solver}.out")
+        generate_output_file(solution, record["output"])
+    elif record["error"] is None:
+        record["error"] = "no timetable found"
+    return record
+
+
+def _job_process(index, file_path, solver, time_limit, seed, cores, output_dir, results, checkpoint):
+    """Run one job in its own process, sending the solvers' output (including native logs) to a log file."""
+    log_path = os.path.join(output_dir, f"{os.path.splitext(os.path.basename(file_path))[0]}.{solver}.log")
+    log = os.open(log_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    sys.stdout.flush()
+    os.dup2(log, 1)
+    os.dup2(log, 2)
+    try:
+        record = solve_job(file_path, solver, time_limit, seed, cores, output_dir, *checkpoint)
+    except Exception as e:
+        record = {"instance": os.path.splitext(os.path.basename(file_path))[0], "solver": solver,
+                  "feasible": False, "cost": None, "error": f"{type(e).__name__}: {e}"}
+    sys.stdout.flush()
+    results.put((index, record))
+
+
+def run_jobs(jobs, output_dir, total_cores=None, timeout_margin=60.0, verbose=True, checkpoint_dir=None,
+             checkpoint_interval=60.0, resume=False):
+    """
+    Run jobs in separate processes without oversubscribing the machine: a job starts only when its
+    cores are free (a job needing more cores than are free waits; smaller jobs behind it may start
+    first), and every job is told how many cores it may use.
+
+    :param jobs: List of tuples (file_path, solver, time_limit, seed, cores).
+    :param output_dir: Directory receiving the timetables and logs.
+    :param total_cores: Number of cores to use (defaults to the number of CPUs).
+    :param timeout_margin: Seconds beyond its time limit after which a job is killed.
+    :param checkpoint_dir: Optional directory of the checkpoints of the jobs (see solve_job).
+    :param checkpoint_interval: Seconds between two checkpoints of a job.
+    :param resume: Continue every job from its checkpoint if it exists.
+    :return: List of records, in the order of the jobs.
+    """
+    context = multiprocessing.get_context("spawn")
+    total_cores = total_cores or os.cpu_count() or 1
+    results = context.Queue()
+    pending = list(enumerate(jobs))
+    running = {}  # index -> (process, cores, started)
+    records = [None] * len(jobs)
+
+    def finish(index, record):
+        process, _, _ = running.pop(index)
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+        records[index] = record
+        if verbose:
+            cost = "-" if record.get("cost") is None else record["cost"]
+            print(f"{record['instance']:<12} {record['solver']:<11} cost {cost:>6} "
+                  f"{record.get('seconds', 0):8.2f}s" + (f"  ({record['error']})" if record.get("error") else ""))
+
+    while pending or running:
+        free = total_cores - sum(cores for _, cores, _ in running.values())
+        for item in list(pending):
+            index, (file_path, solver, time_limit, seed, cores) = item
+            cores = min(cores, total_cores)
+            if cores > free and running:
+                continue
+            process = context.Process(target=_job_process,
+                                      args=(index, file_path, solver, time_limit, seed, cores, output_dir, results,
+                                            (checkpoint_dir, checkpoint_interval, resume)))
+            process.start()
+            running[index] = (process, cores, time.perf_counter())
+            pending.remove(item)
+            free -= cores
+
+        try:
+            finish(*results.get(timeout=0.2))
+        except queue.Empty:
+            pass
+
+        now = time.perf_counter()
+        for index, (process, cores, started) in list(running.items()):
+            file_path, solver, time_limit = jobs[index][:3]
+            if not process.is_alive() and process.exitcode != 0 or now - started > time_limit + timeout_margin:
+                error = "timeout" if process.is_alive() else f"exit code {process.exitcode}"
+                finish(index, {"instance": os.path.splitext(os.path.basename(file_path))[0], "solver": solver,
+                               "feasible": False, "cost": None, "seconds": round(now - started, 3), "error": error})
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Solve ITC-2007 curriculum-based timetabling instances.",
+        epilog="Example: python cli.py \"Input Files\" --solver annealing --time-limit 60 --output-dir results")
+    parser.add_argument("instances", nargs="+", help="instance files (.ctt or .xlsx) or directories of instances")
+    parser.add_argument("--solver", default="portfolio",
+                        help=f"comma-separated solvers ({', '.join(CLI_SOLVERS)}); default: portfolio")
+    parser.add_argument("--time-limit", type=float, default=60.0, help="time budget of every job in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output-dir", default="./Validator", help="directory of the .out files and summary")
+    parser.add_argument("--cores", type=int, default=None, help="cores shared by all jobs (default: all CPUs)")
+    parser.add_argument("--cores-per-job", type=int, default=None,
+                        help="cores given to each job (default: depends on the solver, e.g. 8 for ip)")
+    parser.add_argument("--checkpoint-dir", default=None,
+                        help=f"save the search state periodically to this directory ({', '.join(CHECKPOINT_SOLVERS)})")
+    parser.add_argument("--checkpoint-interval", type=float, default=60.0, help="seconds between two checkpoints")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue the jobs from their checkpoints in --checkpoint-dir")
+    args = parser.parse_args()
+
+    solvers = args.solver.split(",")
+    for solver in solvers:
+        if solver not in CLI_SOLVERS:
+            parser.error(f"unknown solver {solver}")
+    try:
+        instances = find_instances(args.instances)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    if not instances:
+        parser.error("no instances found")
+    if args.resume and not args.checkpoint_dir:
+        parser.error("--resume needs --checkpoint-dir")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    jobs = [(path, solver, args.time_limit, args.seed, args.cores_per_job or CLI_SOLVERS[solver][1])
+            for path in instances for solver in solvers]
+    start = time.perf_counter()
+    records = run_jobs(jobs, args.output_dir, args.cores, checkpoint_dir=args.checkpoint_dir,
+                       checkpoint_interval=args.checkpoint_interval, resume=args.resume)
+
+    summary = os.path.join(args.output_dir, "results.json")
+    with open(summary, "w") as f:
+        json.dump({"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "seconds": round(time.perf_counter() - start, 3),
+                   "records": records}, f, indent=1)
+    feasible = sum(1 for record in records if record.get("feasible"))
+    print(f"{feasible}/{len(records)} feasible timetables; summary saved to {summary}")
+
+
+if __name__ == "__main__":
+    main()
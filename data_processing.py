@@ -1,8 +1,14 @@
-import pandas as pd
 from Course import Course
 from Room import Room
 from Curricula import Curricula
 from Teacher import Teacher
+from instrumentation import timer
+
+
+def _present(value):
+    """Return True if a cell holds a value (it is neither missing nor an empty Excel cell, NaN)."""
+    return value is not None and value == value
+
 
 class DataProcessor:
     def __init__(self, file_path):
@@ -10,22 +16,68 @@ class DataProcessor:
 
     def load_data(self):
         """
-        Load data from the Excel file for the specified instance.
+        Load data from the Excel file (or the ITC-2007 .ctt file) for the specified instance.
+        Every sheet is stored as a list of rows (dictionaries keyed by the column names).
+        """
+        with timer("load", file=str(self.file_path)):
+            if str(self.file_path).endswith(".ctt"):
+                self.load_ctt()
+            else:
+                self.load_excel()
+
+    def load_excel(self):
+        """
+        Load data from the sheets of the Excel file.
         """
+        import pandas as pd  # Only needed for Excel files, and slow to import
+
+        def read(sheet_name):
+            return pd.read_excel(self.file_path, sheet_name=sheet_name).to_dict("records")
+
         try:
-            self.metadata_df = pd.read_excel(self.file_path, sheet_name='Metadata')
-            self.courses_df = pd.read_excel(self.file_path, sheet_name='Courses')
-            self.rooms_df = pd.read_excel(self.file_path, sheet_name='Rooms')
-            self.curricula_df = pd.read_excel(self.file_path, sheet_name='Curricula')
-            self.unavailability_df = pd.read_excel(self.file_path, sheet_name='Unavailability_constraints')
+            self.metadata_rows = read('Metadata')
+            self.course_rows = read('Courses')
+            self.room_rows = read('Rooms')
+            self.curricula_rows = read('Curricula')
+            self.unavailability_rows = read('Unavailability_constraints')
         except Exception as e:
             print(f"Error loading data from {self.file_path}: {e}")
             raise
 
+    def load_ctt(self):
+        """
+        Load data from an ITC-2007 .ctt file into the same rows as the Excel sheets.
+        """
+        metadata, sections = [], {}
+        section = None
+        with open(self.file_path) as file:
+            for line in file:
+                line = line.strip()
+                if not line or line == "END.":
+                    continue
+                if line.endswith(":") and line[:-1].isupper():
+                    section = line[:-1]
+                    sections[section] = []
+                elif section is None:
+                    parameter, value = line.split(":", 1)
+                    metadata.append({"Parameter": parameter.strip(), "Value": value.strip()})
+                else:
+                    sections[section].append(line.split())
+
+        self.metadata_rows = metadata
+        self.course_rows = [{"CourseID": c, "Teacher": t, "# Lectures": int(n), "MinWorkingDays": int(d),
+                             "# Students": int(s)} for c, t, n, d, s in sections.get("COURSES", [])]
+        self.room_rows = [{"RoomID": r, "Capacity": int(c)} for r, c in sections.get("ROOMS", [])]
+        self.curricula_rows = [{"CurriculumID": q, "# Courses": int(n),
+                                **{f"Course_{i + 1}": c for i, c in enumerate(courses)}}
+                               for q, n, *courses in sections.get("CURRICULA", [])]
+        self.unavailability_rows = [{"CourseID": c, "Day": int(d), "Period_Per_Day": int(s)}
+                                    for c, d, s in sections.get("UNAVAILABILITY_CONSTRAINTS", [])]
+
     def process_courses(self, model):
         courses = {}
 
-        for _, row in self.courses_df.iterrows():
+        for row in self.course_rows:
             course_id = row["CourseID"]
             teacher_id = row["Teacher"]
             num_lectures = row["# Lectures"]
@@ -45,16 +97,15 @@ class DataProcessor:
                 nr_students=num_students
             )
             
-            # Assign the course to the teacher
+            # Assign the course to the teacher; lectures are created once all sheets are processed
             teacher.add_course(course)
-            course.init()
             model.courses.append(course)
 
     def process_rooms(self, model):
         """
         Process and return rooms. Populates the rooms in the model.
         """
-        for _, row in self.rooms_df.iterrows():
+        for row in self.room_rows:
             room_id = row["RoomID"]
             capacity = row["Capacity"]
 
@@ -67,14 +118,14 @@ class DataProcessor:
         Process and return curricula with their associated courses.
         Populates the curricula in the model.
         """
-        for _, row in self.curricula_df.iterrows():
+        for row in self.curricula_rows:
             curriculum_id = row["CurriculumID"]
             curriculum = Curricula(curricula_id=curriculum_id, model=model)
 
             # Add courses to the curriculum and populate model
             for i in range(1, int(row["# Courses"]) + 1):
                 course_id = row.get(f"Course_{i}")
-                if pd.notna(course_id):
+                if _present(course_id):
                     course = model.get_course(course_id)
                     if course is not None:
                         curriculum.add_course(course)
@@ -85,7 +136,7 @@ class DataProcessor:
         """
         Process the unavailability constraints and assign them to the respective teachers.
         """
-        for _, row in self.unavailability_df.iterrows():
+        for row in self.unavailability_rows:
             course_id = row["CourseID"]
             day = row["Day"]
             slot = row["Period_Per_Day"]
@@ -100,22 +151,30 @@ class DataProcessor:
         """
         Load and process data from the Excel file, returning structured data objects.
         """
-        # Step 1: Load data
-        self.load_data()
+        # Step 1: Load data (unless it was loaded already)
+        if not hasattr(self, "metadata_rows"):
+            self.load_data()
 
         # Step 2: Extract metadata values
-        num_days = int(self.metadata_df.loc[self.metadata_df['Parameter'] == 'Days', 'Value'].values[0])
-        periods_per_day = int(self.metadata_df.loc[self.metadata_df['Parameter'] == 'Periods_per_day', 'Value'].values[0])
+        metadata = {row['Parameter']: row['Value'] for row in self.metadata_rows}
+        num_days = int(metadata['Days'])
+        periods_per_day = int(metadata['Periods_per_day'])
 
         # Step 3: Set the model metadata
         model.set_nr_days(num_days)
         model.set_nr_slots_per_day(periods_per_day)
 
         # Step 4: Process each sheet and populate the model
-        self.process_courses(model)
-        self.process_rooms(model)
-        self.process_curricula(model)
-        self.process_unavailability(model)
-
-        # Step 5: Return processed data as part of the model
+        with timer("build.entities"):
+            self.process_rooms(model)
+            self.process_courses(model)
+            self.process_curricula(model)
+            self.process_unavailability(model)
+
+        # Step 5: Create the lectures, now that their rooms, curricula and availability are known
+        with timer("build.lectures"):
+            for course in model.courses:
+                course.init()
+
+        # Step 6: Return processed data as part of the model
         return model
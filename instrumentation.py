@@ -0,0 +1,128 @@
+"""
+Lightweight timers, counters and events for the solvers.
+
+Instrumentation is disabled by default; a disabled timer is a shared no-op context manager and
+disabled counters and events return immediately, so instrumented code costs almost nothing.
+Enable it with enable() or by setting the TIMETABLE_TRACE environment variable to the path of a
+JSON-lines file (or to "-" to keep the records in memory only).
+"""
+import contextlib
+import json
+import os
+import time
+
+_NULL_TIMER = contextlib.nullcontext()
+
+
+class Instrumentation:
+    def __init__(self):
+        """Collector of timer, counter and event records."""
+        self.enabled = False
+        self.echo = False
+        self.start = time.perf_counter()
+        self.records = []
+        self.timers = {}  # name -> [calls, total seconds, max seconds]
+        self.counters = {}
+        self.file = None
+        self.listeners = []  # Callables receiving every record, e.g. to stream progress
+
+    def enable(self, path=None, echo=False):
+        """
+        Start recording.
+
+        :param path: Optional JSON-lines file to which every record is appended as it is made.
+        :param echo: Print every timer and event record.
+        """
+        self.enabled = True
+        self.echo = echo
+        self.start = time.perf_counter()
+        if path and path != "-":
+            self.file = open(path, "a")
+
+    def disable(self):
+        """Stop recording and close the JSON-lines file."""
+        self.enabled = False
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def reset(self):
+        """Forget all records, timers and counters."""
+        self.records = []
+        self.timers = {}
+        self.counters = {}
+
+    def record(self, record):
+        """Store a record (and write and print it)."""
+        record["time"] = round(time.perf_counter() - self.start, 6)
+        self.records.append(record)
+        if self.file is not None:
+            self.file.write(json.dumps(record) + "\n")
+            self.file.flush()
+        for listener in self.listeners:
+            listener(record)
+        if self.echo:
+            details = " ".join(f"{k}={v}" for k, v in record.items() if k not in ("type", "name", "time"))
+            print(f"[{record['time']:9.3f}s] {record['name']} {details}")
+
+    def timer(self, name, **fields):
+        """Return a context manager that records the wall-clock time of the enclosed phase."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, fields)
+
+    def count(self, name, value=1):
+        """Add a value to a counter."""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def event(self, name, **fields):
+        """Record an event, e.g. one iteration of a heuristic with its current state."""
+        if self.enabled:
+            self.record({"type": "event", "name": name, **fields})
+
+    def flush_counters(self):
+        """Record the current value of every counter."""
+        for name, value in self.counters.items():
+            self.record({"type": "counter", "name": name, "value": value})
+
+    def summary(self):
+        """Return a table with the calls and times of every timer and the value of every counter."""
+        lines = [f"{'phase':<40} {'calls':>7} {'total s':>10} {'mean ms':>10} {'max ms':>10}"]
+        for name, (calls, total, longest) in sorted(self.timers.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<40} {calls:>7} {total:>10.3f} {1000 * total / calls:>10.2f} {1000 * longest:>10.2f}")
+        if self.counters:
+            lines.append(f"{'counter':<40} {'value':>7}")
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"{name:<40} {value:>7}")
+        return "\n".join(lines)
+
+
+class _Timer:
+    def __init__(self, instrumentation, name, fields):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.fields = fields
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.started
+        stats = self.instrumentation.timers.setdefault(self.name, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] = max(stats[2], seconds)
+        self.instrumentation.record({"type": "timer", "name": self.name, "seconds": round(seconds, 6), **self.fields})
+        return False
+
+
+# Process-wide instrumentation used by all modules
+instrumentation = Instrumentation()
+timer = instrumentation.timer
+count = instrumentation.count
+event = instrumentation.event
+
+if os.environ.get("TIMETABLE_TRACE"):
+    instrumentation.enable(os.environ["TIMETABLE_TRACE"], echo=bool(os.environ.get("TIMETABLE_TRACE_ECHO")))
@@ -1,120 +1,194 @@
 import random
-from ortools.sat.python import cp_model
+import time
+
+from checkpoint import Checkpointer
+from instrumentation import count, event, timer
 
 class TimetableIP:
-    def __init__(self, model):
+    def __init__(self, model, time_limit=60, num_workers=None, checkpoint=None, checkpoint_interval=60.0,
+                 resume=False, seed=None):
+        """
+        :param model: The problem model (ProblemModel).
+        :param time_limit: Time limit of CP-SAT in seconds.
+        :param num_workers: Number of CP-SAT search workers (by default CP-SAT uses all cores).
+        :param checkpoint: Optional path of a checkpoint file the incumbent timetable is saved to.
+        :param checkpoint_interval: Seconds between two checkpoints.
+        :param resume: Continue from the checkpoint file if it exists: CP-SAT keeps no state between runs,
+                       so the saved incumbent is given as solution hint and the time limit covers both runs.
+        :param seed: Seed of the perturbation of the objective weights and of CP-SAT.
+        """
         self.model = model
+        self.time_limit = time_limit
+        self.num_workers = num_workers
+        self.checkpointer = Checkpointer(checkpoint, checkpoint_interval, engine="ip")
+        self.resume = resume
+        self.seed = seed
+
+    def solve(self, hint=None):
+        """
+        Solve the timetabling problem with CP-SAT.
+
+        :param hint: Optional timetable (list of tuples (course_id, room_id, day, slot)) used as a solution hint.
+        :return: List of tuples (course_id, room_id, day, slot).
+        """
+        from ortools.sat.python import cp_model  # Imported here, as it is slow to import
+
+        saved = self.checkpointer.load() if self.resume else None
+        elapsed = 0.0
+        if saved is not None:
+            elapsed = saved["elapsed"]
+            if saved["incumbent"] is not None:
+                hint = saved["incumbent"]
+                if elapsed >= self.time_limit:
+                    return hint
+        start = time.perf_counter() - elapsed
 
-    def solve(self):
         cp_model_instance = cp_model.CpModel()
 
         # Extract data from ProblemModel
         courses = self.model.get_courses()
         rooms = self.model.get_rooms()
         periods = [(d, s) for d in range(self.model.get_nr_days()) for s in range(self.model.get_nr_slots_per_day())]
-        conflict_graph = self.model.get_conflict_graph()
+        with timer("ip.conflict_graph"):
+            conflict_graph = self.model.get_conflict_graph()
 
-        print("Starting to define variables...")
         # Step 1: Define variables x[c, p, r] (course, period, room)
         x = {}
-        for course in courses:
-            for period in periods:
-                for room in rooms:
-                    x[(course.get_id(), period, room.get_id())] = cp_model_instance.NewBoolVar(
-                        f"x_{course.get_id()}_{period}_{room.get_id()}"
-                    )
+        with timer("ip.variables"):
+            for course in courses:
+                for period in periods:
+                    for room in rooms:
+                        x[(course.get_id(), period, room.get_id())] = cp_model_instance.NewBoolVar(
+                            f"x_{course.get_id()}_{period}_{room.get_id()}"
+                        )
+        count("ip.variables", len(x))
 
-        print("Defining constraints...")
         # Step 2: Add constraints
 
-        print("Adding lectures constraint...")
         # (a) Lectures Constraint: All lectures of a course must be scheduled
-        for course in courses:
-            cp_model_instance.Add(
-                sum(
-                    x[(course.get_id(), period, room.get_id())]
-                    for period in periods
-                    for room in rooms
-                )
-                == course.get_nr_lectures()
-            )
-        
-        for course in courses:
-            for period in periods:
+        with timer("ip.constraints.lectures"):
+            for course in courses:
                 cp_model_instance.Add(
                     sum(
                         x[(course.get_id(), period, room.get_id())]
+                        for period in periods
                         for room in rooms
                     )
-                    <= 1  # At most one lecture of the course in this period
+                    == course.get_nr_lectures()
                 )
 
-        # (b) Conflict Constraint: Courses in conflict cannot share the same period
-        print("Adding conflict constraints...")
-        for (course1, course2) in conflict_graph:
-            for period in periods:
-                cp_model_instance.Add(
-                    sum(
-                        x[(course1.get_id(), period, room.get_id())]
-                        for room in rooms
-                    )
-                    + sum(
-                        x[(course2.get_id(), period, room.get_id())]
-                        for room in rooms
+            for course in courses:
+                for period in periods:
+                    cp_model_instance.Add(
+                        sum(
+                            x[(course.get_id(), period, room.get_id())]
+                            for room in rooms
+                        )
+                        <= 1  # At most one lecture of the course in this period
                     )
-                    <= 1
-                )
 
-        # (c) Unavailability Constraint: Courses must respect availability
-        print("Adding unavailability constraints...")
-        for course in courses:
-            unavailable_periods = course.unavailable_periods  # Retrieve unavailable periods for the course
-            for day, slot in unavailable_periods:
-                for room in rooms:
+        # (b) Conflict Constraint: Courses in conflict cannot share the same period
+        with timer("ip.constraints.conflicts"):
+            for (course1, course2) in conflict_graph:
+                for period in periods:
                     cp_model_instance.Add(
-                        x[(course.get_id(), (day, slot), room.get_id())] == 0
+                        sum(
+                            x[(course1.get_id(), period, room.get_id())]
+                            for room in rooms
+                        )
+                        + sum(
+                            x[(course2.get_id(), period, room.get_id())]
+                            for room in rooms
+                        )
+                        <= 1
                     )
 
+        # (c) Unavailability Constraint: Courses must respect availability
+        with timer("ip.constraints.unavailability"):
+            for course in courses:
+                unavailable_periods = course.unavailable_periods  # Retrieve unavailable periods for the course
+                for day, slot in unavailable_periods:
+                    for room in rooms:
+                        cp_model_instance.Add(
+                            x[(course.get_id(), (day, slot), room.get_id())] == 0
+                        )
+
         # (d) Room Occupation Constraint: At most one course per room in a period
-        print("Adding room occupation constraints...")
-        for period in periods:
-            for room in rooms:
-                cp_model_instance.Add(
-                    sum(
-                        x[(course.get_id(), period, room.get_id())]
-                        for course in courses
+        with timer("ip.constraints.room_occupation"):
+            for period in periods:
+                for room in rooms:
+                    cp_model_instance.Add(
+                        sum(
+                            x[(course.get_id(), period, room.get_id())]
+                            for course in courses
+                        )
+                        <= 1
                     )
-                    <= 1
-                )
 
         # Step 3: Randomized Objective function 
         # Add slight random perturbation to the priority weights
-        cp_model_instance.Minimize(
-            sum(
-                (course.get_priority(day, slot) + random.uniform(-0.1, 0.1)) *
-                x[(course.get_id(), (day, slot), room.get_id())]
-                for course in courses
-                for day, slot in periods
-                for room in rooms
+        with timer("ip.objective"):
+            rng = random.Random(self.seed)
+            cp_model_instance.Minimize(
+                sum(
+                    (course.get_priority(day, slot) + rng.uniform(-0.1, 0.1)) *
+                    x[(course.get_id(), (day, slot), room.get_id())]
+                    for course in courses
+                    for day, slot in periods
+                    for room in rooms
+                )
             )
-        )
+        count("ip.constraints", len(cp_model_instance.Proto().constraints))
+
+        # Hint the solver with a known timetable
+        if hint:
+            hinted = {(course_id, (day, slot), room_id) for course_id, room_id, day, slot in hint}
+            for key, var in x.items():
+                cp_model_instance.AddHint(var, 1 if key in hinted else 0)
 
         # Solve the model
         solver = cp_model.CpSolver()
         solver.parameters.log_search_progress = True
-        solver.parameters.max_time_in_seconds = 60
-        status = solver.Solve(cp_model_instance)
+        solver.parameters.max_time_in_seconds = max(self.time_limit - elapsed, 0.0)
+        if self.num_workers:
+            solver.parameters.num_workers = self.num_workers
+        if self.seed is not None:
+            solver.parameters.random_seed = self.seed % 2 ** 31
+        callback = None
+        if self.checkpointer.enabled:
+            checkpointer = self.checkpointer
+
+            class IncumbentCheckpoint(cp_model.CpSolverSolutionCallback):
+                """Save the incumbent timetable when a new solution is found and the interval has passed."""
+                def on_solution_callback(self):
+                    if checkpointer.due():
+                        checkpointer.save({"incumbent": [(course_id, room_id, day, slot)
+                                                         for (course_id, (day, slot), room_id), var in x.items()
+                                                         if self.Value(var)],
+                                           "objective": self.ObjectiveValue(), "elapsed": time.perf_counter() - start})
+
+            callback = IncumbentCheckpoint()
+        with timer("ip.solve"):
+            status = solver.Solve(cp_model_instance, callback)
+        event("ip.status", status=solver.StatusName(status), objective=solver.ObjectiveValue()
+              if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) else None)
 
         # Extract solution
         if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
             solution = []
-            for course in courses:
-                for day, slot in periods:
-                    for room in rooms:
-                        if solver.Value(x[(course.get_id(), (day, slot), room.get_id())]) == 1:
-                            solution.append((course.get_id(), room.get_id(), day, slot))
+            with timer("ip.extraction"):
+                for course in courses:
+                    for day, slot in periods:
+                        for room in rooms:
+                            if solver.Value(x[(course.get_id(), (day, slot), room.get_id())]) == 1:
+                                solution.append((course.get_id(), room.get_id(), day, slot))
 
+            self.checkpointer.save({"incumbent": solution, "objective": solver.ObjectiveValue(),
+                                    "elapsed": time.perf_counter() - start})
             return solution
         else:
-            print("No feasible solution found.")
-            return None, None
+            # Keep the incumbent of the resumed run, recording the time spent
+            saved = saved or {"incumbent": None, "objective": None}
+            self.checkpointer.save({"incumbent": saved["incumbent"], "objective": saved["objective"],
+                                    "elapsed": time.perf_counter() - start})
+            return saved["incumbent"] if saved["incumbent"] is not None else (None, None)
@@ -2,6 +2,10 @@ import os
 from data_processing import DataProcessor
 from ProblemModel import ProblemModel
 from integer_program import TimetableIP
+from MinConflictsRepair import repair_solution
+from instrumentation import instrumentation
+from profiling import profiler_for
+from timetable_io import generate_output_file
 
 
 def is_feasible(solution, model):
@@ -49,18 +53,26 @@ def is_feasible(solution, model):
 
 def main():
     file_path = "./ConvertedFiles/comp02_converted.xlsx"
+    profiler = profiler_for(file_path)
     model = ProblemModel()
     processor = DataProcessor(file_path)
-    processor.initialize_model(model=model)
+    with profiler.phase("load"):
+        processor.load_data()
+    with profiler.phase("build"):
+        processor.initialize_model(model=model)
 
     print("\nGenerating solutions using Integer Programming...")
     solutions = []
 
     for _ in range(10):  # Generate multiple solutions
         timetable_solver = TimetableIP(model)
-        solution = timetable_solver.solve()
-        if solution and is_feasible(solution, model):
-            solutions.append(solution)
+        with profiler.phase("solve"):
+            solution = timetable_solver.solve()
+        with profiler.phase("post-process"):
+            if solution and not is_feasible(solution, model):
+                solution = repair_solution(solution, model)
+            if solution and is_feasible(solution, model):
+                solutions.append(solution)
 
     if not solutions:
         print("No feasible solutions generated.")
@@ -73,18 +85,9 @@ def main():
         output_file = f"./Validator/Solution_IP_{i + 1}.out"
         generate_output_file(solution, output_file)
 
-
-def generate_output_file(solution, filename):
-    """
-    Generate an output file for a timetable solution.
-
-    :param solution: The solution as a list of tuples (course_id, room_id, day, slot).
-    :param filename: Path to the output file.
-    """
-    with open(filename, "w") as f:
-        for course_id, room_id, day, slot in solution:
-            f.write(f"{course_id} {room_id} {day} {slot}\n")
-    print(f"Output saved to {filename}")
+    if instrumentation.enabled:
+        instrumentation.flush_counters()
+        print(instrumentation.summary())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,176 @@
+"""
+Per-phase profiling of solver runs.
+
+A Profiler captures a cProfile profile and tracemalloc statistics for every phase of a run (load,
+build, solve, post-process) and writes them to an output directory, one set of files per instance:
+
+- <instance>.<phase>.pstats: cProfile statistics, readable with pstats or snakeviz;
+- <instance>.<phase>.folded: collapsed stacks for flamegraph.pl, speedscope or inferno;
+- <instance>.<phase>.memory.txt: the memory allocated during the phase, grouped by module;
+- <instance>.profile.json: seconds, peak memory and top modules of every phase.
+
+Profiling is enabled by setting the TIMETABLE_PROFILE environment variable to the output directory.
+"""
+import contextlib
+import cProfile
+import json
+import os
+import pstats
+import time
+import tracemalloc
+
+
+class Profiler:
+    def __init__(self, output_dir, instance, memory=True, top=25):
+        """
+        :param output_dir: Directory receiving the profile files (created if needed); None disables profiling.
+        :param instance: Name of the instance, used as the prefix of the files.
+        :param memory: Also trace memory allocations (slows the run down considerably).
+        :param top: Number of modules reported in the memory breakdown.
+        """
+        self.output_dir = output_dir
+        self.instance = instance
+        self.memory = memory
+        self.top = top
+        self.phases = {}
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+    @property
+    def enabled(self):
+        return bool(self.output_dir)
+
+    def path(self, suffix):
+        """Return the path of a profile file of the instance."""
+        return os.path.join(self.output_dir, f"{self.instance}.{suffix}")
+
+    def phase(self, name):
+        """
+        Return a context manager profiling the enclosed phase (a no-op when profiling is disabled).
+        A phase that is run again is numbered: solve, solve-2, solve-3, ...
+        """
+        if not self.enabled:
+            return contextlib.nullcontext()
+        number = 1
+        while (name if number == 1 else f"{name}-{number}") in self.phases:
+            number += 1
+        return self._profile(name if number == 1 else f"{name}-{number}")
+
+    @contextlib.contextmanager
+    def _profile(self, name):
+        started_tracing = self.memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if self.memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            record = {"seconds": round(time.perf_counter() - start, 6)}
+            self.phases[name] = record
+            profile.dump_stats(self.path(f"{name}.pstats"))
+            write_folded(pstats.Stats(profile), self.path(f"{name}.folded"))
+            if self.memory:
+                _, peak = tracemalloc.get_traced_memory()
+                modules = memory_by_module(tracemalloc.take_snapshot(), before)
+                record["peak_memory_kb"] = peak // 1024
+                record["modules_kb"] = {module: size // 1024 for module, size in modules[:self.top] if size >= 1024}
+                with open(self.path(f"{name}.memory.txt"), "w") as f:
+                    f.write(f"Peak traced memory: {peak / 1024:.0f} KB\n")
+                    for module, size in modules:
+                        f.write(f"{size / 1024:12.1f} KB  {module}\n")
+                if started_tracing:
+                    tracemalloc.stop()
+            self.write_summary()
+
+    def write_summary(self):
+        """Write the summary of all profiled phases to <instance>.profile.json."""
+        with open(self.path("profile.json"), "w") as f:
+            json.dump({"instance": self.instance, "phases": self.phases}, f, indent=1)
+
+
+def memory_by_module(snapshot, before=None):
+    """
+    Group the memory of a tracemalloc snapshot by module.
+
+    :param snapshot: The snapshot at the end of a phase.
+    :param before: Optional snapshot at the start of the phase; only the growth is then reported.
+    :return: List of (module, bytes) sorted by decreasing size.
+    """
+    # Leave out the allocations of the profiler itself
+    exclude = [tracemalloc.Filter(False, pattern) for pattern in
+               (tracemalloc.__file__, cProfile.__file__, pstats.__file__, __file__)]
+    snapshot = snapshot.filter_traces(exclude)
+    if before is None:
+        statistics = [(stat.traceback, stat.size) for stat in snapshot.statistics("filename")]
+    else:
+        statistics = [(stat.traceback, stat.size_diff)
+                      for stat in snapshot.compare_to(before.filter_traces(exclude), "filename")]
+    sizes = {}
+    for traceback, size in statistics:
+        module = _module_name(traceback[0].filename)
+        sizes[module] = sizes.get(module, 0) + size
+    return sorted(((module, size) for module, size in sizes.items() if size > 0), key=lambda item: -item[1])
+
+
+def _module_name(filename):
+    """Return a short module name for a file: the package below site-packages, or the file name."""
+    parts = filename.replace("\\", "/").split("/")
+    for marker in ("site-packages", "dist-packages"):
+        if marker in parts:
+            return parts[parts.index(marker) + 1].split(".")[0]
+    if "lib" in parts and parts[-1].endswith(".py") and any(part.startswith("python") for part in parts):
+        return "stdlib:" + parts[-1][:-3]
+    return os.path.basename(filename)
+
+
+def write_folded(stats, path, max_depth=40, min_microseconds=1):
+    """
+    Write cProfile statistics as collapsed stacks ("frame;frame;frame microseconds" per line).
+    cProfile only records caller -> callee edges, so the full stacks are reconstructed by spreading
+    the own time of every function over its callers in proportion to the time spent in each call.
+
+    :param stats: The statistics (pstats.Stats).
+    :param path: Path of the output file.
+    """
+    entries = stats.stats
+
+    def label(function):
+        filename, line, name = function
+        return f"{name} ({os.path.basename(filename)}:{line})" if line else name
+
+    stacks = {}
+
+    def unwind(function, weight, stack):
+        callers = entries[function][4] if function in entries else {}
+        callers = {caller: timing for caller, timing in callers.items() if caller not in stack}
+        total = sum(timing[3] for timing in callers.values())
+        if not callers or total <= 0 or len(stack) >= max_depth:
+            key = ";".join(label(f) for f in reversed(stack))
+            stacks[key] = stacks.get(key, 0) + weight
+            return
+        for caller, timing in callers.items():
+            share = weight * timing[3] / total
+            if share >= min_microseconds:
+                unwind(caller, share, stack + (caller,))
+
+    for function, (_, _, own_time, _, _) in entries.items():
+        if own_time * 1e6 >= min_microseconds:
+            unwind(function, own_time * 1e6, (function,))
+
+    with open(path, "w") as f:
+        for key, weight in sorted(stacks.items()):
+            if weight >= min_microseconds:
+                f.write(f"{key} {int(round(weight))}\n")
+
+
+def profiler_for(file_path):
+    """Return the profiler of a run on an instance file, enabled by the TIMETABLE_PROFILE environment variable."""
+    instance = os.path.splitext(os.path.basename(str(file_path)))[0]
+    return Profiler(os.environ.get("TIMETABLE_PROFILE"), instance,
+                    memory=os.environ.get("TIMETABLE_PROFILE_MEMORY", "1") != "0")
@@ -3,6 +3,9 @@ from data_processing import DataProcessor
 from ProblemModel import ProblemModel
 from GameTheory import game_theory_timetabling
 from integer_program import TimetableIP
+from MinConflictsRepair import repair_solution
+from profiling import profiler_for
+from timetable_io import generate_output_file
 
 
 def detect_violations(solution, model):
@@ -87,35 +90,28 @@ def detect_violations(solution, model):
     return violations
 
 
-def generate_output_file(solution, filename):
-    """
-    Generate an output file for a timetable solution.
-
-    :param solution: The solution as a list of tuples (course_id, room_id, day, slot).
-    :param filename: Path to the output file.
-    """
-    with open(filename, "w") as f:
-        for course_id, room_id, day, slot in solution:  # Unpack all four elements
-            f.write(f"{course_id} {room_id} {day} {slot}\n")  # Include room_id in the output
-    print(f"Output saved to {filename}")
-
-
 def main():
     file_path = "./ConvertedFiles/comp21_converted.xlsx"  # Replace with the actual path to your Excel file
 
+    profiler = profiler_for(file_path)
+
     # Initialize the ProblemModel
     model = ProblemModel()
 
     # Load data into the model using the DataProcessor
     processor = DataProcessor(file_path)
-    processor.initialize_model(model=model)
+    with profiler.phase("load"):
+        processor.load_data()
+    with profiler.phase("build"):
+        processor.initialize_model(model=model)
 
     # Test Integer Programming directly
     print("\nSolving the timetable problem using Integer Programming...")
     try:
         # Solve timetabling problem
         timetable_solver = TimetableIP(model)
-        solution = timetable_solver.solve()
+        with profiler.phase("solve"):
+            solution = timetable_solver.solve()
     except ValueError as e:
         print(f"\nError during scheduling: {e}")
         return
@@ -126,8 +122,13 @@ def main():
         output_file = "./Validator/Solution21.out"
         generate_output_file(solution, output_file)
 
-        # Detect and print violations
-        violations = detect_violations(solution, model)
+        # Detect violations and repair them before reporting
+        with profiler.phase("post-process"):
+            violations = detect_violations(solution, model)
+            if any(violations.values()):
+                solution = repair_solution(solution, model, violations)
+                generate_output_file(solution, output_file)
+                violations = detect_violations(solution, model)
         if violations:
             print("\nDetected Violations:")
             for violation_type, details in violations.items():
@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+# The modules of the solver live in the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+COMP01 = os.path.join(ROOT, "Input Files", "comp01.ctt")
+
+
+@pytest.fixture(scope="session")
+def load_model():
+    """Factory of fresh problem models (of comp01 by default), for solvers that modify their model."""
+    from data_processing import DataProcessor
+    from ProblemModel import ProblemModel
+
+    def load(path=COMP01):
+        model = ProblemModel()
+        DataProcessor(str(path)).initialize_model(model=model)
+        return model
+
+    return load
+
+
+@pytest.fixture(scope="session")
+def comp01_model(load_model):
+    """Problem model of comp01, shared by the tests that only read it."""
+    return load_model()
+
+
+@pytest.fixture(scope="session")
+def comp01_instance(comp01_model):
+    """Compiled instance of comp01."""
+    from CompiledInstance import CompiledInstance
+
+    return CompiledInstance(comp01_model)
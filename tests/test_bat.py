@@ -0,0 +1,17 @@
+import numpy as np
+
+from Bat import BATCH_DECODE_MIN, decode_population, decode_random_keys
+
+
+def test_batch_decoder_matches_decode_random_keys(comp01_instance):
+    instance = comp01_instance
+    keys = np.random.default_rng(0).random((BATCH_DECODE_MIN, instance.nr_lectures))
+    keys[:10] = np.round(keys[:10], 1)  # Ties in the key order
+    keys[10] = 0.5  # Every lecture wants the same period
+
+    periods, rooms, violations = decode_population(keys, instance)
+    for i, bat in enumerate(keys):
+        expected_periods, expected_rooms, expected_violations = decode_random_keys(bat, instance)
+        assert (periods[i] == expected_periods).all() and (rooms[i] == expected_rooms).all()
+        assert violations[i] == expected_violations
+    assert violations.any()
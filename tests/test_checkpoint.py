@@ -0,0 +1,92 @@
+from Bat import BatAlgorithm
+from benchmark import BENCHMARK_SOLVERS
+from checkpoint import read_checkpoint
+from DsaturSolver import DsaturSolver
+from MemeticAlgorithm import MemeticAlgorithm
+from SimulatedAnnealing import SimulatedAnnealing
+from TabuSearch import TabuSearch
+
+# A run stopped after N iterations and resumed from its checkpoint up to 2N iterations must end exactly
+# where an uninterrupted run of 2N iterations ends. The resumed run gets another seed: the random generator
+# has to continue from the checkpoint, not start over.
+N = 3
+
+
+def test_annealing_resume(comp01_model, tmp_path):
+    checkpoint = str(tmp_path / "annealing.ckpt")
+    settings = {"time_limit": 1e9, "seed": 3, "verbose": False, "steps_per_temperature": 1000, "reheat_after": 3}
+
+    uninterrupted = SimulatedAnnealing(comp01_model, max_iterations=2 * N * 5000, **settings)
+    expected = uninterrupted.solve()
+    SimulatedAnnealing(comp01_model, max_iterations=N * 5000, checkpoint=checkpoint, **settings).solve()
+    resumed = SimulatedAnnealing(comp01_model, max_iterations=2 * N * 5000, checkpoint=checkpoint, resume=True,
+                                 **{**settings, "seed": 0})
+
+    assert resumed.solve() == expected
+    assert resumed.best_value == uninterrupted.best_value
+    assert resumed.state.period == uninterrupted.state.period and resumed.state.room == uninterrupted.state.room
+    assert resumed.stats["accepted"] == uninterrupted.stats["accepted"]
+
+
+def test_tabu_resume(tmp_path, load_model):
+    # Tabu search updates the problem model, so every run gets its own
+    checkpoint = str(tmp_path / "tabu.ckpt")
+    settings = {"time_limit": 1e9, "seed": 5, "verbose": False}
+    model = load_model()
+    start = DsaturSolver(model, seed=0).solve()
+
+    uninterrupted = TabuSearch(model, max_iterations=2 * N * 50, **settings)
+    expected = uninterrupted.solve(start)
+    TabuSearch(load_model(), max_iterations=N * 50, checkpoint=checkpoint, **settings).solve(start)
+    resumed = TabuSearch(load_model(), max_iterations=2 * N * 50, checkpoint=checkpoint, resume=True,
+                         **{**settings, "seed": 0})
+
+    assert resumed.solve() == expected
+    assert resumed.best_value == uninterrupted.best_value
+    assert list(resumed.tabu) == list(uninterrupted.tabu)
+
+
+def test_memetic_resume(comp01_model, tmp_path):
+    checkpoint = str(tmp_path / "memetic.ckpt")
+    settings = {"population_size": 4, "local_search_moves": 200, "time_limit": 1e9, "seed": 2, "verbose": False}
+
+    uninterrupted = MemeticAlgorithm(comp01_model, max_generations=2 * N, **settings)
+    expected = uninterrupted.solve()
+    MemeticAlgorithm(comp01_model, max_generations=N, checkpoint=checkpoint, **settings).solve()
+    resumed = MemeticAlgorithm(comp01_model, max_generations=2 * N, checkpoint=checkpoint, resume=True,
+                               **{**settings, "seed": 0})
+
+    assert resumed.solve() == expected
+    assert resumed.generation == 2 * N
+    assert (resumed.periods == uninterrupted.periods).all() and (resumed.rooms == uninterrupted.rooms).all()
+    assert resumed.costs.tolist() == uninterrupted.costs.tolist()
+
+
+def test_bat_resume(comp01_instance, tmp_path):
+    checkpoint = str(tmp_path / "bat.ckpt")
+    instance = comp01_instance
+
+    def bat(generations, seed=4, **options):
+        return BatAlgorithm(D=instance.nr_lectures, NP=10, N_Gen=generations, A=0.9, r=0.5, Qmin=0.0, Qmax=2.0,
+                            Lower=0.0, Upper=1.0, function=None, seed=seed, **options)
+
+    uninterrupted = bat(2 * N)
+    expected = uninterrupted.move_bat(instance)
+    bat(N, checkpoint=checkpoint).move_bat(instance)
+    resumed = bat(2 * N, seed=0, checkpoint=checkpoint, resume=True)
+
+    assert (resumed.move_bat(instance) == expected).all()
+    assert resumed.f_min == uninterrupted.f_min
+    assert (resumed.Sol == uninterrupted.Sol).all() and (resumed.v == uninterrupted.v).all()
+
+
+def test_bat_restarts_resume(comp01_model, tmp_path):
+    # The restarts are bounded by time, so the resumed run is given no time left: it must return the saved best
+    checkpoint = str(tmp_path / "bat-restarts.ckpt")
+    best, first_feasible = BENCHMARK_SOLVERS["bat"](comp01_model, 1.0, 7, None, checkpoint=checkpoint)
+    saved = read_checkpoint(checkpoint)["state"]
+    assert best and saved["seed"] > 7 and saved["first_feasible"] == first_feasible
+
+    resumed, _ = BENCHMARK_SOLVERS["bat"](comp01_model, saved["elapsed"], 0, None, checkpoint=checkpoint, resume=True)
+    assert resumed == best
+    assert read_checkpoint(checkpoint)["state"]["seed"] == saved["seed"]
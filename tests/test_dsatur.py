@@ -0,0 +1,39 @@
+from DsaturSolver import DsaturSolver
+
+# Two courses of one curriculum over four periods (two days of two slots) and one room. Course cA can
+# only use periods 0 and 1, cB can use periods 0, 2 and 3: both periods of cA are equally saturated,
+# but period 0 takes away an option of cB and period 1 does not.
+TIE_BREAK_INSTANCE = """Name: tiebreak
+Courses: 2
+Rooms: 1
+Days: 2
+Periods_per_day: 2
+Curricula: 1
+Constraints: 3
+
+COURSES:
+cA t1 1 1 10
+cB t2 1 1 10
+
+ROOMS:
+r1 20
+
+CURRICULA:
+q1 2 cA cB
+
+UNAVAILABILITY_CONSTRAINTS:
+cA 1 0
+cA 1 1
+cB 0 1
+
+END.
+"""
+
+
+def test_least_constraining_period(tmp_path, load_model):
+    path = tmp_path / "tiebreak.ctt"
+    path.write_text(TIE_BREAK_INSTANCE)
+    for seed in range(20):
+        model = load_model(path)
+        solution = DsaturSolver(model, seed=seed).solve()
+        assert ("cA", "r1", 0, 1) in solution
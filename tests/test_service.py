@@ -0,0 +1,49 @@
+import asyncio
+import threading
+
+import pytest
+
+from conftest import COMP01
+from SolverService import SolverService, submit
+
+
+@pytest.fixture
+def service_address():
+    """Run a solver service with one worker on a free localhost port."""
+    service = SolverService(port=0, workers=1)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    asyncio.run_coroutine_threadsafe(service.start(), loop).result(timeout=30)
+    yield f"127.0.0.1:{service.port}"
+    asyncio.run_coroutine_threadsafe(service.stop(), loop).result(timeout=30)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def instance_cached(events):
+    """Whether the worker had the instance resident when the job started."""
+    return next(event["cached"] for event in events
+                if event["event"] == "progress" and event.get("name") == "service.instance")
+
+
+def test_solve_and_score_jobs(service_address):
+    events = list(submit({"type": "solve", "instance": COMP01, "solver": "dsatur", "time_limit": 5, "seed": 0},
+                         service_address, timeout=60))
+    assert events[0]["event"] == "accepted" and events[-1]["event"] == "result"
+    assert any(event["event"] == "progress" for event in events)
+    assert not instance_cached(events)
+    result = events[-1]
+    assert result["feasible"] and result["timetable"]
+
+    events = list(submit({"type": "score", "instance": COMP01, "timetable": result["timetable"]},
+                         service_address, timeout=60))
+    assert events[0]["event"] == "accepted" and events[-1]["event"] == "result"
+    assert instance_cached(events)  # The worker kept the model of the solve job
+    assert events[-1]["cost"] == result["cost"]
+
+
+def test_job_must_be_an_object(service_address):
+    events = list(submit([], service_address, timeout=60))
+    assert events == [{"event": "error", "error": "a job must be a JSON object"}]
@@ -0,0 +1,16 @@
+from DsaturSolver import DsaturSolver
+from Solution import Solution
+
+
+def test_score_counts_unscheduled_lectures_once(comp01_model, comp01_instance):
+    instance = comp01_instance
+    timetable = DsaturSolver(comp01_model, seed=0).solve()
+
+    score = Solution.from_tuples(instance, timetable).score()
+    assert score["feasible"] and not any(score["hard_violations"].values())
+    assert score["cost"] == sum(score[component] for component in
+                                ("RoomCapacity", "MinimumWorkingDays", "CurriculumCompactness", "RoomStability"))
+
+    score = Solution.from_tuples(instance, timetable[:-2]).score()
+    assert score["hard_violations"]["lectures"] == 2
+    assert not score["feasible"] and score["cost"] is None
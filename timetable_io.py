@@ -0,0 +1,33 @@
+"""
+Reading and writing timetables in the ITC-2007 output format: one "course_id room_id day slot" line per lecture.
+"""
+
+
+def generate_output_file(solution, filename):
+    """
+    Generate an output file for a timetable solution.
+
+    :param solution: The solution as a list of tuples (course_id, room_id, day, slot).
+    :param filename: Path to the output file.
+    """
+    with open(filename, "w") as f:
+        for course_id, room_id, day, slot in solution:
+            f.write(f"{course_id} {room_id} {day} {slot}\n")
+    print(f"Output saved to {filename}")
+
+
+def read_output_file(filename):
+    """
+    Read a timetable solution from an output file (one "course_id room_id day slot" line per lecture).
+
+    :param filename: Path to the output file.
+    :return: The solution as a list of tuples (course_id, room_id, day, slot).
+    """
+    solution = []
+    with open(filename) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 4:
+                course_id, room_id, day, slot = parts
+                solution.append((course_id, room_id, int(day), int(slot)))
+    return solution